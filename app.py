@@ -1,10 +1,15 @@
 import argparse
+from concurrent.futures import Future
 
 from src.app_manager import GEXIndicatorManager
-from src.scripts.telegram_bot import IntegrateTelegramBot
+from src.downloader import BaseDownloader
+from src.scripts.telegram_bot import TelegramDelivery
 
 
-def _args() -> dict:
+def _args(argv: list[str] | None = None) -> dict:
+    """
+    Parse the command line arguments (`argv`, e.g. the arguments of a Telegram command, or `sys.argv`).
+    """
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--urls",
@@ -38,18 +43,73 @@ def _args() -> dict:
         action="store_true",
         help="Consider only Zero Days To Expiration options (0DTE). Ommit to calculate all expirations.",
     )
+    parser.add_argument(
+        "--export_json",
+        action="store_true",
+        help="Also store the processed data as a human readable JSON file (besides the compact .npz archive).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Update the previous snapshot of the same asset only with the changed contracts (faster reruns).",
+    )
+    parser.add_argument(
+        "--gamma_kernel",
+        type=str,
+        help="Gamma Exposure kernel: 'numpy', 'scalar' (reference) or 'numba' (if installed). Default: GAMMA_KERNEL.",
+    )
+    parser.add_argument(
+        "--profile_stages",
+        action="store_true",
+        help="Dump a cProfile and trace the peak memory of every pipeline stage (at data/metrics/profiles/<run id>).",
+    )
+    parser.add_argument(
+        "--concurrent_downloads",
+        action="store_true",
+        help="Download the URLs concurrently in one browser (at most DOWNLOAD_CONCURRENCY pages at a time).",
+    )
+    parser.add_argument(
+        "--download_method",
+        type=str,
+        choices=["browser", "http"],
+        help="'browser' (Playwright) or 'http' (CBOE delayed quotes API, no browser). Default: DOWNLOAD_METHOD.",
+    )
+    parser.add_argument(
+        "--no_download_cache",
+        action="store_true",
+        help="Download the pages again even when a fresh download is cached (DOWNLOAD_CACHE_TTL_SECONDS).",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Parse the CSV files in chunks (CBOE_CSV_CHUNK_ROWS) with bounded memory, for very large chains.",
+    )
+    parser.add_argument(
+        "--no_persist",
+        action="store_true",
+        help="Do not store the processed data and the Gamma Flip point (lower latency, only charts and Pine Script).",
+    )
     parser.add_argument(
         "--telegram_chat_id",
         type=str,
         help="Passed automatically by the Webhook when in Telegram Chat Mode.",
     )
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     urls = args.urls.split(",") if args.urls else None
     expiration_type = args.expiration_type
     expiration_month = args.expiration_month
     split_visualization = args.split_visualization
     zero_dte = args.zero_dte
     calc_flip_point = args.flip_point
+    export_json = args.export_json
+    incremental = args.incremental
+    gamma_kernel = args.gamma_kernel
+    profile_stages = args.profile_stages
+    persist = not args.no_persist
+    streaming = args.streaming
+    concurrent_downloads = args.concurrent_downloads
+    download_method = args.download_method
+    download_cache = not args.no_download_cache
     telegram_chat_id = args.telegram_chat_id
     return {
         "urls": urls,
@@ -58,52 +118,114 @@ def _args() -> dict:
         "split_visualization": split_visualization,
         "zero_dte": zero_dte,
         "calc_flip_point": calc_flip_point,
+        "export_json": export_json,
+        "incremental": incremental,
+        "gamma_kernel": gamma_kernel,
+        "profile_stages": profile_stages,
+        "persist": persist,
+        "streaming": streaming,
+        "concurrent_downloads": concurrent_downloads,
+        "download_method": download_method,
+        "download_cache": download_cache,
         "telegram_chat_id": telegram_chat_id,
     }
 
 
-if __name__ == "__main__":
-    args = _args()
-
-    app_manager = GEXIndicatorManager(
+def build_manager(
+    args: dict, downloader: BaseDownloader | None = None, reports_dir: str | None = None
+) -> GEXIndicatorManager:
+    """
+    Create the manager of a run from the parsed arguments (see `_args`).
+    Args:
+        args (dict): Parsed arguments.
+        downloader (BaseDownloader | None): Downloader kept by a long-lived process (e.g. a webhook worker).
+        reports_dir (str | None): Directory of the charts. Defaults to REPORTS_DIR.
+    Returns:
+        GEXIndicatorManager: The manager.
+    """
+    return GEXIndicatorManager(
         urls=args.get("urls"),
         expiration_type=args.get("expiration_type"),
         expiration_month=args.get("expiration_month"),
         split_visualization=args.get("split_visualization"),
         parse_only_zero_dte=args.get("zero_dte"),
         calc_flip_point=args.get("calc_flip_point"),
+        export_json=args.get("export_json"),
+        incremental=args.get("incremental"),
+        gamma_kernel=args.get("gamma_kernel"),
+        profile_stages=args.get("profile_stages"),
+        persist=args.get("persist"),
+        streaming=args.get("streaming"),
+        concurrent_downloads=args.get("concurrent_downloads"),
+        download_method=args.get("download_method"),
+        download_cache=args.get("download_cache"),
+        downloader=downloader,
+        reports_dir=reports_dir,
     )
+
+
+def send_results_to_telegram(gex_metrics: dict, chat_id: str, delivery: TelegramDelivery) -> list[Future]:
+    """
+    Queue the chart, the levels and the Pine Script of every asset to a Telegram chat.
+    Args:
+        gex_metrics (dict): Final GEX metrics per asset (see `GEXIndicatorManager.run`).
+        chat_id (str): The target chat ID.
+        delivery (TelegramDelivery): Delivery of the messages (in order for the chat).
+    Returns:
+        list[Future]: The queued sends (see `TelegramDelivery.flush`).
+    """
+    sends = []
+    for asset, gex_data in gex_metrics.items():
+        name_parts = asset.split("_")
+        date_part = name_parts[-1]
+        asset_title = f"{name_parts[1].upper()} {name_parts[2].upper()} {date_part}"
+        sends.append(delivery.send_message(chat_id, f"Metricas para {asset_title}\nGráfico:\n"))
+        with open(gex_data.get("chart_image_path"), "rb") as f:
+            sends.append(delivery.send_photo(chat_id, f.read()))
+
+        sends.append(
+            delivery.send_message(
+                chat_id,
+                (
+                    "\n"
+                    f"🔵 Call Wall: {gex_data.get('call_wall_strike')}\n"
+                    f"🔴 Put Wall: {gex_data.get('put_wall_strike')}\n"
+                    f"🟡 Flip Point: {gex_data.get('flip_point')}\n"
+                    f"Top Calls: {gex_data.get('top_calls')}\n"
+                    f"Top Puts: {gex_data.get('top_puts')}\n\n"
+                    "📲 Pine Script para colar no Code Editor do TradingView:\n\n"
+                    "==============================\n"
+                    f"{gex_data.get('pine_script')}\n"
+                    "==============================\n"
+                ),
+            )
+        )
+    return sends
+
+
+def run_app(args: dict, downloader: BaseDownloader | None = None) -> dict:
+    """
+    Run the GEX indicator with the parsed arguments and, in Telegram Mode, send the results to the chat.
+    Args:
+        args (dict): Parsed arguments (see `_args`).
+        downloader (BaseDownloader | None): Downloader kept by a long-lived process (e.g. a webhook worker).
+    Returns:
+        dict: Final GEX metrics per asset.
+    """
+    app_manager = build_manager(args, downloader)
     gex_metrics = app_manager.run(headless=True, telegram_chat_id=args.get("telegram_chat_id"))
 
     # If in Telegram Mode...
     if chat_id := args.get("telegram_chat_id"):
-        import asyncio
+        delivery = TelegramDelivery()
+        try:
+            send_results_to_telegram(gex_metrics, chat_id, delivery)
+        finally:
+            delivery.close()
 
-        telegram_bot = IntegrateTelegramBot()
-        for asset, gex_data in gex_metrics.items():
-            name_parts = asset.split("_")
-            date_part = name_parts[-1]
-            asset_title = f"{name_parts[1].upper()} {name_parts[2].upper()} {date_part}"
-            asyncio.run(
-                telegram_bot._send_telegram_message(message=f"Metricas para {asset_title}\nGráfico:\n", chat_id=chat_id)
-            )
-            with open(gex_data.get("chart_image_path"), "rb") as f:
-                asyncio.run(telegram_bot._send_photo(chat_id=chat_id, binary_file=f))
+    app_manager.wait_for_persistence()
+    return gex_metrics
 
-            asyncio.run(
-                telegram_bot._send_telegram_message(
-                    message=(
-                        "\n"
-                        f"🔵 Call Wall: {gex_data.get('call_wall_strike')}\n"
-                        f"🔴 Put Wall: {gex_data.get('put_wall_strike')}\n"
-                        f"🟡 Flip Point: {gex_data.get('flip_point')}\n"
-                        f"Top Calls: {gex_data.get('top_calls')}\n"
-                        f"Top Puts: {gex_data.get('top_puts')}\n\n"
-                        "📲 Pine Script para colar no Code Editor do TradingView:\n\n"
-                        "==============================\n"
-                        f"{gex_data.get('pine_script')}\n"
-                        "==============================\n"
-                    ),
-                    chat_id=chat_id,
-                )
-            )
+
+if __name__ == "__main__":
+    run_app(_args())
@@ -0,0 +1,288 @@
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from src.analytics.gamma_exposure import calculate_gex_per_strikes
+from src.parsers.cboe_parser import parse_cboe_csv, read_cboe_last_price
+from src.settings import GAMMA_KERNEL, PROCESSED_DIR, PROJECT_BASE_DIR, RAW_DIR
+from src.storage.results_store import load_gex_results
+from src.utils import extract_date
+
+logger = logging.getLogger("backfill")
+
+BACKFILL_MANIFEST_FILE = os.path.join(PROCESSED_DIR, "backfill_manifest.json")
+# Modules whose changes invalidate the processed outputs
+CODE_VERSION_SOURCES = ["parsers", "analytics", "storage", "utils.py"]
+
+
+def _args() -> dict:
+    parser = argparse.ArgumentParser(description="Reprocess the stored raw CBOE CSV files in parallel.")
+    parser.add_argument(
+        "--files",
+        type=str,
+        default=os.path.join(RAW_DIR, "*.csv"),
+        help="Glob of the raw CSV files to reprocess. Default: every CSV in the raw data directory.",
+    )
+    parser.add_argument("--start_date", type=str, help="First trade date to reprocess (DD-MM-YY).")
+    parser.add_argument("--end_date", type=str, help="Last trade date to reprocess (DD-MM-YY).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes. Default: all cores.")
+    parser.add_argument(
+        "--zero_dte",
+        action="store_true",
+        help="Consider only Zero Days To Expiration options (0DTE). Ommit to calculate all expirations.",
+    )
+    parser.add_argument("--skip_flip_point", action="store_true", help="Do not calculate the Gamma Flip Point.")
+    parser.add_argument("--export_json", action="store_true", help="Also store the processed data as JSON.")
+    parser.add_argument("--gamma_kernel", type=str, help="Gamma Exposure kernel. Default: GAMMA_KERNEL.")
+    parser.add_argument("--force", action="store_true", help="Reprocess files even if the manifest is up to date.")
+    args = parser.parse_args()
+    return {
+        "files": args.files,
+        "start_date": datetime.strptime(args.start_date, "%d-%m-%y") if args.start_date else None,
+        "end_date": datetime.strptime(args.end_date, "%d-%m-%y") if args.end_date else None,
+        "workers": args.workers,
+        "parse_only_zero_dte": args.zero_dte,
+        "calc_flip_point": not args.skip_flip_point,
+        "export_json": args.export_json,
+        "gamma_kernel": args.gamma_kernel,
+        "force": args.force,
+    }
+
+
+def file_hash(file_path: str) -> str:
+    """
+    Hash the content of a file.
+
+    Args:
+        file_path (str): Path of the file.
+
+    Returns:
+        str: SHA-256 hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def code_version() -> str:
+    """
+    Hash the source of the parsing and analytics code, so a formula change reprocesses every file.
+
+    Returns:
+        str: SHA-256 hex digest.
+    """
+    digest = hashlib.sha256()
+    for source in CODE_VERSION_SOURCES:
+        source_path = os.path.join(PROJECT_BASE_DIR, source)
+        paths = sorted(glob.glob(os.path.join(source_path, "**", "*.py"), recursive=True)) or [source_path]
+        for path in paths:
+            digest.update(os.path.relpath(path, PROJECT_BASE_DIR).encode())
+            digest.update(file_hash(path).encode())
+    return digest.hexdigest()
+
+
+def manifest_key(name: str, options: dict) -> str:
+    """
+    Key of a raw file in the backfill manifest, one entry per file and options (a 0DTE and a full backfill of
+    the same file do not overwrite each other's entry).
+
+    Args:
+        name (str): Raw file name.
+        options (dict): Processing options of the backfill.
+
+    Returns:
+        str: "<name>|<option>=<value>,..." with the options sorted.
+    """
+    return f"{name}|{','.join(f'{option}={value}' for option, value in sorted(options.items()))}"
+
+
+def outputs_unchanged(entry: dict) -> bool:
+    """
+    Check that the outputs of a manifest entry are still the ones it wrote (the processed archive is shared by
+    the backfills of a file with other options, which overwrite it).
+
+    Args:
+        entry (dict): Manifest entry.
+
+    Returns:
+        bool: Every output exists with the hash it was written with.
+    """
+    output_hashes = entry.get("output_hashes")
+    if not output_hashes:
+        return False
+    return all(os.path.exists(path) and file_hash(path) == digest for path, digest in output_hashes.items())
+
+
+def load_manifest() -> dict:
+    """
+    Load the backfill manifest ({manifest key: {"input_hash", "code_version", "options", "output_hashes", ...}},
+    see `manifest_key`).
+
+    Returns:
+        dict: The manifest, empty if it does not exist yet.
+    """
+    if not os.path.exists(BACKFILL_MANIFEST_FILE):
+        return {}
+    with open(BACKFILL_MANIFEST_FILE, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict) -> None:
+    """
+    Store the backfill manifest atomically.
+
+    Args:
+        manifest (dict): The manifest.
+    """
+    tmp_path = f"{BACKFILL_MANIFEST_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, BACKFILL_MANIFEST_FILE)
+
+
+def select_files(files_glob: str, start_date: datetime | None, end_date: datetime | None) -> list[str]:
+    """
+    List the raw files matching the glob whose trade date (from the file name) is in the range.
+
+    Args:
+        files_glob (str): Glob of the raw CSV files.
+        start_date (datetime | None): First trade date, unbounded if None.
+        end_date (datetime | None): Last trade date, unbounded if None.
+
+    Returns:
+        list[str]: Raw file paths sorted by trade date.
+    """
+    selected = []
+    for file_path in glob.glob(files_glob):
+        trade_date = extract_date(os.path.basename(file_path))
+        if start_date and trade_date < start_date:
+            continue
+        if end_date and trade_date > end_date:
+            continue
+        selected.append(file_path)
+    return sorted(selected, key=lambda path: extract_date(os.path.basename(path)))
+
+
+def backfill_file(
+    file_path: str, parse_only_zero_dte: bool, calc_flip_point: bool, export_json: bool, gamma_kernel: str | None = None
+) -> dict:
+    """
+    Reprocess one raw file: parse it, store the processed data and the flip point, and summarize the GEX.
+
+    Args:
+        file_path (str): Path of the raw CSV file.
+        parse_only_zero_dte (bool): Consider only 0DTE options.
+        calc_flip_point (bool): Calculate the Gamma Flip Point.
+        export_json (bool): Also store the processed data as JSON.
+        gamma_kernel (str | None): Gamma Exposure kernel of the Gamma Flip.
+
+    Returns:
+        dict: Manifest entry of the file (with the hashes of the processed archive and, if exported, the JSON).
+    """
+    processed_file = parse_cboe_csv(
+        file_path=file_path,
+        last_price=read_cboe_last_price(file_path),
+        parse_only_zero_dte=parse_only_zero_dte,
+        calc_flip_point=calc_flip_point,
+        export_json=export_json,
+        gamma_kernel=gamma_kernel,
+    )
+    gex_per_strike = next(iter(calculate_gex_per_strikes(processed_file_path=processed_file).values()))
+    last_price = gex_per_strike.pop("last_price")
+
+    flip_point = None
+    if calc_flip_point:
+        flip_point = load_gex_results(file_path, parse_only_zero_dte)["flip_point"]
+
+    outputs = [processed_file]
+    if export_json:
+        outputs.append(f"{os.path.splitext(processed_file)[0]}.json")
+
+    return {
+        "processed_file": processed_file,
+        "output_hashes": {path: file_hash(path) for path in outputs},
+        "last_price": last_price,
+        "strikes": len(gex_per_strike),
+        "total_gex": sum(gex["total"] for gex in gex_per_strike.values()),
+        "flip_point": flip_point,
+    }
+
+
+def backfill(
+    files: str,
+    start_date: datetime | None,
+    end_date: datetime | None,
+    workers: int,
+    parse_only_zero_dte: bool,
+    calc_flip_point: bool,
+    export_json: bool,
+    force: bool,
+    gamma_kernel: str | None = None,
+) -> dict:
+    """
+    Reprocess the raw archive over a process pool, skipping files already processed from the same input, code
+    version and options, whose outputs were not overwritten since.
+
+    Returns:
+        dict: The updated manifest.
+    """
+    manifest = load_manifest()
+    version = code_version()
+    options = {
+        "parse_only_zero_dte": parse_only_zero_dte,
+        "calc_flip_point": calc_flip_point,
+        "export_json": export_json,
+        "gamma_kernel": gamma_kernel or GAMMA_KERNEL,
+    }
+
+    pending = {}
+    for file_path in select_files(files, start_date, end_date):
+        name = os.path.basename(file_path)
+        input_hash = file_hash(file_path)
+        entry = manifest.get(manifest_key(name, options), {})
+        up_to_date = (
+            entry.get("input_hash") == input_hash and entry.get("code_version") == version and outputs_unchanged(entry)
+        )
+        if up_to_date and not force:
+            logger.info(f"Skipping '{name}', already processed.")
+            continue
+        pending[file_path] = input_hash
+
+    logger.info(f"Reprocessing {len(pending)} files with {workers} workers...")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                backfill_file, file_path, parse_only_zero_dte, calc_flip_point, export_json, gamma_kernel
+            ): file_path
+            for file_path in pending
+        }
+        for future in as_completed(futures):
+            file_path = futures[future]
+            name = os.path.basename(file_path)
+            try:
+                result = future.result()
+            except Exception as err:
+                logger.error(f"Failed to reprocess '{name}': {err}")
+                continue
+
+            manifest[manifest_key(name, options)] = {
+                "input_hash": pending[file_path],
+                "code_version": version,
+                "options": options,
+                **result,
+            }
+            save_manifest(manifest)
+            logger.info(f"Reprocessed '{name}' (flip point: {result['flip_point']}).")
+
+    return manifest
+
+
+if __name__ == "__main__":
+    backfill(**_args())
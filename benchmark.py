@@ -0,0 +1,254 @@
+import argparse
+import glob
+import json
+import logging
+import matplotlib
+import numpy as np
+import os
+import pandas as pd
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import src.parsers.cboe_parser as cboe_parser
+import src.storage.results_store as results_store
+from src.analytics.gamma_exposure import calculate_gex_per_strikes
+from src.parsers.cboe_parser import (
+    build_gamma_profile,
+    generate_leads,
+    load_cboe_csv,
+    read_cboe_last_price,
+    save_processed_strikes,
+)
+from src.settings import BENCHMARK_HISTORY_FILE, BENCHMARK_REGRESSION_THRESHOLD, RAW_DIR
+from src.vizualization.gex_charts import process_metrics
+
+logger = logging.getLogger("benchmark")
+
+BENCHMARK_STAGES = [
+    "load_cboe_csv",
+    "generate_leads",
+    "build_gamma_profile",
+    "save_processed_strikes",
+    "calculate_gex_per_strikes",
+    "process_metrics",
+]
+
+
+def _args() -> dict:
+    parser = argparse.ArgumentParser(description="Time every stage of the pipeline over the stored raw CBOE files.")
+    parser.add_argument(
+        "--files",
+        type=str,
+        default=os.path.join(RAW_DIR, "*.csv"),
+        help="Glob of the raw CSV files to benchmark. Default: every CSV in the raw data directory.",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per file (the fastest one of each stage counts).")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=BENCHMARK_REGRESSION_THRESHOLD,
+        help="Accepted slowdown of a stage against the baseline (0.25 = 25%%). Default: BENCHMARK_REGRESSION_THRESHOLD",
+    )
+    parser.add_argument(
+        "--save_baseline",
+        action="store_true",
+        help="Store this run as the new baseline (the first run of the history always is).",
+    )
+    args = parser.parse_args()
+    return {
+        "files": args.files,
+        "repeat": args.repeat,
+        "threshold": args.threshold,
+        "save_baseline": args.save_baseline,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _timed(timings: dict, stage: str, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    timings[stage].append(time.perf_counter() - start)
+    return result
+
+
+@contextmanager
+def _isolated_stores(output_dir: str):
+    """
+    Point the processed files, the gamma profiles and the results store at `output_dir`, so a benchmark does not
+    overwrite the outputs of the pipeline.
+    """
+    targets = [
+        (cboe_parser, "PROCESSED_DIR", output_dir),
+        (cboe_parser, "GAMMA_PROFILES_DIR", output_dir),
+        (results_store, "RESULTS_DB_PATH", os.path.join(output_dir, "gex_results.sqlite3")),
+    ]
+    previous = [(module, name, getattr(module, name)) for module, name, _ in targets]
+    for module, name, value in targets:
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for module, name, value in previous:
+            setattr(module, name, value)
+
+
+def benchmark_file(file_path: str, repeat: int, output_dir: str) -> dict:
+    """
+    Run every stage of the pipeline over one raw file, offline and without the parsed chain / gamma profile
+    caches, so each run measures the real work. The Gamma Flip stage is only the calculation (its results are
+    not stored).
+
+    Args:
+        file_path (str): Path of the raw CSV file.
+        repeat (int): Runs of the pipeline.
+        output_dir (str): Where the charts and the processed files are stored (see `_isolated_stores`).
+
+    Returns:
+        dict: Fastest time (seconds) of every stage.
+    """
+    last_price = read_cboe_last_price(file_path)
+    timings = {stage: [] for stage in BENCHMARK_STAGES}
+    for _ in range(repeat):
+        df, metadata = _timed(timings, "load_cboe_csv", load_cboe_csv, file_path, use_cache=False)
+        leads = _timed(timings, "generate_leads", generate_leads, df, metadata, last_price, False, False, file_path)
+        profile = _timed(
+            timings,
+            "build_gamma_profile",
+            build_gamma_profile,
+            df.copy(),
+            metadata,
+            leads.attrs["last_price"],
+            False,
+            file_path,
+            use_cache=False,
+        )
+        flip_point = profile["flip_point"]
+        processed_file = _timed(timings, "save_processed_strikes", save_processed_strikes, leads, file_path)
+        gex_per_asset = _timed(timings, "calculate_gex_per_strikes", calculate_gex_per_strikes, processed_file)
+        for gex_data in gex_per_asset.values():
+            gex_data["flip"] = str(flip_point) if flip_point is not None else ""
+        _timed(timings, "process_metrics", process_metrics, gex_per_asset, output_dir, "total", None, False)
+
+    return {stage: min(seconds) for stage, seconds in timings.items()}
+
+
+def load_history() -> list[dict]:
+    """
+    Load the benchmark history (one JSON record per line, oldest first).
+
+    Returns:
+        list[dict]: The records, empty if there is no history yet.
+    """
+    if not os.path.exists(BENCHMARK_HISTORY_FILE):
+        return []
+    with open(BENCHMARK_HISTORY_FILE, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare_with_baseline(stages: dict, baseline: dict, threshold: float) -> dict:
+    """
+    Compare the time of every stage with the baseline, over the files benchmarked by both runs.
+
+    Args:
+        stages (dict): {stage: {"seconds": float, "per_file": {file: float}}} of the current run.
+        baseline (dict): Baseline record of the history.
+        threshold (float): Accepted slowdown (0.25 = 25%).
+
+    Returns:
+        dict: {stage: {"seconds", "baseline_seconds", "ratio"}} of every compared stage, with "regression"
+            set when the stage is slower than the threshold.
+    """
+    comparison = {}
+    for stage, result in stages.items():
+        baseline_per_file = baseline["stages"].get(stage, {}).get("per_file", {})
+        common_files = [name for name in result["per_file"] if name in baseline_per_file]
+        baseline_seconds = sum(baseline_per_file[name] for name in common_files)
+        if not baseline_seconds:
+            continue
+        seconds = sum(result["per_file"][name] for name in common_files)
+        comparison[stage] = {
+            "seconds": seconds,
+            "baseline_seconds": baseline_seconds,
+            "ratio": seconds / baseline_seconds,
+            "regression": seconds / baseline_seconds > 1 + threshold,
+        }
+    return comparison
+
+
+def benchmark(files: str, repeat: int, threshold: float, save_baseline: bool) -> dict:
+    """
+    Benchmark every stage over the raw files, append the run to the history and compare it with the last
+    baseline.
+
+    Returns:
+        dict: The history record of the run (with the "regressions" found).
+    """
+    file_paths = sorted(glob.glob(files))
+    if not file_paths:
+        raise ValueError(f"No raw files match '{files}'")
+
+    matplotlib.use("Agg")  # Charts are only rendered to files
+    per_file = {}
+    with tempfile.TemporaryDirectory() as output_dir, _isolated_stores(output_dir):
+        for file_path in file_paths:
+            logger.info(f"Benchmarking '{file_path}'...")
+            per_file[os.path.basename(file_path)] = benchmark_file(file_path, repeat, output_dir)
+
+    stages = {
+        stage: {
+            "seconds": sum(timings[stage] for timings in per_file.values()),
+            "per_file": {name: timings[stage] for name, timings in per_file.items()},
+        }
+        for stage in BENCHMARK_STAGES
+    }
+
+    history = load_history()
+    baseline = next((record for record in reversed(history) if record.get("baseline")), None)
+    comparison = compare_with_baseline(stages, baseline, threshold) if baseline else {}
+    regressions = {stage: result["ratio"] for stage, result in comparison.items() if result["regression"]}
+    record = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "files": len(file_paths),
+        "repeat": repeat,
+        "threshold": threshold,
+        "baseline": save_baseline or baseline is None,
+        "compared_with": baseline["timestamp"] if baseline else None,
+        "stages": stages,
+        "comparison": comparison,
+        "regressions": regressions,
+    }
+    with open(BENCHMARK_HISTORY_FILE, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    logger.info(f"Stored benchmark results at {BENCHMARK_HISTORY_FILE}")
+
+    for stage, result in stages.items():
+        compared = comparison.get(stage)
+        compared = f" ({compared['ratio']:.2f}x the baseline on the same files)" if compared else ""
+        logger.info(f"{stage}: {result['seconds']:.4f}s{compared}")
+    for stage, ratio in regressions.items():
+        logger.error(f"Regression at '{stage}': {ratio:.2f}x the baseline (threshold {1 + threshold:.2f}x)")
+
+    return record
+
+
+if __name__ == "__main__":
+    record = benchmark(**_args())
+    sys.exit(1 if record["regressions"] else 0)
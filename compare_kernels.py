@@ -0,0 +1,77 @@
+import argparse
+import glob
+import json
+import logging
+import numpy as np
+import os
+
+from src.analytics.expiry_calendar import get_expiry_calendar
+from src.analytics.gamma_kernels import available_gamma_kernels, compare_gamma_kernels
+from src.parsers.cboe_parser import load_cboe_csv, read_cboe_last_price
+from src.settings import RAW_DIR
+from src.utils import extract_date
+
+logger = logging.getLogger("compare_kernels")
+
+
+def _args() -> dict:
+    parser = argparse.ArgumentParser(description="Compare the throughput of the Gamma Exposure kernels on a chain.")
+    parser.add_argument("--file", type=str, help="Raw CBOE CSV file. Default: the latest file in the raw directory.")
+    parser.add_argument(
+        "--kernels",
+        type=str,
+        help=f"Kernels to compare, comma separated. Default: every available one ({available_gamma_kernels()}).",
+    )
+    parser.add_argument("--levels", type=int, default=60, help="Spot levels evaluated. Default: 60 (Gamma Flip grid).")
+    parser.add_argument(
+        "--contracts",
+        type=int,
+        help="Use only the first N contracts of the chain (the scalar reference takes minutes on a full chain).",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per kernel (the best one is reported).")
+    args = parser.parse_args()
+    return {
+        "file_path": args.file or max(glob.glob(os.path.join(RAW_DIR, "*.csv")), key=os.path.getmtime),
+        "names": args.kernels.split(",") if args.kernels else None,
+        "levels": args.levels,
+        "contracts": args.contracts,
+        "repeat": args.repeat,
+    }
+
+
+def compare_kernels(file_path: str, names: list[str] | None, levels: int, contracts: int | None, repeat: int) -> dict:
+    """
+    Run every kernel over the contracts of a raw chain and the Gamma Flip levels around its last price.
+
+    Args:
+        file_path (str): Raw CBOE CSV file.
+        names (list[str] | None): Kernels to compare, every available one if None.
+        levels (int): Spot levels evaluated.
+        contracts (int | None): Use only the first N contracts of the chain.
+        repeat (int): Timed runs per kernel.
+
+    Returns:
+        dict: {kernel: {"seconds", "cells_per_second", "relative_error"}} (see `compare_gamma_kernels`).
+    """
+    df, _metadata = load_cboe_csv(file_path)
+    df = df.iloc[:contracts]
+    expiry_calendar, expiry_codes = get_expiry_calendar(
+        df["Expiration Date"], extract_date(os.path.basename(file_path)).date()
+    )
+    chain = {
+        "strikes": df["Strike"].to_numpy(),
+        "call_iv": df["IV"].to_numpy(),
+        "put_iv": df["IV.1"].to_numpy(),
+        "call_open_interest": df["Open Interest"].to_numpy(),
+        "put_open_interest": df["Open Interest.1"].to_numpy(),
+        "days_till_exp": expiry_calendar["days_till_exp"].to_numpy()[expiry_codes],
+    }
+    last_price = float(read_cboe_last_price(file_path).replace(",", ""))
+    spot_levels = np.linspace(0.8 * last_price, 1.2 * last_price, levels)
+
+    logger.info(f"Comparing Gamma kernels on {len(df)} contracts x {levels} levels of '{file_path}'...")
+    return compare_gamma_kernels(chain, spot_levels, names=names, repeat=repeat)
+
+
+if __name__ == "__main__":
+    print(json.dumps(compare_kernels(**_args()), indent=2))
@@ -1,13 +1,33 @@
-import asyncio
+import functools
+import hashlib
+import json
 import logging
+import multiprocessing
+import os
 import requests
 import shlex
-import subprocess
 import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from flask import Flask, request
+from multiprocessing.util import Finalize
 
-from src.settings import TELEGRAM_TOKEN, TELEGRAM_CHAT_IDS_FILE, WEBHOOK_DOMAIN
-from src.scripts.telegram_bot import IntegrateTelegramBot
+from app import _args, build_manager, send_results_to_telegram
+from src.downloader import BaseDownloader
+from src.downloader.cboe_downloader import CBOEDownloader
+from src.downloader.cboe_http_downloader import CBOEHTTPDownloader
+from src.downloader.download_cache import download_fetched_at, is_fresh, market_now, trade_date
+from src.settings import (
+    DOWNLOAD_METHOD,
+    REPORTS_DIR,
+    TELEGRAM_CHAT_IDS_FILE,
+    TELEGRAM_TOKEN,
+    WEBHOOK_DOMAIN,
+    WEBHOOK_MAX_QUEUED_JOBS,
+    WEBHOOK_WORKERS,
+)
+from src.scripts.telegram_bot import IntegrateTelegramBot, TelegramDelivery
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +37,231 @@ telegram_bot = IntegrateTelegramBot()
 
 WEBHOOK_URL = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/setWebhook?url={WEBHOOK_DOMAIN}"
 
+# Downloaders kept warm by a worker process between its jobs, per download method
+_worker_downloaders = {}
+
+
+def _close_worker_downloaders() -> None:
+    for downloader in _worker_downloaders.values():
+        downloader.close()
+
+
+def _init_worker() -> None:
+    Finalize(None, _close_worker_downloaders, exitpriority=10)
+
+
+def _warm_up() -> None:
+    """
+    Do nothing, starting a worker process is the point (its modules are loaded by then).
+    """
+
+
+def _worker_downloader(download_method: str) -> BaseDownloader:
+    """
+    Get the downloader kept by the worker process (a warm browser or a pooled HTTP client).
+    Args:
+        download_method (str): "browser" or "http".
+    Returns:
+        BaseDownloader: The downloader.
+    """
+    if download_method not in _worker_downloaders:
+        if download_method == "http":
+            _worker_downloaders[download_method] = CBOEHTTPDownloader()
+        else:
+            _worker_downloaders[download_method] = CBOEDownloader(keep_browser=True)
+    return _worker_downloaders[download_method]
+
+
+def job_key(args: dict) -> str:
+    """
+    Get the key of the results of a command: its arguments (without the chat, in any order) and the trade date
+    of the data (see `download_cache.trade_date`), so identical commands share one run.
+    Args:
+        args (dict): Parsed arguments of the command (see `app._args`).
+    Returns:
+        str: The key.
+    """
+    normalized = {
+        name: value.lower() if isinstance(value, str) else value
+        for name, value in args.items()
+        if name != "telegram_chat_id"
+    }
+    return f"{json.dumps(normalized, sort_keys=True)}|{trade_date(market_now()).isoformat()}"
+
+
+def run_job(args: dict, reports_dir: str) -> tuple[dict, float]:
+    """
+    Run a Telegram command in a worker process.
+    Args:
+        args (dict): Parsed arguments of the command (see `app._args`), with the chat ID.
+        reports_dir (str): Directory of the charts of the command (shared by the identical commands).
+    Returns:
+        tuple[dict, float]: Final GEX metrics per asset and the Unix time the oldest of its chains was downloaded.
+    """
+    logger.info(f"Processing command {args}")
+    os.makedirs(reports_dir, exist_ok=True)
+    downloader = _worker_downloader(args.get("download_method") or DOWNLOAD_METHOD)
+    app_manager = build_manager(args, downloader=downloader, reports_dir=reports_dir)
+    started_at = time.time()
+    try:
+        gex_metrics = app_manager.run(headless=True, telegram_chat_id=args["telegram_chat_id"])
+    finally:
+        # The next job of this worker must not start while the chains of this one are still being stored
+        pending = len(app_manager.persistence_futures)
+        stored = app_manager.wait_for_persistence()
+        if len(stored) < pending:
+            logger.error(f"Stored {len(stored)} of {pending} processed chains of the command {args}.")
+    fetched_at = [
+        download_fetched_at(url, app_manager.expiration_type, app_manager.expiration_month) or started_at
+        for url in app_manager.urls
+    ]
+    return gex_metrics, min(fetched_at)
+
+
+def notify_chats(
+    delivery: TelegramDelivery, chat_ids: list[str], gex_metrics: dict | None, error: BaseException | None = None
+) -> None:
+    """
+    Queue the results of a command (or its failure) to every chat that asked for it.
+    Args:
+        delivery (TelegramDelivery): Delivery of the messages.
+        chat_ids (list[str]): Target chats.
+        gex_metrics (dict | None): Final GEX metrics per asset.
+        error (BaseException | None): Failure of the command.
+    """
+    for chat_id in chat_ids:
+        try:
+            if error is not None:
+                delivery.send_message(chat_id, f"❌ Falha ao rodar o processo: {error}")
+                continue
+            send_results_to_telegram(gex_metrics, chat_id, delivery)
+            delivery.send_message(chat_id, "✅ Processo concluído com sucesso!")
+        except Exception as err:
+            logger.error(f"Failed to notify the chat '{chat_id}': {err!r}")
+
+
+# Replies to the commands that do not start a new job
+JOB_REPLIES = {
+    "attached": "🔗 A mesma execução já está em andamento, você receberá o resultado dela.\nAguarde...",
+    "cached": "♻️ Enviando o resultado recente da mesma execução.",
+    "full": "⏳ Muitas execuções em andamento. Tente novamente em alguns minutos.",
+}
+
+
+class JobPool:
+    """
+    Long-lived worker processes running the webhook jobs (the heavy modules stay loaded, every worker keeps its
+    downloader warm) behind a bounded queue: when every worker is busy and WEBHOOK_MAX_QUEUED_JOBS jobs are
+    waiting, new jobs are turned down.
+
+    Identical commands (see `job_key`) are coalesced: while one runs, the others attach to it, and once it is done
+    its results are sent again until its data goes stale (see `download_cache.is_fresh`). The load follows the
+    distinct commands, not the chats.
+    """
+
+    def __init__(
+        self, delivery: TelegramDelivery, workers: int = WEBHOOK_WORKERS, max_queued: int = WEBHOOK_MAX_QUEUED_JOBS
+    ) -> None:
+        """
+        Args:
+            delivery (TelegramDelivery): Delivery of the replies and the results.
+            workers (int): Worker processes.
+            max_queued (int): Jobs waiting for a worker.
+        """
+        self.delivery = delivery
+        self.workers = max(1, workers)
+        self._slots = threading.BoundedSemaphore(self.workers + max(0, max_queued))
+        self._executor = self._new_executor()
+        self._lock = threading.Lock()
+        # {job key: chat IDs waiting for the running job}
+        self._in_flight = {}
+        # {job key: (Unix time of the data, final GEX metrics)}
+        self._results = {}
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # "spawn": the workers must not inherit the threads of the web server
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker
+        )
+        for _ in range(self.workers):
+            executor.submit(_warm_up)
+        return executor
+
+    def _job_done(self, key: str, future: Future) -> None:
+        self._slots.release()
+        error = future.exception()
+        with self._lock:
+            chat_ids = self._in_flight.pop(key, [])
+            if error is None:
+                gex_metrics, fetched_at = future.result()
+                self._results[key] = (fetched_at, gex_metrics)
+        if error is not None:
+            logger.error(f"Webhook job failed: {error!r}")
+            notify_chats(self.delivery, chat_ids, None, error)
+        else:
+            notify_chats(self.delivery, chat_ids, gex_metrics)
+
+    def _fresh_result(self, key: str) -> dict | None:
+        now = market_now()
+        for stale_key in [key for key, (fetched_at, _) in self._results.items() if not is_fresh(fetched_at, now)]:
+            del self._results[stale_key]
+        return self._results[key][1] if key in self._results else None
+
+    def _start_job(self, key: str, args: dict) -> Future:
+        """
+        Submit a job to the workers (restarting them if one died), its slot already taken (released on failure).
+        """
+        reports_dir = os.path.join(REPORTS_DIR, "webhook", hashlib.sha1(key.encode()).hexdigest()[:12])
+        try:
+            try:
+                return self._executor.submit(run_job, args, reports_dir)
+            except BrokenProcessPool:
+                logger.error("A webhook worker died, restarting the worker processes.")
+                self._executor = self._new_executor()
+                return self._executor.submit(run_job, args, reports_dir)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def submit(self, args: dict, queued_reply: str) -> str:
+        """
+        Queue a command, attach it to the identical running one or answer it with the fresh results of one, and
+        reply to the chat accordingly (before its results).
+        Args:
+            args (dict): Parsed arguments of the command (see `run_job`).
+            queued_reply (str): Reply when a new job is queued.
+        Returns:
+            str: "cached", "attached", "queued" or "full" (turned down).
+        """
+        key = job_key(args)
+        chat_id = args["telegram_chat_id"]
+        with self._lock:
+            gex_metrics = self._fresh_result(key) if args.get("download_cache", True) else None
+            if gex_metrics is None:
+                if key in self._in_flight:
+                    self._in_flight[key].append(chat_id)
+                    self.delivery.send_message(chat_id, JOB_REPLIES["attached"])
+                    return "attached"
+                if not self._slots.acquire(blocking=False):
+                    self.delivery.send_message(chat_id, JOB_REPLIES["full"])
+                    return "full"
+                future = self._start_job(key, args)
+                self._in_flight[key] = [chat_id]
+                self.delivery.send_message(chat_id, queued_reply)
+
+        if gex_metrics is not None:
+            # The charts are read and the sends queued without holding the lock
+            self.delivery.send_message(chat_id, JOB_REPLIES["cached"])
+            notify_chats(self.delivery, [chat_id], gex_metrics)
+            return "cached"
+        future.add_done_callback(functools.partial(self._job_done, key))
+        return "queued"
+
+
+# Started with the web server (not in the worker processes, which import this module too)
+delivery: TelegramDelivery | None = None
+job_pool: JobPool | None = None
+
 
 def save_chat_id(chat_id):
     chat_ids = telegram_bot.load_chat_ids()
@@ -35,7 +280,7 @@ def set_webhook():
 
 
 @app.route("/webhook", methods=["POST"])
-async def webhook():
+def webhook():
     data = request.get_json()
     if "message" in data:
         chat_id = data["message"]["chat"]["id"]
@@ -51,53 +296,22 @@ async def webhook():
                 "  ▶️ --split_visualization (mostrar índices separados)\n"
                 "  ▶️ --expiration_month agosto (mês de vencimento)\n"
             )
-            await telegram_bot._send_telegram_message(message=initial_msg, chat_id=chat_id)
-
-        def run_and_notify(cmd):
-            try:
-                logger.info(f"Processing command {cmd}")
-                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1)
-                for line in process.stdout:
-                    print(line, end="", flush=True)
-                process.wait()
-                if process.returncode == 0:
-                    asyncio.run(
-                        telegram_bot._send_telegram_message(
-                            message="✅ Processo concluído com sucesso!", chat_id=chat_id
-                        )
-                    )
-                else:
-                    logger.error(process.stderr.read())
-                    asyncio.run(
-                        telegram_bot._send_telegram_message(
-                            message=f"❌ Erro na execução com o argumento {cmd}.", chat_id=chat_id
-                        )
-                    )
-            except Exception as e:
-                asyncio.run(
-                    telegram_bot._send_telegram_message(message=f"❌ Falha ao rodar o processo: {e}", chat_id=chat_id)
-                )
+            delivery.send_message(chat_id, initial_msg)
 
         msg_to_send = "🚀 Execução iniciada com os parâmetros: {args}.\nAguarde..."
         received_msg = received_msg.replace("—", "--")
-        if "--all" in received_msg:
-            cmd = ["python", "app.py", "--telegram_chat_id", str(chat_id)]
-            threading.Thread(target=run_and_notify, args=(cmd,)).start()
-
-            await telegram_bot._send_telegram_message(
-                message=msg_to_send.format(args=" ".join(received_msg)), chat_id=chat_id
-            )
-        elif "--" in received_msg and "--all" not in received_msg:
-            args = shlex.split(received_msg)
-            cmd = ["python", "app.py", "--telegram_chat_id", str(chat_id)] + args
-            threading.Thread(target=run_and_notify, args=(cmd,)).start()
+        if "--" in received_msg:
+            try:
+                argv = [] if "--all" in received_msg else shlex.split(received_msg)
+                args = _args(argv + ["--telegram_chat_id", str(chat_id)])
+            except (SystemExit, ValueError):
+                delivery.send_message(chat_id, f"❌ Argumentos inválidos: '{received_msg}'")
+                return "OK", 200
 
-            await telegram_bot._send_telegram_message(message=msg_to_send.format(args=" ".join(args)), chat_id=chat_id)
+            job_pool.submit(args, queued_reply=msg_to_send.format(args=" ".join(argv) or received_msg))
         else:
             if "start" not in received_msg:
-                await telegram_bot._send_telegram_message(
-                    message=f"❌ Comando '{received_msg}' não reconhecido", chat_id=chat_id
-                )
+                delivery.send_message(chat_id, f"❌ Comando '{received_msg}' não reconhecido")
 
     return "OK", 200
 
@@ -109,4 +323,6 @@ if __name__ == "__main__":
             "copying the 'Forwarding' URL, and pasting it into 'WEBHOOK_DOMAIN' at your .env file"
         )
     set_webhook()
+    delivery = TelegramDelivery()
+    job_pool = JobPool(delivery)
     app.run(host="0.0.0.0", port=5000)
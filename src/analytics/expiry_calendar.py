@@ -0,0 +1,111 @@
+import hashlib
+import json
+import logging
+import numpy as np
+import os
+import pandas as pd
+from datetime import date
+
+from src.settings import EXCHANGE_HOLIDAYS, EXPIRY_CALENDARS_CACHE_DIR
+from src.utils import isThirdFriday
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS_PER_YEAR = 262
+QUARTERLY_MONTHS = (3, 6, 9, 12)
+
+# {(trade_date, holidays_key): {"YYYY-MM-DD": {"business_days": int, "is_third_friday": bool, ...}}}
+_calendars = {}
+
+
+def _holidays_key(holidays: list[str]) -> str:
+    return hashlib.sha1(",".join(sorted(holidays)).encode()).hexdigest()[:10]
+
+
+def _calendar_cache_path(trade_date: date, holidays_key: str) -> str:
+    return os.path.join(EXPIRY_CALENDARS_CACHE_DIR, f"expiry_calendar_{trade_date.isoformat()}_{holidays_key}.json")
+
+
+def _load_calendar(trade_date: date, holidays: list[str]) -> dict:
+    """
+    Get the in-process calendar of a trade date, loading it from the disk cache on first use.
+    Args:
+        trade_date (date): Date of the chain snapshot.
+        holidays (list[str]): Exchange holidays (YYYY-MM-DD).
+    Returns:
+        dict: Calendar entries per expiration (YYYY-MM-DD).
+    """
+    key = (trade_date, _holidays_key(holidays))
+    if key not in _calendars:
+        cache_path = _calendar_cache_path(*key)
+        _calendars[key] = {}
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r") as f:
+                    _calendars[key] = json.load(f)
+            except (OSError, ValueError) as err:
+                logger.warning(f"Ignoring unreadable expiry calendar {cache_path}: {err}")
+    return _calendars[key]
+
+
+def _calendar_entry(trade_date: date, expiration: pd.Timestamp, holidays: list[str]) -> dict:
+    """
+    Calculate the calendar fields of one expiration.
+    Args:
+        trade_date (date): Date of the chain snapshot.
+        expiration (pd.Timestamp): Expiration date.
+        holidays (list[str]): Exchange holidays (YYYY-MM-DD).
+    Returns:
+        dict: Business days until the expiration and the monthly / quarterly flags.
+    """
+    is_third_friday = isThirdFriday(expiration)
+    return {
+        "business_days": int(np.busday_count(trade_date, expiration.date(), holidays=holidays)),
+        "is_third_friday": is_third_friday,
+        "is_quarterly": is_third_friday and expiration.month in QUARTERLY_MONTHS,
+    }
+
+
+def get_expiry_calendar(
+    expiration_dates: pd.Series, trade_date: date, holidays: list[str] | None = None
+) -> tuple[pd.DataFrame, np.ndarray]:
+    """
+    Calculate the calendar fields once per unique expiration of a chain.
+
+    Entries are cached per (trade date, holidays) in memory and at EXPIRY_CALENDARS_CACHE_DIR, so
+    every asset and every run of the same trade date reuses them.
+
+    Args:
+        expiration_dates (pd.Series): Expiration date of every row of the chain (datetime64).
+        trade_date (date): Date of the chain snapshot.
+        holidays (list[str] | None): Exchange holidays (YYYY-MM-DD). Defaults to EXCHANGE_HOLIDAYS.
+    Returns:
+        tuple[pd.DataFrame, np.ndarray]:
+            - Calendar indexed by the sorted unique expirations, with the columns "business_days",
+              "days_till_exp" (years, at least one business day), "is_third_friday" and "is_quarterly".
+            - Position of every row's expiration in the calendar, to broadcast the columns back to the rows
+              (`calendar["days_till_exp"].to_numpy()[codes]`).
+    """
+    holidays = EXCHANGE_HOLIDAYS if holidays is None else holidays
+    codes, expirations = pd.factorize(expiration_dates, sort=True)
+
+    calendar = _load_calendar(trade_date, holidays)
+    missing = [expiration for expiration in expirations if expiration.date().isoformat() not in calendar]
+    for expiration in missing:
+        calendar[expiration.date().isoformat()] = _calendar_entry(trade_date, expiration, holidays)
+    if missing:
+        cache_path = _calendar_cache_path(trade_date, _holidays_key(holidays))
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(calendar, f)
+        os.replace(tmp_path, cache_path)
+
+    expiry_calendar = pd.DataFrame(
+        [calendar[expiration.date().isoformat()] for expiration in expirations],
+        index=expirations,
+        columns=["business_days", "is_third_friday", "is_quarterly"],
+    )
+    # Expirations on the trade date still count as one business day
+    expiry_calendar["days_till_exp"] = expiry_calendar["business_days"].replace(0, 1) / TRADING_DAYS_PER_YEAR
+
+    return expiry_calendar, codes
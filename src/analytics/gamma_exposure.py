@@ -1,5 +1,6 @@
 import logging
 import json
+import numpy as np
 import os
 
 logger = logging.getLogger(__name__)
@@ -8,6 +9,9 @@ logger = logging.getLogger(__name__)
 def calculate_gex_per_strikes(processed_file_path: str) -> dict:
     """
     Calculate Total Gamma Exposure per Strike.
+
+    Only the header and the `per_strike_*` arrays of the processed archive (.npz) are read.
+    Legacy processed JSON files are still supported.
     Args:
         processed_file_path (str): Path of the processed data file
     Returns:
@@ -18,8 +22,65 @@ def calculate_gex_per_strikes(processed_file_path: str) -> dict:
             }
         }
     """
-    asset_name, _ = os.path.splitext(processed_file_path.split("/")[-1])
+    asset_name, extension = os.path.splitext(processed_file_path.split("/")[-1])
+    if extension == ".json":
+        return _calculate_gex_per_strikes_from_json(processed_file_path, asset_name)
+
+    with np.load(processed_file_path) as processed_data:
+        header = json.loads(str(processed_data["header"]))
+        return build_gex_per_strikes(
+            asset_name,
+            strikes=processed_data["per_strike_strike"],
+            calls=processed_data["per_strike_call"],
+            puts=processed_data["per_strike_put"],
+            totals=processed_data["per_strike_total"],
+            last_price=header["last_price"],
+        )
+
+
+def build_gex_per_strikes(
+    asset_name: str, strikes: np.ndarray, calls: np.ndarray, puts: np.ndarray, totals: np.ndarray, last_price: float
+) -> dict:
+    """
+    Build the Total Gamma Exposure per Strike metrics from the per-strike sums (in memory or from the
+    processed archive).
+    Args:
+        asset_name (str): Key of the asset ("processed_<raw file name>")
+        strikes (np.ndarray): Strikes
+        calls (np.ndarray): Calls GEX per strike
+        puts (np.ndarray): Puts GEX per strike
+        totals (np.ndarray): Total GEX per strike
+        last_price (float): Last price of the asset
+    Returns:
+        dict: Same as `calculate_gex_per_strikes`.
+    """
+    total_gex_per_strike = {asset_name: {}}
+    for strike, call_gex, put_gex, total_gex in zip(
+        np.asarray(strikes, dtype=np.float64).tolist(),
+        np.asarray(calls).tolist(),
+        np.asarray(puts).tolist(),
+        np.asarray(totals).tolist(),
+    ):
+        total_gex_per_strike[asset_name][str(strike)] = {
+            "call": call_gex,
+            "put": put_gex,
+            "total": total_gex,
+        }
+    total_gex_per_strike[asset_name]["last_price"] = last_price
+
+    logger.info(f"Calculated GEX metrics for '{asset_name}'.")
+    return total_gex_per_strike
 
+
+def _calculate_gex_per_strikes_from_json(processed_file_path: str, asset_name: str) -> dict:
+    """
+    Calculate Total Gamma Exposure per Strike from a processed JSON file.
+    Args:
+        processed_file_path (str): Path of the processed JSON file
+        asset_name (str): Name of the asset
+    Returns:
+        dict: Same structure as `calculate_gex_per_strikes`.
+    """
     with open(processed_file_path, "r") as f:
         processed_data = json.loads(f.read())
 
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import logging
+import numpy as np
+import os
+from scipy.optimize import brentq
+from typing import Callable
+
+from src.analytics.gamma_kernels import get_gamma_kernel
+
+logger = logging.getLogger(__name__)
+
+PROFILE_CURVES = ["total_gamma", "total_gex_next", "total_gex_fri"]
+
+# Upper bound of (levels x contracts) cells evaluated at once, keeps peak memory around a few dozen MB
+MAX_CHUNK_ELEMENTS = 1_000_000
+
+
+def calculate_gamma_profile(
+    levels: np.ndarray,
+    strikes: np.ndarray,
+    call_iv: np.ndarray,
+    put_iv: np.ndarray,
+    call_open_interest: np.ndarray,
+    put_open_interest: np.ndarray,
+    days_till_exp: np.ndarray,
+    masks: np.ndarray,
+    chunk_size: int | None = None,
+    kernel: str | None = None,
+) -> np.ndarray:
+    """
+    Calculate the net (calls - puts) Gamma Exposure curve over a grid of spot levels.
+
+    The levels are processed in chunks so only (chunk_size x contracts) cells live in memory at once.
+    Every row of `masks` selects the contracts summed into one curve, which lets the total curve and
+    the "ex next expiry" / "ex next monthly" curves share the same gamma evaluations.
+
+    Args:
+        levels (np.ndarray): Spot levels, shape (L,).
+        strikes (np.ndarray): Strikes of the contracts, shape (N,).
+        call_iv (np.ndarray): Implied volatility of the calls, shape (N,).
+        put_iv (np.ndarray): Implied volatility of the puts, shape (N,).
+        call_open_interest (np.ndarray): Open Interest of the calls, shape (N,).
+        put_open_interest (np.ndarray): Open Interest of the puts, shape (N,).
+        days_till_exp (np.ndarray): Time to expiration in years, shape (N,).
+        masks (np.ndarray): Boolean contract selection per curve, shape (P, N).
+        chunk_size (int | None): Levels evaluated per chunk. Defaults to a size bounded by MAX_CHUNK_ELEMENTS.
+        kernel (str | None): Gamma Exposure kernel (see `src.analytics.gamma_kernels`). Defaults to GAMMA_KERNEL.
+    Returns:
+        np.ndarray: Net Gamma Exposure per curve and level, shape (P, L).
+    """
+    gamma_exposure = get_gamma_kernel(kernel)
+    levels = np.asarray(levels, dtype=np.float64)
+    weights = np.atleast_2d(np.asarray(masks, dtype=np.float64)).T
+    n_contracts = max(len(strikes), 1)
+    if not chunk_size:
+        chunk_size = max(1, MAX_CHUNK_ELEMENTS // n_contracts)
+
+    profile = np.empty((weights.shape[1], len(levels)), dtype=np.float64)
+    for start in range(0, len(levels), chunk_size):
+        chunk = levels[start : start + chunk_size]
+        call_gex = gamma_exposure(chunk, strikes, call_iv, days_till_exp, call_open_interest, "call")
+        put_gex = gamma_exposure(chunk, strikes, put_iv, days_till_exp, put_open_interest, "put")
+        profile[:, start : start + len(chunk)] = ((call_gex - put_gex) @ weights).T
+
+    return profile
+
+
+def interpolate_gamma_flips(levels: np.ndarray, total_gamma: np.ndarray) -> list[float]:
+    """
+    Find the zero crossings of a Gamma Exposure curve sampled on a grid by linear interpolation.
+
+    Args:
+        levels (np.ndarray): Spot levels, shape (L,).
+        total_gamma (np.ndarray): Net Gamma Exposure at each level, shape (L,).
+    Returns:
+        list[float]: Interpolated zero crossings, from the lowest to the highest level.
+    """
+    zero_cross_idx = np.where(np.diff(np.sign(total_gamma)))[0]
+    neg_gamma = total_gamma[zero_cross_idx]
+    pos_gamma = total_gamma[zero_cross_idx + 1]
+    neg_strike = levels[zero_cross_idx]
+    pos_strike = levels[zero_cross_idx + 1]
+    zero_gamma = pos_strike - ((pos_strike - neg_strike) * pos_gamma / (pos_gamma - neg_gamma))
+    return [float(x) for x in zero_gamma]
+
+
+def find_gamma_flips(
+    total_gamma_at: Callable[[np.ndarray], np.ndarray],
+    lower: float,
+    upper: float,
+    coarse_points: int = 16,
+    xtol: float = 0.5,
+) -> tuple[list[float], int]:
+    """
+    Find every zero crossing of the net Gamma Exposure between two spot levels.
+
+    Sign changes are bracketed on a coarse grid (evaluated in one batch) and each bracket is refined
+    with Brent's method, so the precision is set by `xtol` instead of the grid spacing.
+
+    Args:
+        total_gamma_at (Callable[[np.ndarray], np.ndarray]): Net Gamma Exposure at the given spot levels.
+        lower (float): Lowest spot level searched.
+        upper (float): Highest spot level searched.
+        coarse_points (int): Levels of the bracketing grid.
+        xtol (float): Absolute precision of each crossing (in points of the underlying).
+    Returns:
+        tuple[list[float], int]: Zero crossings from the lowest to the highest level, and the number
+            of spot levels evaluated.
+    """
+    levels = np.linspace(lower, upper, coarse_points)
+    total_gamma = total_gamma_at(levels)
+    evaluations = len(levels)
+
+    def _total_gamma_at(level: float) -> float:
+        nonlocal evaluations
+        evaluations += 1
+        return float(total_gamma_at(np.array([level]))[0])
+
+    flips = [float(level) for level, gamma in zip(levels, total_gamma) if gamma == 0]
+    for idx in np.where(total_gamma[:-1] * total_gamma[1:] < 0)[0]:
+        flips.append(brentq(_total_gamma_at, levels[idx], levels[idx + 1], xtol=xtol))
+
+    return sorted(flips), evaluations
+
+
+def gamma_profile_key(chain: dict, masks: np.ndarray, **search) -> str:
+    """
+    Build the cache key of a Gamma Profile from the contracts it was calculated from and the searched levels.
+
+    Args:
+        chain (dict): Arrays passed to `calculate_gamma_profile` (strikes, IVs, open interests, time to expiration).
+        masks (np.ndarray): Boolean contract selection per curve, shape (P, N).
+        **search: Parameters defining the evaluated levels (method, bounds, number of points, tolerance).
+    Returns:
+        str: Hex digest identifying the profile.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(chain):
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(chain[name], dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(masks, dtype=bool).tobytes())
+    digest.update(json.dumps(search, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def save_gamma_profile(profile: dict, output_path: str) -> str:
+    """
+    Store a Gamma Profile into a compressed NumPy archive (.npz).
+
+    Args:
+        profile (dict): "levels" and PROFILE_CURVES arrays, every other key goes to the JSON header.
+        output_path (str): Path of the archive.
+    Returns:
+        str: Archive path.
+    """
+    arrays = {name: np.asarray(profile[name], dtype=np.float64) for name in ["levels", *PROFILE_CURVES]}
+    header = {key: value for key, value in profile.items() if key not in arrays}
+
+    tmp_path = f"{output_path}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(tmp_path, header=np.array(json.dumps(header, default=str)), **arrays)
+    os.replace(tmp_path, output_path)
+
+    logger.info(f"Stored gamma profile at {output_path}")
+    return output_path
+
+
+def load_gamma_profile(profile_path: str) -> dict | None:
+    """
+    Load a Gamma Profile stored by `save_gamma_profile`.
+
+    Args:
+        profile_path (str): Path of the archive.
+    Returns:
+        dict | None: The profile, None when the archive does not exist or is unreadable.
+    """
+    if not os.path.exists(profile_path):
+        return None
+
+    try:
+        with np.load(profile_path) as archive:
+            profile = json.loads(str(archive["header"]))
+            for name in ["levels", *PROFILE_CURVES]:
+                profile[name] = archive[name]
+    except (OSError, ValueError, KeyError) as err:
+        logger.warning(f"Ignoring unreadable gamma profile {profile_path}: {err}")
+        return None
+
+    return profile
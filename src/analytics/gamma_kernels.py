@@ -0,0 +1,261 @@
+import logging
+import numpy as np
+import time
+from scipy.stats import norm
+from typing import Callable
+
+from src.settings import GAMMA_KERNEL
+from src.utils import calcGammaEx
+
+try:
+    import numba
+except ImportError:  # Optional, the "numba" kernel is registered only when it is installed
+    numba = None
+
+logger = logging.getLogger(__name__)
+
+# kernel(levels, strikes, vol, days_till_exp, open_interest, option_type, r=0, q=0) -> (L, N) Gamma Exposure
+GammaKernel = Callable[..., np.ndarray]
+REFERENCE_GAMMA_KERNEL = "scalar"
+FALLBACK_GAMMA_KERNEL = "numpy"
+
+_gamma_kernels: dict[str, GammaKernel] = {}
+
+
+def register_gamma_kernel(name: str) -> Callable[[GammaKernel], GammaKernel]:
+    """
+    Register a Gamma Exposure kernel under a name, selectable with GAMMA_KERNEL or `--gamma_kernel`.
+
+    Every kernel gets the spot levels (L,) and the contracts arrays (N,) and returns the (L, N)
+    Gamma Exposure matrix; contracts with no time or no volatility and undefined results count as 0.
+    Args:
+        name (str): Name of the kernel.
+    Returns:
+        Callable[[GammaKernel], GammaKernel]: Decorator registering the kernel.
+    """
+
+    def decorator(kernel: GammaKernel) -> GammaKernel:
+        _gamma_kernels[name] = kernel
+        return kernel
+
+    return decorator
+
+
+def available_gamma_kernels() -> list[str]:
+    """
+    List the registered kernels (the JIT ones only when their dependency is installed).
+    Returns:
+        list[str]: Kernel names.
+    """
+    return list(_gamma_kernels)
+
+
+def get_gamma_kernel(name: str | None = None) -> GammaKernel:
+    """
+    Get a registered kernel, falling back to the NumPy one when it is not available.
+    Args:
+        name (str | None): Name of the kernel. Defaults to GAMMA_KERNEL.
+    Returns:
+        GammaKernel: The kernel.
+    """
+    name = name or GAMMA_KERNEL
+    if name not in _gamma_kernels:
+        logger.warning(f"Gamma kernel '{name}' is not available, using '{FALLBACK_GAMMA_KERNEL}'.")
+        name = FALLBACK_GAMMA_KERNEL
+    return _gamma_kernels[name]
+
+
+@register_gamma_kernel("scalar")
+def scalar_gamma_exposure(
+    levels: np.ndarray,
+    strikes: np.ndarray,
+    vol: np.ndarray,
+    days_till_exp: np.ndarray,
+    open_interest: np.ndarray,
+    option_type: str,
+    r: float = 0,
+    q: float = 0,
+) -> np.ndarray:
+    """
+    Reference kernel: `src.utils.calcGammaEx` called for every (spot level, contract) pair.
+    """
+    gex = np.zeros((len(levels), len(strikes)), dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for i, S in enumerate(np.asarray(levels, dtype=np.float64)):
+            for j, (K, iv, T, OI) in enumerate(zip(strikes, vol, days_till_exp, open_interest)):
+                gex[i, j] = calcGammaEx(S, float(K), float(iv), float(T), r, q, option_type, float(OI))
+    return np.where(np.isnan(gex), 0.0, gex)
+
+
+@register_gamma_kernel("numpy")
+def gamma_exposure_matrix(
+    levels: np.ndarray,
+    strikes: np.ndarray,
+    vol: np.ndarray,
+    days_till_exp: np.ndarray,
+    open_interest: np.ndarray,
+    option_type: str,
+    r: float = 0,
+    q: float = 0,
+) -> np.ndarray:
+    """
+    Black-Scholes Gamma Exposure for every (spot level, contract) pair.
+
+    Array version of `src.utils.calcGammaEx`: contracts with no time or no volatility
+    contribute 0, and undefined results (NaN inputs) are dropped like `pd.Series.sum` does.
+
+    Args:
+        levels (np.ndarray): Spot levels, shape (L,).
+        strikes (np.ndarray): Strikes of the contracts, shape (N,).
+        vol (np.ndarray): Implied volatilities, shape (N,).
+        days_till_exp (np.ndarray): Time to expiration in years, shape (N,).
+        open_interest (np.ndarray): Open Interest of the contracts, shape (N,).
+        option_type (str): Type of Option ("call" or "put").
+        r (float): Risk-free rate.
+        q (float): Dividend yield.
+    Returns:
+        np.ndarray: Gamma Exposure matrix, shape (L, N).
+    """
+    S = np.asarray(levels, dtype=np.float64)[:, None]
+    K = np.asarray(strikes, dtype=np.float64)
+    vol = np.asarray(vol, dtype=np.float64)
+    T = np.asarray(days_till_exp, dtype=np.float64)
+    OI = np.asarray(open_interest, dtype=np.float64)
+
+    skip = (T <= 0) | (vol <= 0)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        vol_sqrt_t = vol * np.sqrt(T)
+        dp = (np.log(S / K) + (r - q + 0.5 * vol**2) * T) / vol_sqrt_t
+        if option_type == "call":
+            gamma = np.exp(-q * T) * norm.pdf(dp) / (S * vol_sqrt_t)
+        else:  # Gamma is same for calls and puts. This is just to cross-check
+            dm = dp - vol_sqrt_t
+            gamma = K * np.exp(-r * T) * norm.pdf(dm) / (S * S * vol_sqrt_t)
+        gex = OI * 100 * S * S * 0.01 * gamma
+
+    return np.where(skip | np.isnan(gex), 0.0, gex)
+
+
+if numba is not None:
+    INV_SQRT_2PI = 1 / np.sqrt(2 * np.pi)
+
+    @numba.njit(parallel=True, cache=True)
+    def _numba_gamma_exposure(S, K, vol, T, OI, is_call, r, q):
+        gex = np.zeros((S.shape[0], K.shape[0]))
+        for i in numba.prange(S.shape[0]):
+            for j in range(K.shape[0]):
+                if not (T[j] > 0 and vol[j] > 0):
+                    continue
+                vol_sqrt_t = vol[j] * np.sqrt(T[j])
+                dp = (np.log(S[i] / K[j]) + (r - q + 0.5 * vol[j] ** 2) * T[j]) / vol_sqrt_t
+                if is_call:
+                    gamma = np.exp(-q * T[j]) * np.exp(-0.5 * dp * dp) * INV_SQRT_2PI / (S[i] * vol_sqrt_t)
+                else:
+                    dm = dp - vol_sqrt_t
+                    gamma = (
+                        K[j] * np.exp(-r * T[j]) * np.exp(-0.5 * dm * dm) * INV_SQRT_2PI / (S[i] * S[i] * vol_sqrt_t)
+                    )
+                value = OI[j] * 100 * S[i] * S[i] * 0.01 * gamma
+                if not np.isnan(value):
+                    gex[i, j] = value
+        return gex
+
+    @register_gamma_kernel("numba")
+    def numba_gamma_exposure(
+        levels: np.ndarray,
+        strikes: np.ndarray,
+        vol: np.ndarray,
+        days_till_exp: np.ndarray,
+        open_interest: np.ndarray,
+        option_type: str,
+        r: float = 0,
+        q: float = 0,
+    ) -> np.ndarray:
+        """
+        JIT compiled kernel, one thread per spot level (compiled on first use, cached on disk by numba).
+        """
+        return _numba_gamma_exposure(
+            np.asarray(levels, dtype=np.float64),
+            np.asarray(strikes, dtype=np.float64),
+            np.asarray(vol, dtype=np.float64),
+            np.asarray(days_till_exp, dtype=np.float64),
+            np.asarray(open_interest, dtype=np.float64),
+            option_type == "call",
+            float(r),
+            float(q),
+        )
+
+
+def check_gamma_kernel(name: str, rtol: float = 1e-9) -> float:
+    """
+    Check a kernel against the scalar reference on a synthetic chain, calls and puts, including the edge
+    cases (expired contracts, zero and missing volatility, zero open interest).
+    Args:
+        name (str): Name of the kernel.
+        rtol (float): Highest accepted error, relative to the largest reference value.
+    Returns:
+        float: Relative error of the kernel.
+    Raises:
+        ValueError: If the kernel does not match the reference.
+    """
+    rng = np.random.default_rng(0)
+    levels = np.linspace(4000, 6000, 21)
+    strikes = rng.uniform(3500, 6500, 200).round()
+    vol = rng.uniform(0.05, 1.5, 200)
+    days_till_exp = rng.uniform(0, 2, 200)
+    open_interest = rng.integers(0, 5000, 200).astype(np.float64)
+    days_till_exp[:5], vol[5:10], vol[10:15], open_interest[15:20] = 0, 0, np.nan, 0
+
+    reference = _gamma_kernels[REFERENCE_GAMMA_KERNEL]
+    error = 0.0
+    for option_type in ["call", "put"]:
+        args = (levels, strikes, vol, days_till_exp, open_interest, option_type)
+        expected = reference(*args)
+        result = _gamma_kernels[name](*args)
+        if result.shape != expected.shape:
+            raise ValueError(f"Gamma kernel '{name}' returned shape {result.shape}, expected {expected.shape}")
+        error = max(error, float(np.max(np.abs(result - expected)) / np.max(np.abs(expected))))
+
+    if not error <= rtol:
+        raise ValueError(f"Gamma kernel '{name}' differs from the reference by {error:.3e} (rtol {rtol:.0e})")
+    return error
+
+
+def compare_gamma_kernels(chain: dict, levels: np.ndarray, names: list[str] | None = None, repeat: int = 3) -> dict:
+    """
+    Measure the throughput of the kernels on the same chain (calls and puts, best of `repeat` runs).
+    Args:
+        chain (dict): "strikes", "call_iv", "put_iv", "call_open_interest", "put_open_interest" and
+            "days_till_exp" arrays (see `calculate_gamma_profile`).
+        levels (np.ndarray): Spot levels.
+        names (list[str] | None): Kernels to compare. Defaults to every available kernel.
+        repeat (int): Runs per kernel (a warm-up run is done first, so JIT compilation is not measured).
+    Returns:
+        dict: {kernel: {"seconds": float, "cells_per_second": float, "relative_error": float}}
+    """
+    cells = 2 * len(levels) * len(chain["strikes"])
+    results = {}
+    for name in names or available_gamma_kernels():
+        kernel = _gamma_kernels[name]
+
+        def run() -> None:
+            kernel(
+                levels, chain["strikes"], chain["call_iv"], chain["days_till_exp"], chain["call_open_interest"], "call"
+            )
+            kernel(levels, chain["strikes"], chain["put_iv"], chain["days_till_exp"], chain["put_open_interest"], "put")
+
+        run()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+
+        seconds = min(timings)
+        results[name] = {
+            "seconds": seconds,
+            "cells_per_second": cells / seconds,
+            "relative_error": check_gamma_kernel(name),
+        }
+        logger.info(f"Gamma kernel '{name}': {seconds:.4f}s ({cells / seconds:,.0f} cells/s)")
+    return results
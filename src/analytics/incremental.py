@@ -0,0 +1,233 @@
+import logging
+import numpy as np
+import os
+import pandas as pd
+import pickle
+
+from src.analytics.gamma_flip import calculate_gamma_profile
+from src.settings import INCREMENTAL_FULL_RECOMPUTE_EVERY, INCREMENTAL_REANCHOR_THRESHOLD, SNAPSHOTS_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+PROFILE_CONTRACT_COLUMNS = [
+    "strikes",
+    "call_iv",
+    "put_iv",
+    "call_open_interest",
+    "put_open_interest",
+    "days_till_exp",
+]
+STRIKE_CONTRACT_COLUMNS = ["strike", "call_gamma_oi", "put_gamma_oi"]
+# Above this share of changed contracts, recomputing everything is cheaper than applying the deltas
+MAX_CHANGED_SHARE = 0.5
+
+
+def snapshot_asset_key(file_path: str, parse_only_zero_dte: bool) -> str:
+    """
+    Identify the snapshots of the same underlying and filters across downloads.
+    Args:
+        file_path (str): Path of the raw file (cboe_<asset>_quotedata_<filters>_<DD-MM-YY>.csv)
+        parse_only_zero_dte (bool): If only 0DTE options are considered
+    Returns:
+        str: Raw file name without the trade date (plus a 0DTE suffix).
+    """
+    name = os.path.splitext(os.path.basename(file_path))[0].rsplit("_", 1)[0]
+    return f"{name}_0dte" if parse_only_zero_dte else name
+
+
+def load_snapshot(asset: str, section: str) -> dict | None:
+    """
+    Load the previous snapshot state of an asset.
+    Args:
+        asset (str): Asset key (see `snapshot_asset_key`).
+        section (str): Kind of state ("profile" or "per_strike").
+    Returns:
+        dict | None: The snapshot, None if there is none or it is unreadable.
+    """
+    snapshot_path = os.path.join(SNAPSHOTS_CACHE_DIR, f"{asset}_{section}.pkl")
+    if not os.path.exists(snapshot_path):
+        return None
+    try:
+        with open(snapshot_path, "rb") as f:
+            return pickle.load(f)
+    except Exception as err:
+        logger.warning(f"Ignoring unreadable snapshot {snapshot_path}: {err}")
+        return None
+
+
+def save_snapshot(asset: str, section: str, snapshot: dict) -> None:
+    """
+    Store the snapshot state of an asset atomically.
+    Args:
+        asset (str): Asset key (see `snapshot_asset_key`).
+        section (str): Kind of state ("profile" or "per_strike").
+        snapshot (dict): The state.
+    """
+    snapshot_path = os.path.join(SNAPSHOTS_CACHE_DIR, f"{asset}_{section}.pkl")
+    tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, snapshot_path)
+
+
+def diff_contracts(previous: pd.DataFrame, current: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Find the contracts that differ between two snapshots indexed by option symbol.
+
+    A modified contract is returned twice: its previous version as removed and its current version as added,
+    so `result(current) == result(previous) - result(removed) + result(added)` for any additive result.
+    Args:
+        previous (pd.DataFrame): Previous snapshot contracts.
+        current (pd.DataFrame): Current snapshot contracts (same columns).
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: Removed and added contracts.
+    """
+    common = previous.index.intersection(current.index)
+    old_values = previous.loc[common, current.columns]
+    new_values = current.loc[common]
+    changed = ((old_values != new_values) & ~(old_values.isna() & new_values.isna())).any(axis=1).to_numpy()
+
+    removed = previous.index.difference(current.index).append(common[changed])
+    added = current.index.difference(previous.index).append(common[changed])
+    return previous.loc[removed], current.loc[added]
+
+
+def _changes_or_reason(snapshot: dict | None, contracts: pd.DataFrame) -> tuple[tuple | None, str | None]:
+    """
+    Diff the contracts against the snapshot, or tell why a full recompute is needed.
+    Returns:
+        tuple: (removed, added) contracts, or None and the reason of the full recompute.
+    """
+    if not snapshot:
+        return None, "no previous snapshot"
+    if not contracts.index.is_unique:
+        return None, "option symbols are not unique"
+    if list(snapshot["contracts"].columns) != list(contracts.columns):
+        return None, "contract columns changed"
+
+    removed, added = diff_contracts(snapshot["contracts"], contracts)
+    if len(removed) + len(added) > MAX_CHANGED_SHARE * 2 * max(len(contracts), 1):
+        return None, f"{len(added)} of {len(contracts)} contracts changed"
+    return (removed, added), None
+
+
+def _log_drift(asset: str, section: str, incremental: np.ndarray, full: np.ndarray) -> None:
+    scale = np.max(np.abs(full)) if full.size else 0
+    drift = np.max(np.abs(incremental - full)) / scale if scale else 0
+    logger.info(f"Incremental {section} drift for '{asset}' after the periodic full recompute: {drift:.3e}")
+
+
+def _profile_curves(contracts: pd.DataFrame, levels: np.ndarray, kernel: str | None) -> np.ndarray:
+    mask_columns = [column for column in contracts.columns if column.startswith("mask_")]
+    return calculate_gamma_profile(
+        levels=levels,
+        masks=contracts[mask_columns].to_numpy(dtype=bool).T,
+        kernel=kernel,
+        **{column: contracts[column].to_numpy() for column in PROFILE_CONTRACT_COLUMNS},
+    )
+
+
+def incremental_gamma_profile(
+    asset: str, contracts: pd.DataFrame, levels: np.ndarray, last_price: float, kernel: str | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calculate the Gamma Profile curves updating the previous snapshot only with the changed contracts.
+
+    The levels grid stays anchored to the price of the last full recompute while the spot moves less than
+    INCREMENTAL_REANCHOR_THRESHOLD; beyond that (or every INCREMENTAL_FULL_RECOMPUTE_EVERY snapshots, when the
+    accumulated drift is logged) everything is recomputed.
+    Args:
+        asset (str): Asset key (see `snapshot_asset_key`).
+        contracts (pd.DataFrame): Contracts indexed by option symbol, with PROFILE_CONTRACT_COLUMNS and one
+            boolean "mask_<i>" column per curve.
+        levels (np.ndarray): Spot levels to use on a full recompute.
+        last_price (float): Current spot price of the underlying asset.
+        kernel (str | None): Gamma Exposure kernel (see `src.analytics.gamma_kernels`). Defaults to GAMMA_KERNEL.
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Spot levels and the curves (not scaled), shape (P, L).
+    """
+    snapshot = load_snapshot(asset, "profile")
+    changes, reason = _changes_or_reason(snapshot, contracts)
+    if not reason and abs(last_price - snapshot["anchor_price"]) > INCREMENTAL_REANCHOR_THRESHOLD * last_price:
+        changes, reason = None, "spot moved away from the levels grid"
+
+    incremental_curves = None
+    if changes:
+        removed, added = changes
+        levels = snapshot["levels"]
+        incremental_curves = (
+            snapshot["curves"] + _profile_curves(added, levels, kernel) - _profile_curves(removed, levels, kernel)
+        )
+        logger.info(f"Updated the gamma profile of '{asset}' with {len(added)} changed contracts.")
+        if snapshot["increments"] + 1 >= INCREMENTAL_FULL_RECOMPUTE_EVERY:
+            reason = "periodic full recompute"
+
+    if reason:
+        logger.info(f"Full gamma profile recompute for '{asset}' ({reason}).")
+        curves = _profile_curves(contracts, levels, kernel)
+        if incremental_curves is not None:
+            _log_drift(asset, "gamma profile", incremental_curves, curves)
+        snapshot = {"anchor_price": last_price, "levels": levels, "increments": 0}
+    else:
+        curves = incremental_curves
+        snapshot["increments"] += 1
+
+    snapshot.update(contracts=contracts, curves=curves)
+    save_snapshot(asset, "profile", snapshot)
+    return snapshot["levels"], curves
+
+
+def _strike_sums(contracts: pd.DataFrame) -> pd.DataFrame:
+    sums = contracts.groupby("strike", sort=False)[["call_gamma_oi", "put_gamma_oi"]].sum()
+    sums["contracts"] = contracts.groupby("strike", sort=False).size()
+    return sums
+
+
+def incremental_gex_per_strike(asset: str, contracts: pd.DataFrame, last_price: float) -> pd.DataFrame:
+    """
+    Calculate the GEX per strike updating the previous snapshot sums only with the changed contracts.
+
+    The snapshot keeps the price independent sums (gamma x open interest), so a new last price does not
+    invalidate it.
+    Args:
+        asset (str): Asset key (see `snapshot_asset_key`).
+        contracts (pd.DataFrame): Contracts indexed by option symbol, with STRIKE_CONTRACT_COLUMNS.
+        last_price (float): Last price of the asset.
+    Returns:
+        pd.DataFrame: "gex_at_call", "gex_at_put" and "gamma_exposure_result" indexed by strike.
+    """
+    snapshot = load_snapshot(asset, "per_strike")
+    changes, reason = _changes_or_reason(snapshot, contracts)
+
+    incremental_sums = None
+    if changes:
+        removed, added = changes
+        incremental_sums = snapshot["sums"].add(_strike_sums(added), fill_value=0)
+        incremental_sums = incremental_sums.sub(_strike_sums(removed), fill_value=0)
+        incremental_sums = incremental_sums[incremental_sums["contracts"] > 0]
+        if snapshot["increments"] + 1 >= INCREMENTAL_FULL_RECOMPUTE_EVERY:
+            reason = "periodic full recompute"
+
+    if reason:
+        logger.info(f"Full GEX per strike recompute for '{asset}' ({reason}).")
+        sums = _strike_sums(contracts)
+        if incremental_sums is not None:
+            _log_drift(
+                asset,
+                "GEX per strike",
+                incremental_sums.reindex(sums.index, fill_value=0).to_numpy(dtype=np.float64),
+                sums.to_numpy(dtype=np.float64),
+            )
+        snapshot = {"increments": 0}
+    else:
+        sums = incremental_sums
+        snapshot["increments"] += 1
+
+    snapshot.update(contracts=contracts, sums=sums)
+    save_snapshot(asset, "per_strike", snapshot)
+
+    per_strike = pd.DataFrame(index=sums.index.astype(np.float64))
+    per_strike["gex_at_call"] = sums["call_gamma_oi"].to_numpy() * 100 * last_price
+    per_strike["gex_at_put"] = sums["put_gamma_oi"].to_numpy() * -100 * last_price
+    per_strike["gamma_exposure_result"] = per_strike["gex_at_call"] + per_strike["gex_at_put"]
+    return per_strike
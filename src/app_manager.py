@@ -1,15 +1,27 @@
 import logging
 import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 
-from src.analytics.gamma_exposure import calculate_gex_per_strikes
+from src.analytics.gamma_exposure import build_gex_per_strikes
+from src.downloader.async_cboe_downloader import AsyncCBOEDownloader
+from src.downloader import BaseDownloader
 from src.downloader.cboe_downloader import CBOEDownloader
-from src.parsers.cboe_parser import parse_cboe_csv
+from src.downloader.cboe_http_downloader import CBOEHTTPDownloader
+from src.downloader.download_cache import cached_download, store_download
+from src.instrumentation import StageRecorder
+from src.parsers.cboe_parser import persist_cboe_chain, process_cboe_csv
 from src.vizualization.gex_charts import process_metrics
-from src.settings import REPORTS_DIR, TEMP_DIR
-from src.utils import extract_date
+from src.settings import DOWNLOAD_METHOD, INSTRUMENTATION_TRACE_MEMORY, REPORTS_DIR
+from src.storage.results_store import latest_flip_point
 
 logger = logging.getLogger(__name__)
 
+# Keys of the per-asset GEX metrics that are not strikes
+ASSET_METRICS_KEYS = {"last_price", "flip", "gamma_profile"}
+# Downloaders per download method
+DOWNLOADERS = {"browser": CBOEDownloader, "http": CBOEHTTPDownloader}
+
 
 class GEXIndicatorManager:
     cboe_default_urls = [
@@ -25,6 +37,17 @@ class GEXIndicatorManager:
         split_visualization: bool,
         parse_only_zero_dte: bool,
         calc_flip_point: bool,
+        export_json: bool = False,
+        incremental: bool = False,
+        gamma_kernel: str | None = None,
+        profile_stages: bool = False,
+        persist: bool = True,
+        streaming: bool = False,
+        concurrent_downloads: bool = False,
+        downloader: BaseDownloader | None = None,
+        download_method: str | None = None,
+        download_cache: bool = True,
+        reports_dir: str | None = None,
     ) -> None:
         """
         Initialize the GEXIndicatorManager.
@@ -36,6 +59,22 @@ class GEXIndicatorManager:
             split_visualization (bool): Whether to generate separate visualizations for calls and puts.
             parse_only_zero_dte (bool): Whether to parse only zero-days-to-expiration options.
             calc_flip_point (bool): Whether to calculate the Gamma Flip point.
+            export_json (bool): Whether to also store the processed data as human readable JSON.
+            incremental (bool): Whether to update the previous snapshot of each asset only with the changed contracts.
+            gamma_kernel (str | None): Gamma Exposure kernel ("numpy", "scalar", "numba"). Defaults to GAMMA_KERNEL.
+            profile_stages (bool): Whether to dump a cProfile of every stage of the run.
+            persist (bool): Whether to store the processed data, the Gamma Profile and the Gamma Flip point
+                (in a background thread, the stages get the results in memory).
+            streaming (bool): Whether to parse the CSV files in chunks with bounded memory (not with `incremental`).
+            concurrent_downloads (bool): Whether to download the URLs concurrently with one shared browser
+                (at most DOWNLOAD_CONCURRENCY at a time, browser downloads only).
+            downloader (BaseDownloader | None): Downloader of the sequential downloads, e.g. a warm one
+                (`keep_browser=True`) held by a long-lived process across runs. Defaults to a new one per run.
+            download_method (str | None): "browser" (Playwright) or "http" (delayed quotes API, no browser) when
+                no `downloader` is given. Defaults to DOWNLOAD_METHOD.
+            download_cache (bool): Whether to serve the pages downloaded recently with the same filters from disk
+                (see `src.downloader.download_cache`). The downloads are recorded either way.
+            reports_dir (str | None): Directory of the charts. Defaults to REPORTS_DIR.
         """
         self.urls = urls or self.cboe_default_urls
         self.expiration_type = expiration_type or "all"
@@ -43,66 +82,172 @@ class GEXIndicatorManager:
         self.split_visualization = split_visualization or False
         self.parse_only_zero_dte = parse_only_zero_dte or False
         self.calc_flip_point = calc_flip_point or False
+        self.export_json = export_json or False
+        self.incremental = incremental or False
+        self.gamma_kernel = gamma_kernel
+        self.profile_stages = profile_stages or False
+        self.persist = True if persist is None else persist
+        self.streaming = streaming or False
+        self.concurrent_downloads = concurrent_downloads or False
+        self.downloader = downloader
+        self.download_method = download_method or DOWNLOAD_METHOD
+        if self.download_method not in DOWNLOADERS:
+            raise ValueError(f"Unknown download method '{self.download_method}' (available: {sorted(DOWNLOADERS)})")
+        self.download_cache = True if download_cache is None else download_cache
+        self.reports_dir = reports_dir or REPORTS_DIR
+        self.recorder = StageRecorder(enabled=False)  # Replaced by an active recorder on every run
+        self._persistence = None
+        self.persistence_futures = []
 
     def get_data(self, headless: bool) -> list[tuple]:
         """
         Download CBOE option chain CSV files and extract last prices.
 
+        Pages downloaded recently with the same filters (still fresh, see `download_cache`) are served from disk,
+        only the others are downloaded.
+
         Args:
             headless (bool): Whether to run the browser in headless mode.
 
         Returns:
             list[tuple]: A list of tuples containing (csv_file_path, last_price).
         """
-        cboe_downloader = CBOEDownloader()
-        csv_files_and_last_price = []
-        for url in self.urls:
-            options_csv_file_path, last_price = cboe_downloader.get_csv_and_last_price(
-                url=url,
-                expiration_type=self.expiration_type,
-                expiration_month=self.expiration_month,
-                headless=headless,
-            )
-            csv_files_and_last_price.append((options_csv_file_path, last_price))
+        downloads = {}
+        if self.download_cache:
+            for url in self.urls:
+                if cached := cached_download(url, self.expiration_type, self.expiration_month):
+                    downloads[url] = cached
+        urls = [url for url in self.urls if url not in downloads]
+
+        if self.concurrent_downloads and self.download_method == "browser" and len(urls) > 1:
+            with self.recorder.stage("download", asset=",".join(urls)):
+                results = AsyncCBOEDownloader().download(
+                    urls=urls,
+                    expiration_type=self.expiration_type,
+                    expiration_month=self.expiration_month,
+                    headless=headless,
+                )
+            fetched = dict(zip(urls, results))
+        elif urls:
+            fetched = {}
+            cboe_downloader = self.downloader or DOWNLOADERS[self.download_method]()
+            try:
+                for url in urls:
+                    with self.recorder.stage("download", asset=url):
+                        fetched[url] = cboe_downloader.get_csv_and_last_price(
+                            url=url,
+                            expiration_type=self.expiration_type,
+                            expiration_month=self.expiration_month,
+                            headless=headless,
+                        )
+            finally:
+                if self.downloader is None:
+                    cboe_downloader.close()
+        else:
+            fetched = {}
+
+        for url, (options_csv_file_path, last_price) in fetched.items():
+            store_download(url, self.expiration_type, self.expiration_month, options_csv_file_path, last_price)
+        downloads.update(fetched)
+        return [downloads[url] for url in self.urls]
+
+    def _persist_chain(self, chain: dict) -> str:
+        start = time.perf_counter()
+        processed_file = persist_cboe_chain(chain, export_json=self.export_json)
+        logger.info(f"Persisted '{os.path.basename(processed_file)}' in {time.perf_counter() - start:.3f}s.")
+        return processed_file
+
+    def _log_persistence_error(self, future: Future) -> None:
+        if future.exception():
+            logger.error(f"Failed to persist the processed data: {future.exception()}")
+
+    def persist_chain(self, chain: dict) -> None:
+        """
+        Store a processed chain in a background thread (one at a time, in submission order).
+
+        Args:
+            chain (dict): Chain processed by `process_cboe_csv`.
+        """
+        if self._persistence is None:
+            self._persistence = ThreadPoolExecutor(max_workers=1, thread_name_prefix="persistence")
+        future = self._persistence.submit(self._persist_chain, chain)
+        future.add_done_callback(self._log_persistence_error)
+        self.persistence_futures.append(future)
+
+    def wait_for_persistence(self) -> list[str]:
+        """
+        Wait until the processed chains submitted so far are stored.
 
-        return csv_files_and_last_price
+        Returns:
+            list[str]: Processed file paths (of the chains stored successfully).
+        """
+        processed_files = [future.result() for future in self.persistence_futures if not future.exception()]
+        self.persistence_futures = []
+        return processed_files
 
-    def process_data(self, csv_files_and_last_price: list[tuple]) -> list:
+    def process_data(self, csv_files_and_last_price: list[tuple]) -> list[dict]:
         """
         Parse CBOE CSV files and extract structured option data.
 
+        The results are handed to the next stages in memory; storing them (processed archive, Gamma Profile
+        and Gamma Flip point) runs in the background, or not at all when `persist` is off.
+
         Args:
             csv_files_and_last_price (list[tuple]): List of tuples containing
                 (csv_file_path, last_price).
 
         Returns:
-            list: A list of processed file paths containing parsed option data.
+            list[dict]: Processed chains (see `process_cboe_csv`).
         """
-        processed_files = []
+        chains = []
         for file_path, last_price in csv_files_and_last_price:
-            processed_file = parse_cboe_csv(
-                file_path=file_path,
-                last_price=last_price,
-                parse_only_zero_dte=self.parse_only_zero_dte,
-                calc_flip_point=self.calc_flip_point,
-            )
-            processed_files.append(processed_file)
+            with self.recorder.stage("parse", asset=os.path.basename(file_path)) as record:
+                chain = process_cboe_csv(
+                    file_path=file_path,
+                    last_price=last_price,
+                    parse_only_zero_dte=self.parse_only_zero_dte,
+                    calc_flip_point=self.calc_flip_point,
+                    incremental=self.incremental,
+                    gamma_kernel=self.gamma_kernel,
+                    streaming=self.streaming,
+                )
+                record.update(rows=chain["options"], strikes=len(chain["per_strike"]))
+            if self.persist:
+                self.persist_chain(chain)
+            chains.append(chain)
 
-        return processed_files
+        return chains
 
-    def process_gex_metrics(self, processed_files: list[str]) -> dict:
+    def process_gex_metrics(self, chains: list[dict]) -> dict:
         """
-        Calculate Gamma Exposure (GEX) metrics from processed files.
+        Calculate Gamma Exposure (GEX) metrics from the processed chains.
 
         Args:
-            processed_files (list[str]): List of processed file paths containing option data.
+            chains (list[dict]): Processed chains (see `process_data`).
 
         Returns:
             dict: Dictionary mapping assets to their calculated GEX metrics.
         """
         gex_metrics_per_asset = {}
-        for processed_file in processed_files:
-            calculated_gex = calculate_gex_per_strikes(processed_file_path=processed_file)
+        for chain in chains:
+            name = os.path.splitext(os.path.basename(chain["raw_file_path"]))[0]
+            with self.recorder.stage("gex_per_strikes", asset=name, strikes=len(chain["per_strike"])):
+                per_strike = chain["per_strike"]
+                calculated_gex = build_gex_per_strikes(
+                    f"processed_{name}",
+                    strikes=per_strike.index.to_numpy(),
+                    calls=per_strike["gex_at_call"].to_numpy(),
+                    puts=per_strike["gex_at_put"].to_numpy(),
+                    totals=per_strike["gamma_exposure_result"].to_numpy(),
+                    last_price=chain["last_price"],
+                )
+
+            # Gamma Flip and Gamma Profile calculated in this run
+            gamma_profile = chain["gamma_profile"]
+            if gamma_profile is not None:
+                flip_point = gamma_profile["flip_point"]
+                calculated_gex[f"processed_{name}"]["flip"] = str(flip_point) if flip_point is not None else ""
+            calculated_gex[f"processed_{name}"]["gamma_profile"] = gamma_profile
             gex_metrics_per_asset.update(calculated_gex)
 
         self.set_gamma_flip(gex_metrics_per_asset)
@@ -110,28 +255,17 @@ class GEXIndicatorManager:
 
     def set_gamma_flip(self, gex_metrics_per_asset: dict) -> None:
         """
-        Attach Gamma Flip values (if available) to the GEX metrics.
+        Attach the last stored Gamma Flip values (if available) to the GEX metrics of the assets whose
+        flip point was not calculated in this run (same asset, expiration filters and 0DTE flag, up to the
+        trade date of the asset, see `latest_flip_point`).
 
         Args:
             gex_metrics_per_asset (dict): Dictionary containing GEX metrics per asset.
         """
-        files = os.listdir(TEMP_DIR)
-
-        # Dynamic Mapping
-        flip_map = {}
-        for asset in gex_metrics_per_asset.keys():
-            asset_ticket = asset.split("_quotedata")[0].replace("processed_cboe_", "")
-            flip_file = max(
-                (f for f in files if asset_ticket.lower() in f.lower()),
-                key=extract_date,
-                default=None,
-            )
-            if flip_file:
-                with open(os.path.join(TEMP_DIR, flip_file), "r") as f:
-                    flip_map[asset] = f.read()
-
-        for asset, _ in gex_metrics_per_asset.items():
-            gex_metrics_per_asset[asset]["flip"] = flip_map.get(asset, "")
+        for asset, metrics in gex_metrics_per_asset.items():
+            if "flip" not in metrics:
+                flip_point = latest_flip_point(asset, self.parse_only_zero_dte)
+                metrics["flip"] = str(flip_point) if flip_point is not None else ""
 
     def generate_pine_script(self, gex_metrics: dict) -> None:
         """
@@ -199,16 +333,38 @@ class GEXIndicatorManager:
         - Generating visualizations
         - Printing Pine Script® code for TradingView
 
+        Every stage (and every asset within it) is timed, with its row/strike counts (and its peak memory with
+        `profile_stages` or INSTRUMENTATION_TRACE_MEMORY), into the pipeline metrics JSON lines and the Prometheus
+        text file (see `src.instrumentation`).
+
         Args:
             headless (bool, optional): Whether to run the downloader in headless mode.
                 Defaults to True.
         """
-        csv_files_and_last_price = self.get_data(headless)
-        processed_files = self.process_data(csv_files_and_last_price)
-        gex_metrics_per_asset = self.process_gex_metrics(processed_files)
-        visualization_mode = "total"
-        if self.split_visualization:
-            visualization_mode = "split"
-        final_gex_metrics = process_metrics(gex_metrics_per_asset, REPORTS_DIR, visualization_mode, telegram_chat_id)
-        self.generate_pine_script(final_gex_metrics)
+        # tracemalloc slows down every allocation, memory is only traced on demand
+        self.recorder = StageRecorder(
+            trace_memory=INSTRUMENTATION_TRACE_MEMORY or self.profile_stages, profile=self.profile_stages
+        )
+        try:
+            with self.recorder.stage("get_data"):
+                csv_files_and_last_price = self.get_data(headless)
+            with self.recorder.stage("process_data"):
+                chains = self.process_data(csv_files_and_last_price)
+            with self.recorder.stage("process_gex_metrics"):
+                gex_metrics_per_asset = self.process_gex_metrics(chains)
+            visualization_mode = "total"
+            if self.split_visualization:
+                visualization_mode = "split"
+            with self.recorder.stage("process_metrics"):
+                final_gex_metrics = {}
+                for asset, gex_data in gex_metrics_per_asset.items():
+                    strikes = len(gex_data.keys() - ASSET_METRICS_KEYS)
+                    with self.recorder.stage("chart", asset=asset, strikes=strikes):
+                        final_gex_metrics.update(
+                            process_metrics({asset: gex_data}, self.reports_dir, visualization_mode, telegram_chat_id)
+                        )
+            with self.recorder.stage("generate_pine_script"):
+                self.generate_pine_script(final_gex_metrics)
+        finally:
+            self.recorder.write()
         return final_gex_metrics
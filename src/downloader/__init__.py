@@ -1,41 +1,127 @@
+import json
 import logging
+import os
+import random
 import time
+from contextlib import contextmanager
 
-from playwright.sync_api import sync_playwright
-from playwright.sync_api._generated import Page
+from playwright.sync_api import Browser, BrowserContext, Playwright, sync_playwright
+
+from src.settings import (
+    BROWSER_MAX_USES,
+    BROWSER_STORAGE_STATE_FILE,
+    DOWNLOAD_JITTER_MAX_SECONDS,
+    DOWNLOAD_JITTER_MIN_SECONDS,
+)
+
+# Wait for the cookies popup when the consent was restored from the storage state (it should not show up)
+RESTORED_COOKIES_POPUP_TIMEOUT = 3000
+
+
+def action_jitter() -> float:
+    """
+    Draw the optional human-like pause after a page action (DOWNLOAD_JITTER_MIN/MAX_SECONDS).
+    Returns:
+        float: Seconds to pause, 0 when the jitter is disabled.
+    """
+    low, high = sorted((max(0.0, DOWNLOAD_JITTER_MIN_SECONDS), max(0.0, DOWNLOAD_JITTER_MAX_SECONDS)))
+    return random.uniform(low, high) if high > 0 else 0.0
+
+
+@contextmanager
+def timed_step(logger: logging.Logger, step: str, url: str):
+    """
+    Log the duration of a download step (where the page actually stalls), also when it fails.
+    Args:
+        logger (logging.Logger): Logger of the downloader.
+        step (str): Name of the step.
+        url (str): URL of the page.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        logger.info(f"Step '{step}' of {url} took {time.perf_counter() - start:.2f}s")
+
+
+def stored_browser_state() -> str | None:
+    """
+    Get the Playwright storage state (cookies and local storage) saved by the previous downloads.
+    Returns:
+        str | None: Path of the storage state, None if there is none yet.
+    """
+    return BROWSER_STORAGE_STATE_FILE if os.path.exists(BROWSER_STORAGE_STATE_FILE) else None
+
+
+def save_browser_state(state: dict) -> None:
+    """
+    Save a Playwright storage state for the next downloads (atomically, concurrent runs may read it).
+    Args:
+        state (dict): Storage state of a browser context.
+    """
+    tmp_path = f"{BROWSER_STORAGE_STATE_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, BROWSER_STORAGE_STATE_FILE)
 
 
 class BaseDownloader:
 
-    def __init__(self) -> None:
+    def __init__(self, keep_browser: bool = False, max_uses: int = BROWSER_MAX_USES) -> None:
+        """
+        Args:
+            keep_browser (bool): Keep the browser and its context warm between navigations (for long-lived
+                processes, call `close` at the end). Otherwise every navigation launches its own browser.
+            max_uses (int): Navigations before a kept browser is recycled.
+        """
         # Set logger
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.keep_browser = keep_browser
+        self.max_uses = max(1, max_uses)
+        self._pw: Playwright | None = None
+        self._browser: Browser | None = None
+        self._context: BrowserContext | None = None
+        self._headless = None
+        self._restored_state = False
+        self._uses = 0
 
-    def _sleep_between_actions(self, seconds: int = 2) -> None:
+    def _open_context(self, headless: bool) -> BrowserContext:
         """
-        Apply a delay between actions to avoid being detected.
+        Get the browser context of the navigation: the warm one when kept and alive, otherwise a new browser
+        and context restored from the saved storage state.
 
         Args:
-            seconds (int): Number of seconds to sleep.
+            headless (bool): Do not show the browser.
+        Returns:
+            BrowserContext: The context.
         """
-        time.sleep(seconds)
+        if self._context is not None and self._browser.is_connected() and self._headless == headless:
+            self.logger.info(f"Reusing the warm browser (navigation {self._uses + 1} of {self.max_uses}).")
+            return self._context
 
-    def resolve_cookies_popup(self, page: Page, resolve_cookies_selector: str) -> None:
-        """
-        Check for the initial cookies popup and resolve it.
+        if self._browser is not None:
+            self.logger.warning("Recycling the browser (crashed or the mode changed).")
+        self.close()
+        self._pw = sync_playwright().start()
+        self._browser = self._pw.chromium.launch(headless=headless)
+        storage_state = stored_browser_state()
+        self._context = self._browser.new_context(storage_state=storage_state)
+        self._headless, self._restored_state, self._uses = headless, storage_state is not None, 0
+        return self._context
 
-        Args:
-            page (Page): The Playwright page object.
-            resolve_cookies_selector (str): The selector for the cookies acceptance or close button.
+    def close(self) -> None:
+        """
+        Close the browser (kept or not) and stop Playwright.
         """
         try:
-            page.locator(resolve_cookies_selector)
-            page.click(resolve_cookies_selector)
-            self.logger.info(f"Cookies resolved for {page.url}.")
-        except TimeoutError:
-            self.logger.warning(f"No cookies found for {page.url}. Continuing...")
-
-        self._sleep_between_actions()
+            if self._browser is not None and self._browser.is_connected():
+                self._browser.close()
+        except Exception as err:
+            self.logger.warning(f"Failed to close the browser: {err}")
+        finally:
+            if self._pw is not None:
+                self._pw.stop()
+            self._pw = self._browser = self._context = None
 
     def start_navigation(self, url: str, headless: bool = True) -> object:
         """
@@ -49,17 +135,22 @@ class BaseDownloader:
 
         class PageContext:
             def __enter__(inner_self):
-                self._pw = sync_playwright().start()
-                self._browser = self._pw.chromium.launch(headless=headless)
-                self._context = self._browser.new_context()
-                self._page = self._context.new_page()
+                context = self._open_context(headless)
+                self._page = context.new_page()
                 self.logger.info(f"Navigating to {url}...")
                 self._page.goto(url, wait_until="load", timeout=60000)
                 return self._page
 
             def __exit__(inner_self, exc_type, exc_val, exc_tb):
-                self.logger.warning("Closing playwright context.")
-                self._browser.close()
-                self._pw.stop()
+                self._uses += 1
+                try:
+                    save_browser_state(self._context.storage_state())
+                    self._page.close()
+                except Exception as err:
+                    self.logger.warning(f"Failed to save the browser state: {err}")
+
+                if not self.keep_browser or self._uses >= self.max_uses or not self._browser.is_connected():
+                    self.logger.warning("Closing playwright context.")
+                    self.close()
 
         return PageContext()
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import time
+
+from playwright.async_api import Browser, async_playwright
+
+from src.downloader import save_browser_state, stored_browser_state
+from src.downloader.cboe_page import download_chain_steps, run_page_steps_async
+from src.settings import DOWNLOAD_CONCURRENCY
+
+
+class AsyncCBOEDownloader:
+    """
+    Download the CSV files of several CBOE pages concurrently (async Playwright API): one browser is launched
+    and every URL gets its own isolated context, at most `concurrency` at a time.
+    """
+
+    def __init__(self, concurrency: int = DOWNLOAD_CONCURRENCY) -> None:
+        """
+        Args:
+            concurrency (int): Pages driven at the same time.
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.concurrency = max(1, concurrency)
+
+    async def get_csv_and_last_price(
+        self, browser: Browser, url: str, expiration_type: str, expiration_month: str
+    ) -> tuple[str, str]:
+        """
+        Download a CSV file from CBOE web page in a new context of the shared browser (restored from the saved
+        storage state, which is updated after the download).
+        Args:
+            browser (Browser): The shared browser.
+            url (str): URL to be requested
+            expiration_type (str): Type of expiration (see `CBOEDownloader.get_csv_and_last_price`)
+            expiration_month (str): Expiration month for current year (portuguese).
+        Returns:
+            tuple[str, str]: File path and last price.
+        """
+        storage_state = stored_browser_state()
+        context = await browser.new_context(accept_downloads=True, storage_state=storage_state)
+        try:
+            page = await context.new_page()
+            self.logger.info(f"Navigating to {url}...")
+            await page.goto(url, wait_until="load", timeout=60000)
+
+            steps = download_chain_steps(
+                self.logger, url, expiration_type, expiration_month, restored_state=storage_state is not None
+            )
+            file_path, last_price = await run_page_steps_async(page, steps)
+            save_browser_state(await context.storage_state())
+            return file_path, last_price
+        finally:
+            await context.close()
+
+    async def download_all(
+        self, urls: list[str], expiration_type: str, expiration_month: str, headless: bool = True
+    ) -> list[tuple[str, str]]:
+        """
+        Download the CSV files of every URL concurrently.
+        Args:
+            urls (list[str]): URLs to be requested
+            expiration_type (str): Type of expiration.
+            expiration_month (str): Expiration month for current year (portuguese).
+            headless (bool): Do not show the browser.
+        Returns:
+            list[tuple[str, str]]: (file path, last price) of every URL, in the order of `urls`.
+        Raises:
+            Exception: The first download error, once every download finished.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with async_playwright() as pw:
+            browser = await pw.chromium.launch(headless=headless)
+
+            async def download(url: str) -> tuple[str, str]:
+                async with semaphore:
+                    start = time.perf_counter()
+                    result = await self.get_csv_and_last_price(browser, url, expiration_type, expiration_month)
+                    self.logger.info(f"Downloaded {url} in {time.perf_counter() - start:.1f}s")
+                    return result
+
+            try:
+                results = await asyncio.gather(*(download(url) for url in urls), return_exceptions=True)
+            finally:
+                self.logger.warning("Closing playwright browser.")
+                await browser.close()
+
+        errors = [(url, result) for url, result in zip(urls, results) if isinstance(result, BaseException)]
+        for url, error in errors:
+            self.logger.error(f"Download of {url} failed: {error!r}")
+        if errors:
+            raise errors[0][1]
+        return results
+
+    def download(
+        self, urls: list[str], expiration_type: str, expiration_month: str, headless: bool = True
+    ) -> list[tuple[str, str]]:
+        """
+        Blocking version of `download_all` (runs its own event loop).
+        """
+        return asyncio.run(self.download_all(urls, expiration_type, expiration_month, headless))
@@ -0,0 +1,225 @@
+import csv
+import io
+import re
+from datetime import date, datetime
+
+import httpx
+
+from src.analytics.expiry_calendar import QUARTERLY_MONTHS
+from src.settings import CBOE_API_BASE_URL, CBOE_API_TIMEOUT, DOWNLOAD_CONCURRENCY, RAW_DIR
+from src.utils import isThirdFriday
+from . import BaseDownloader, timed_step
+from .cboe_page import raw_file_path
+from .download_cache import market_now
+
+# Symbols served by the delayed quotes API with the index prefix ("_SPX"), the others are tried as well on a miss
+CBOE_INDEX_SYMBOLS = {"SPX", "XSP", "NDX", "XND", "RUT", "MRUT", "VIX", "DJX", "OEX", "XEO"}
+OCC_SYMBOL = re.compile(r"^(?P<root>[A-Z]+)(?P<expiration>\d{6})(?P<type>[CP])(?P<strike>\d{8})$")
+PORTUGUESE_MONTHS = {
+    name: number
+    for number, name in enumerate(
+        [
+            "janeiro",
+            "fevereiro",
+            "março",
+            "abril",
+            "maio",
+            "junho",
+            "julho",
+            "agosto",
+            "setembro",
+            "outubro",
+            "novembro",
+            "dezembro",
+        ],
+        start=1,
+    )
+}
+CBOE_CSV_COLUMNS = (
+    "Expiration Date,Calls,Last Sale,Net,Bid,Ask,Volume,IV,Delta,Gamma,Open Interest,"
+    "Strike,Puts,Last Sale,Net,Bid,Ask,Volume,IV,Delta,Gamma,Open Interest"
+).split(",")
+# Fields of an API option written on each side (calls / puts) of a CSV row, after the option symbol
+CBOE_API_OPTION_FIELDS = ["last_trade_price", "change", "bid", "ask", "volume", "iv", "delta", "gamma", "open_interest"]
+
+
+def api_symbols(symbol: str) -> list[str]:
+    """
+    Get the delayed quotes API names of a symbol, the most likely first ("_SPX" for indexes, "SPY" otherwise).
+    Args:
+        symbol (str): Symbol of the asset (e.g. "spx").
+    Returns:
+        list[str]: Names to request.
+    """
+    symbol = symbol.upper().lstrip("_")
+    return [f"_{symbol}", symbol] if symbol in CBOE_INDEX_SYMBOLS else [symbol, f"_{symbol}"]
+
+
+def quote_page_symbol(url: str) -> str:
+    """
+    Get the symbol of a CBOE delayed quotes page (".../delayed_quotes/spx/quote_table" -> "spx").
+    Args:
+        url (str): URL of the page (or the symbol itself).
+    Returns:
+        str: Symbol, lowercase.
+    """
+    match = re.search(r"/delayed_quotes/([^/?#]+)", url)
+    return (match.group(1) if match else url.strip("/")).lower()
+
+
+def _keep_expiration(expiration: date, expiration_type: str, expiration_month: str) -> bool:
+    """
+    Apply the "Expiration Type" / "Expiration" filters of the quote table page to an expiration. Standard and
+    monthly expirations are the third Fridays, quarterly ones the third Fridays of the quarter months.
+    Args:
+        expiration (date): Expiration date.
+        expiration_type (str): "all", "standard", "monthly", "quarterly" or "weekly".
+        expiration_month (str): "all" or the month in portuguese ("agosto").
+    Returns:
+        bool: Whether the options of the expiration are kept.
+    """
+    if expiration_month.lower() != "all" and expiration.month != PORTUGUESE_MONTHS[expiration_month.lower()]:
+        return False
+
+    expiration_type = expiration_type.lower()
+    if expiration_type == "all":
+        return True
+    if expiration_type in ("standard", "monthly"):
+        return isThirdFriday(expiration)
+    if expiration_type == "quarterly":
+        return isThirdFriday(expiration) and expiration.month in QUARTERLY_MONTHS
+    if expiration_type == "weekly":
+        return not isThirdFriday(expiration)
+    raise ValueError(f"Unsupported expiration type '{expiration_type}'")
+
+
+def _csv_number(value: float | None) -> str:
+    if value is None:
+        return "0"
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def chain_csv_from_payload(payload: dict, expiration_type: str = "all", expiration_month: str = "all") -> str:
+    """
+    Write a delayed quotes API chain in the layout of the CSV downloaded from the quote table page (3 metadata
+    lines, the header and one row per expiration, strike and root with the call and the put side by side).
+    Args:
+        payload (dict): Response of the API ({"timestamp": ..., "data": {"current_price": ..., "options": [...]}}).
+        expiration_type (str): Type of expiration (see `_keep_expiration`).
+        expiration_month (str): Expiration month (portuguese) or "all".
+    Returns:
+        str: CSV content.
+    """
+    data = payload["data"]
+    if expiration_month.lower() != "all" and expiration_month.lower() not in PORTUGUESE_MONTHS:
+        raise ValueError(f"Unsupported expiration month '{expiration_month}'")
+
+    # {(expiration, strike, root): {"C": option, "P": option}}, in the order of the quote table CSV
+    rows = {}
+    for option in data["options"]:
+        match = OCC_SYMBOL.match(option["option"])
+        if not match:
+            continue
+        expiration = datetime.strptime(match["expiration"], "%y%m%d").date()
+        if not _keep_expiration(expiration, expiration_type, expiration_month):
+            continue
+        key = (expiration, int(match["strike"]) / 1000, match["root"])
+        rows.setdefault(key, {})[match["type"]] = option
+
+    timestamp = datetime.fromisoformat(payload["timestamp"]) if payload.get("timestamp") else market_now()
+    buffer = io.StringIO()
+    buffer.write("\n")
+    buffer.write(
+        f"{data.get('symbol', '').lstrip('_')},Last: {data['current_price']},Change: {data.get('price_change', 0)}\n"
+    )
+    buffer.write(
+        f"Date: {timestamp.day} {timestamp:%B %Y %H:%M},Bid: {data.get('bid', 0)},Ask: {data.get('ask', 0)},"
+        f"Size: {_csv_number(data.get('bid_size'))}*{_csv_number(data.get('ask_size'))},"
+        f"Volume: {_csv_number(data.get('volume'))}\n"
+    )
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(CBOE_CSV_COLUMNS)
+    for (expiration, strike, _), sides in sorted(rows.items()):
+        row = [expiration.strftime("%a %b %d %Y")]
+        for option_type in ("C", "P"):
+            option = sides.get(option_type, {})
+            row.append(option.get("option", ""))
+            row.extend(_csv_number(option.get(field)) for field in CBOE_API_OPTION_FIELDS)
+            if option_type == "C":
+                row.append(f"{strike:.2f}")
+        writer.writerow(row)
+    return buffer.getvalue()
+
+
+class CBOEHTTPDownloader(BaseDownloader):
+    """
+    Fetch the delayed quotes option chains from the CBOE API over plain HTTP (no browser), with one pooled
+    client kept across the downloads, and store them in the raw CSV layout of the quote table page.
+    """
+
+    def __init__(
+        self, base_url: str = CBOE_API_BASE_URL, timeout: float = CBOE_API_TIMEOUT, raw_dir: str = RAW_DIR
+    ) -> None:
+        """
+        Args:
+            base_url (str): Base URL of the delayed quotes API (or of a stand-in server, see `cboe_stub_server`).
+            timeout (float): Timeout of every request (seconds).
+            raw_dir (str): Directory the raw CSV files are stored at.
+        """
+        super().__init__()
+        self.raw_dir = raw_dir
+        self.client = httpx.Client(
+            base_url=base_url,
+            timeout=timeout,
+            headers={"User-Agent": "Mozilla/5.0", "Accept": "application/json"},
+            limits=httpx.Limits(max_keepalive_connections=DOWNLOAD_CONCURRENCY),
+            transport=httpx.HTTPTransport(retries=2),
+        )
+
+    def fetch_chain(self, symbol: str) -> dict:
+        """
+        Request the option chain of a symbol.
+        Args:
+            symbol (str): Symbol of the asset (e.g. "spx").
+        Returns:
+            dict: Response of the API.
+        """
+        for api_symbol in api_symbols(symbol):
+            response = self.client.get(f"/{api_symbol}.json")
+            # The CDN answers 403 for unknown objects
+            if response.status_code in (403, 404):
+                continue
+            response.raise_for_status()
+            return response.json()
+        raise ValueError(f"No delayed quotes chain found for '{symbol}' at {self.client.base_url}")
+
+    def get_csv_and_last_price(
+        self, url: str, expiration_type: str, expiration_month: str, headless: bool = True
+    ) -> tuple[str]:
+        """
+        Download the option chain of a CBOE quote page and store it as a raw CSV.
+        Args:
+            url (str): URL of the quote page (e.g. "https://www.cboe.com/delayed_quotes/spx/quote_table")
+            expiration_type (str): Type of expiration (see `CBOEDownloader.get_csv_and_last_price`)
+            expiration_month (str): Expiration month for current year (portuguese).
+            headless (bool): Unused (no browser), kept for the `CBOEDownloader` interface.
+        Returns:
+            File Path (str) and last price (str).
+        """
+        symbol = quote_page_symbol(url)
+        with timed_step(self.logger, "fetch chain", url):
+            payload = self.fetch_chain(symbol)
+        with timed_step(self.logger, "write csv", url):
+            content = chain_csv_from_payload(payload, expiration_type, expiration_month)
+            file_path = raw_file_path(f"{symbol}_quotedata.csv", expiration_type, expiration_month, self.raw_dir)
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(content)
+        self.logger.info(f"CSV successfully stored at {file_path}")
+        return file_path, str(payload["data"]["current_price"])
+
+    def close(self) -> None:
+        """
+        Close the pooled client.
+        """
+        self.client.close()
+        super().close()
@@ -0,0 +1,260 @@
+"""
+Steps of the download of a CBOE delayed quotes page, shared by `CBOEDownloader` (sync Playwright API) and
+`AsyncCBOEDownloader` (async Playwright API). The steps are written once, as a generator of page actions, and
+run on the page of each API by `run_page_steps` / `run_page_steps_async`.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import time
+from typing import Generator
+
+from playwright._impl._errors import TimeoutError
+
+from src.settings import RAW_DIR
+from . import RESTORED_COOKIES_POPUP_TIMEOUT, action_jitter, timed_step
+from .download_cache import market_now
+
+# Selectors of the CBOE delayed quotes page
+COOKIES_ACCEPT_BUTTON = "#onetrust-accept-btn-handler"
+LAST_PRICE_TEXT = "//div[contains(., 'Last:')]/div[contains(@class, 'Box-cui_') and contains(@class, 'Text-cui__')]"
+EXPIRATION_TYPE_DROPDOWN = (
+    "//div[contains(text(), 'Expiration Type:')]/following::div[contains(@class, 'Box-cui__')][1]"
+)
+EXPIRATION_MONTH_DROPDOWN = "//div[contains(text(), 'Expiration:')]/following::div[contains(@class, 'Box-cui__')][1]"
+OPTIONS_RANGE_DROPDOWN = "//div[contains(text(), 'Options Range:')]/following::div[contains(@class, 'Box-cui__')][1]"
+DROPDOWN_OPTION = "div.ReactSelect__option:has-text('{}')"
+VIEW_CHAIN_BUTTON = "//button[contains(., 'View Chain')]"
+DOWNLOAD_CSV_LINK = "//a[contains(., 'Download CSV')]"
+# Requests of the page for the option chain (the delayed quotes API, see `cboe_http_downloader`). It is the full
+# chain, without the filters: the page may apply them locally, without a new request after "View Chain"
+CHAIN_REQUEST_PATH = "/delayed_quotes/options/"
+
+# Waits (ms) for the page conditions: quote loaded, dropdowns, a chain request after "View Chain" and network idle
+# after it (both best effort) and the "Download CSV" link visible
+LAST_PRICE_TIMEOUT = 15000
+DROPDOWN_TIMEOUT = 5000
+CHAIN_RESPONSE_TIMEOUT = 30000
+CHAIN_NETWORK_IDLE_TIMEOUT = 15000
+DOWNLOAD_LINK_TIMEOUT = 30000
+DOWNLOAD_TIMEOUT = 60000
+
+# Page actions yielded by the steps, (name, *args), with the same call in both Playwright APIs (the async one
+# returns an awaitable). The runners also handle:
+#   ("pause",): the optional random delay between actions (see `action_jitter`)
+#   ("click_for_response", selector, url_part, timeout): click and wait for a response whose URL contains
+#       `url_part` (any status, a cached one answers 304), returns the response or None when there is none (a
+#       failed click still raises)
+#   ("click_for_download", selector, timeout): click and wait for the download it starts, returns the download
+PAGE_ACTIONS = {
+    "click": lambda page, selector, timeout: page.locator(selector).first.click(timeout=timeout),
+    "wait": lambda page, selector, state, timeout: page.locator(selector).first.wait_for(state=state, timeout=timeout),
+    "text": lambda page, selector: page.locator(selector).first.text_content(),
+    "load_state": lambda page, state, timeout: page.wait_for_load_state(state, timeout=timeout),
+    "save": lambda page, download, file_path: download.save_as(file_path),
+}
+PAUSE = ("pause",)
+
+PageSteps = Generator[tuple, object, tuple[str, str]]
+
+
+def raw_file_path(suggested_filename: str, expiration_type: str, expiration_month: str, raw_dir: str = RAW_DIR) -> str:
+    """
+    Build the path of a downloaded CSV at RAW_DIR (cboe_<name>_<type>[_<month>]_<DD-MM-YY>.csv, dated at
+    MARKET_TIMEZONE like the download cache).
+    Args:
+        suggested_filename (str): File name suggested by the download (e.g. "spx_quotedata.csv")
+        expiration_type (str): Type of expiration.
+        expiration_month (str): Expiration month ("all" is left out of the name).
+        raw_dir (str): Directory of the raw files.
+    Returns:
+        str: Path of the raw file.
+    """
+    name, _ = os.path.splitext(suggested_filename)
+    filename = f"{name}_{expiration_type}"
+    filename = f"{filename}_{expiration_month}" if expiration_month.lower() != "all" else filename
+    return os.path.join(raw_dir, f"cboe_{filename}_{market_now().strftime('%d-%m-%y')}.csv")
+
+
+def setup_expiration_steps(logger: logging.Logger, url: str, _type: str, _month: str) -> PageSteps:
+    """
+    Steps setting up the expiration configs and loading the chain with them.
+    Args:
+        logger (logging.Logger): Logger of the downloader.
+        url (str): URL of the page.
+        _type (str): Type of expiration.
+        _month (str): Expiration month for current year (portuguese).
+    """
+    for dropdown_selector, option, label in [
+        (EXPIRATION_TYPE_DROPDOWN, _type, "Expiration type"),
+        (EXPIRATION_MONTH_DROPDOWN, _month, "Expiration month"),
+        (OPTIONS_RANGE_DROPDOWN, "all", "Options Range"),
+    ]:
+        # Expand the dropdown and select the option
+        with timed_step(logger, label.lower(), url):
+            yield ("wait", dropdown_selector, "visible", DROPDOWN_TIMEOUT)
+            yield ("click", dropdown_selector, None)
+            yield ("wait", DROPDOWN_OPTION.format(option), "visible", DROPDOWN_TIMEOUT)
+            yield ("click", DROPDOWN_OPTION.format(option), None)
+        logger.info(f"{label} '{option}' successfully selected.")
+        yield PAUSE
+
+    # Loads the chain. When the page requests the chain again, its response and the rendering after it are waited
+    # for; when it filters the chain it already has, there is no request and the rendering is not observable
+    with timed_step(logger, "view chain", url):
+        response = yield ("click_for_response", VIEW_CHAIN_BUTTON, CHAIN_REQUEST_PATH, CHAIN_RESPONSE_TIMEOUT)
+        if response is None:
+            logger.warning(
+                f"No chain request of {url} within {CHAIN_RESPONSE_TIMEOUT} ms after 'View Chain' (filtered locally?), "
+                "continuing."
+            )
+        try:
+            yield ("load_state", "networkidle", CHAIN_NETWORK_IDLE_TIMEOUT)
+        except TimeoutError:
+            logger.warning(
+                f"Network of {url} still busy {CHAIN_NETWORK_IDLE_TIMEOUT} ms after 'View Chain', "
+                "waiting for the download link."
+            )
+    yield PAUSE
+
+
+def download_chain_steps(
+    logger: logging.Logger, url: str, expiration_type: str, expiration_month: str, restored_state: bool = False
+) -> PageSteps:
+    """
+    Steps downloading the CSV of a CBOE quote page (already loaded) and scraping its last price.
+    Args:
+        logger (logging.Logger): Logger of the downloader.
+        url (str): URL of the page.
+        expiration_type (str): Type of expiration (see `CBOEDownloader.get_csv_and_last_price`).
+        expiration_month (str): Expiration month for current year (portuguese).
+        restored_state (bool): The browser context was restored from a storage state (the cookies consent is
+            likely kept, the popup is waited for briefly).
+    Returns:
+        tuple[str, str]: File path and last price (value of the generator).
+    """
+    with timed_step(logger, "cookies popup", url):
+        try:
+            yield ("click", COOKIES_ACCEPT_BUTTON, RESTORED_COOKIES_POPUP_TIMEOUT if restored_state else None)
+            logger.info(f"Cookies resolved for {url}.")
+        except TimeoutError:
+            logger.warning(f"No cookies found for {url}. Continuing...")
+    yield PAUSE
+
+    with timed_step(logger, "last price", url):
+        yield ("wait", LAST_PRICE_TEXT, "visible", LAST_PRICE_TIMEOUT)
+        last_price = yield ("text", LAST_PRICE_TEXT)
+
+    try:
+        yield from setup_expiration_steps(logger, url, expiration_type, expiration_month)
+    except TimeoutError as err:
+        logger.info(f"Retrying to set up expiration modules due to: {err}")
+        yield from setup_expiration_steps(logger, url, expiration_type, expiration_month)
+
+    with timed_step(logger, "download", url):
+        yield ("wait", DOWNLOAD_CSV_LINK, "visible", DOWNLOAD_LINK_TIMEOUT)
+        download = yield ("click_for_download", DOWNLOAD_CSV_LINK, DOWNLOAD_TIMEOUT)  # Scrolls the link into view
+        file_path = raw_file_path(download.suggested_filename, expiration_type, expiration_month)
+        yield ("save", download, file_path)
+    logger.info(f"CSV successfully stored at {file_path}")
+    return file_path, last_price
+
+
+def _chain_response(url_part: str):
+    return lambda response: url_part in response.url
+
+
+def _run_action(page, action: tuple) -> object:
+    name, *args = action
+    if name == "pause":
+        seconds = action_jitter()
+        if seconds:
+            time.sleep(seconds)
+        return None
+    if name == "click_for_response":
+        selector, url_part, timeout = args
+        clicked = False
+        try:
+            with page.expect_response(_chain_response(url_part), timeout=timeout) as response_info:
+                page.locator(selector).first.click(no_wait_after=True)
+                clicked = True
+            return response_info.value
+        except TimeoutError:
+            if not clicked:
+                raise
+            return None
+    if name == "click_for_download":
+        selector, timeout = args
+        with page.expect_download(timeout=timeout) as download_info:
+            page.locator(selector).first.click()
+        return download_info.value
+    return PAGE_ACTIONS[name](page, *args)
+
+
+async def _run_action_async(page, action: tuple) -> object:
+    name, *args = action
+    if name == "pause":
+        seconds = action_jitter()
+        if seconds:
+            # Without blocking the other pages
+            await asyncio.sleep(seconds)
+        return None
+    if name == "click_for_response":
+        selector, url_part, timeout = args
+        clicked = False
+        try:
+            async with page.expect_response(_chain_response(url_part), timeout=timeout) as response_info:
+                await page.locator(selector).first.click(no_wait_after=True)
+                clicked = True
+            return await response_info.value
+        except TimeoutError:
+            if not clicked:
+                raise
+            return None
+    if name == "click_for_download":
+        selector, timeout = args
+        async with page.expect_download(timeout=timeout) as download_info:
+            await page.locator(selector).first.click()
+        return await download_info.value
+    result = PAGE_ACTIONS[name](page, *args)
+    return await result if inspect.isawaitable(result) else result
+
+
+def run_page_steps(page, steps: PageSteps) -> object:
+    """
+    Run steps on a page of the sync Playwright API: the result of each action is sent back to the steps and its
+    errors are raised into them (where they may be handled).
+    Args:
+        page (Page): The Playwright page object.
+        steps (PageSteps): The steps (e.g. `download_chain_steps`).
+    Returns:
+        object: Value returned by the steps.
+    """
+    result, error = None, None
+    while True:
+        try:
+            action = steps.throw(error) if error is not None else steps.send(result)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            result, error = _run_action(page, action), None
+        except Exception as err:
+            result, error = None, err
+
+
+async def run_page_steps_async(page, steps: PageSteps) -> object:
+    """
+    Run steps on a page of the async Playwright API (see `run_page_steps`).
+    """
+    result, error = None, None
+    while True:
+        try:
+            action = steps.throw(error) if error is not None else steps.send(result)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            result, error = await _run_action_async(page, action), None
+        except Exception as err:
+            result, error = None, err
@@ -0,0 +1,183 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import dateparser
+import pandas as pd
+
+from src.downloader.cboe_http_downloader import CBOE_API_OPTION_FIELDS, CBOEHTTPDownloader, api_symbols
+from src.parsers.cboe_parser import load_cboe_csv, read_cboe_last_price
+
+logger = logging.getLogger(__name__)
+
+# Columns of each side of a raw CSV row, in the order of CBOE_API_OPTION_FIELDS
+CSV_SIDE_COLUMNS = ["Last Sale", "Net", "Bid", "Ask", "Volume", "IV", "Delta", "Gamma", "Open Interest"]
+
+
+def chain_payload_from_csv(file_path: str) -> dict:
+    """
+    Rebuild the delayed quotes API response of a raw CSV (the reverse of `chain_csv_from_payload`), so stored
+    chains can be served offline.
+    Args:
+        file_path (str): Path of the raw CSV.
+    Returns:
+        dict: {"timestamp": str, "data": {"symbol", "current_price", ..., "options": [...]}}
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        metadata = [f.readline().strip() for _ in range(3)]
+    fields = {}
+    for field in ",".join(metadata[1:]).split(","):
+        name, _, value = field.partition(":")
+        fields[name.strip()] = value.strip()
+    trade_time = dateparser.parse(fields["Date"].split(" GMT")[0])
+
+    df = pd.read_csv(file_path, skiprows=3)
+    options = []
+    for suffix, symbol_column in (("", "Calls"), (".1", "Puts")):
+        side = df[[symbol_column] + [f"{column}{suffix}" for column in CSV_SIDE_COLUMNS]]
+        side.columns = ["option"] + CBOE_API_OPTION_FIELDS
+        options.extend(side.to_dict(orient="records"))
+
+    symbol = os.path.basename(file_path).split("_")[1]
+    bid_size, _, ask_size = fields.get("Size", "0*0").partition("*")
+    return {
+        "timestamp": trade_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "data": {
+            "symbol": api_symbols(symbol)[0],
+            "current_price": float(fields["Last"]),
+            "price_change": float(fields.get("Change", 0)),
+            "bid": float(fields.get("Bid", 0)),
+            "ask": float(fields.get("Ask", 0)),
+            "bid_size": float(bid_size or 0),
+            "ask_size": float(ask_size or 0),
+            "volume": float(fields.get("Volume", 0)),
+            "options": options,
+        },
+    }
+
+
+def _handler(payloads: dict[str, bytes]) -> type:
+    class ChainHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = payloads.get(self.path.split("?")[0].strip("/").removesuffix(".json"))
+            if body is None:
+                self.send_error(403)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return ChainHandler
+
+
+def _chain_payloads(raw_files: list[str]) -> dict[str, bytes]:
+    """
+    Get the API responses served for raw CSV files (the last file of a symbol wins), keyed by API symbol.
+    """
+    payloads = {}
+    for file_path in raw_files:
+        payload = chain_payload_from_csv(file_path)
+        payloads[payload["data"]["symbol"]] = json.dumps(payload).encode()
+    return payloads
+
+
+@contextmanager
+def serve_cboe_chains(raw_files: list[str], host: str = "127.0.0.1", port: int = 0):
+    """
+    Serve raw CSV files as the delayed quotes API, in a background thread, to run `CBOEHTTPDownloader` offline:
+
+        with serve_cboe_chains(["data/raw/cboe_spx_quotedata_all_01-09-25.csv"]) as base_url:
+            CBOEHTTPDownloader(base_url=base_url).get_csv_and_last_price("spx", "all", "all")
+
+    Args:
+        raw_files (list[str]): Raw CSV files to serve.
+        host (str): Interface to listen on.
+        port (int): Port to listen on, 0 for a free one.
+    Yields:
+        str: Base URL of the server.
+    """
+    server = ThreadingHTTPServer((host, port), _handler(_chain_payloads(raw_files)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://{host}:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def check_round_trip(raw_files: list[str]) -> list[str]:
+    """
+    Check `CBOEHTTPDownloader` offline against stored chains: serve every raw CSV, download it over HTTP (to a
+    temporary directory) and compare what `load_cboe_csv` and `read_cboe_last_price` read from both files.
+    Args:
+        raw_files (list[str]): Raw CSV files to check.
+    Returns:
+        list[str]: Mismatches found, empty when every chain round-trips.
+    """
+    mismatches = []
+    with tempfile.TemporaryDirectory() as raw_dir:
+        for file_path in raw_files:
+            symbol = os.path.basename(file_path).split("_")[1]
+            with serve_cboe_chains([file_path]) as base_url:
+                downloader = CBOEHTTPDownloader(base_url=base_url, raw_dir=raw_dir)
+                try:
+                    downloaded_path, last_price = downloader.get_csv_and_last_price(symbol, "all", "all")
+                finally:
+                    downloader.close()
+
+            expected_price = float(read_cboe_last_price(file_path).replace(",", ""))
+            for name, price in (("returned", last_price), ("stored", read_cboe_last_price(downloaded_path))):
+                if float(price.replace(",", "")) != expected_price:
+                    mismatches.append(f"{file_path}: {name} last price {price} != {expected_price}")
+
+            expected_df, _ = load_cboe_csv(file_path, use_cache=False)
+            df, _ = load_cboe_csv(downloaded_path, use_cache=False)
+            try:
+                pd.testing.assert_frame_equal(df, expected_df)
+            except AssertionError as err:
+                mismatches.append(f"{file_path}: downloaded chain differs ({err})")
+            os.remove(downloaded_path)
+            logger.info(f"Checked the round trip of {file_path} ({len(df)} contracts).")
+    return mismatches
+
+
+def _args() -> dict:
+    parser = argparse.ArgumentParser(description="Serve raw CSV files as the CBOE delayed quotes API (offline runs).")
+    parser.add_argument("--files", type=str, required=True, help="Raw CSV files to serve. Comma separated.")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to listen on.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on.")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Do not serve: download every file through the HTTP downloader and compare it with the original.",
+    )
+    args = parser.parse_args()
+    return {"files": args.files.split(","), "host": args.host, "port": args.port, "check": args.check}
+
+
+if __name__ == "__main__":
+    args = _args()
+    if args["check"]:
+        mismatches = check_round_trip(args["files"])
+        for mismatch in mismatches:
+            logger.error(mismatch)
+        logger.info(f"Round trip checked on {len(args['files'])} chains: {len(mismatches)} mismatches.")
+        sys.exit(1 if mismatches else 0)
+    server = ThreadingHTTPServer((args["host"], args["port"]), _handler(_chain_payloads(args["files"])))
+    logger.info(f"Serving {len(args['files'])} chains at http://{args['host']}:{args['port']} (CBOE_API_BASE_URL).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from src.settings import (
+    DOWNLOAD_CACHE_DIR,
+    DOWNLOAD_CACHE_TTL_SECONDS,
+    EXCHANGE_HOLIDAYS,
+    MARKET_CLOSE_TIME,
+    MARKET_OPEN_TIME,
+    MARKET_TIMEZONE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def market_now() -> datetime:
+    """
+    Get the current moment at MARKET_TIMEZONE (see `trade_date` for the trade date of the downloads).
+    """
+    return datetime.now(ZoneInfo(MARKET_TIMEZONE))
+
+
+def _session(day: date) -> tuple[datetime, datetime] | None:
+    """
+    Get the open and close of the market session of a day, None on weekends and EXCHANGE_HOLIDAYS.
+    """
+    if day.weekday() >= 5 or day.isoformat() in EXCHANGE_HOLIDAYS:
+        return None
+    tz = ZoneInfo(MARKET_TIMEZONE)
+    open_time, close_time = (
+        datetime.strptime(value, "%H:%M").time() for value in (MARKET_OPEN_TIME, MARKET_CLOSE_TIME)
+    )
+    return datetime.combine(day, open_time, tz), datetime.combine(day, close_time, tz)
+
+
+def last_market_close(now: datetime) -> datetime | None:
+    """
+    Get the close of the last market session ended up to `now`.
+    Args:
+        now (datetime): Timezone aware moment.
+    Returns:
+        datetime | None: Close of the session, None if there is none in the last two weeks.
+    """
+    for days_back in range(15):
+        session = _session((now - timedelta(days=days_back)).date())
+        if session and session[1] <= now:
+            return session[1]
+    return None
+
+
+def market_is_open(now: datetime) -> bool:
+    """
+    Check whether `now` is within a market session (MARKET_OPEN_TIME to MARKET_CLOSE_TIME, MARKET_TIMEZONE).
+    """
+    session = _session(now.astimezone(ZoneInfo(MARKET_TIMEZONE)).date())
+    return session is not None and session[0] <= now < session[1]
+
+
+def trade_date(now: datetime) -> date:
+    """
+    Get the trade date of the data at `now`: today during a session, otherwise the date of the last session (the
+    chain fetched after a close holds that session until the next open, weekends and holidays included).
+    Args:
+        now (datetime): Timezone aware moment.
+    Returns:
+        date: Trade date, at MARKET_TIMEZONE.
+    """
+    now = now.astimezone(ZoneInfo(MARKET_TIMEZONE))
+    if market_is_open(now):
+        return now.date()
+    last_close = last_market_close(now)
+    return last_close.date() if last_close is not None else now.date()
+
+
+def is_fresh(fetched_at: float, now: datetime, ttl: float = DOWNLOAD_CACHE_TTL_SECONDS) -> bool:
+    """
+    Check whether a download still holds the current data: younger than the TTL, or fetched after the last
+    market close while the market is closed (the chain does not change until the next session).
+    Args:
+        fetched_at (float): Unix time of the download.
+        now (datetime): Timezone aware moment of the check.
+        ttl (float): Seconds a download fetched during a session stays fresh.
+    Returns:
+        bool: Whether the download can be served.
+    """
+    if ttl <= 0:
+        return False
+    if now.timestamp() - fetched_at <= ttl:
+        return True
+    if market_is_open(now):
+        return False
+    last_close = last_market_close(now)
+    return last_close is not None and fetched_at >= last_close.timestamp()
+
+
+def _entry_path(url: str, expiration_type: str, expiration_month: str, trade_date: date) -> str:
+    key = f"{url}|{expiration_type.lower()}|{expiration_month.lower()}|{trade_date.isoformat()}"
+    return os.path.join(DOWNLOAD_CACHE_DIR, f"{hashlib.sha1(key.encode()).hexdigest()}.json")
+
+
+def cached_download(url: str, expiration_type: str, expiration_month: str) -> tuple[str, str] | None:
+    """
+    Get the raw CSV and the last price of a fresh download of the same page and filters on the current trade date
+    (see `trade_date`).
+    Args:
+        url (str): URL of the quote page.
+        expiration_type (str): Type of expiration.
+        expiration_month (str): Expiration month.
+    Returns:
+        tuple[str, str] | None: File path and last price, None when there is no fresh download.
+    """
+    now = market_now()
+    entry_path = _entry_path(url, expiration_type, expiration_month, trade_date(now))
+    if not os.path.exists(entry_path):
+        return None
+    try:
+        with open(entry_path, "r") as f:
+            entry = json.load(f)
+    except (OSError, ValueError) as err:
+        logger.warning(f"Ignoring unreadable download cache entry {entry_path}: {err}")
+        return None
+
+    if not os.path.exists(entry["file_path"]) or not is_fresh(entry["fetched_at"], now):
+        return None
+    age = now.timestamp() - entry["fetched_at"]
+    logger.info(f"Serving {url} from the download cache ({os.path.basename(entry['file_path'])}, {age:.0f}s old).")
+    return entry["file_path"], entry["last_price"]
+
+
+def download_fetched_at(url: str, expiration_type: str, expiration_month: str) -> float | None:
+    """
+    Get when the page was last downloaded with the same filters on the current trade date.
+    Returns:
+        float | None: Unix time of the download, None if there is none.
+    """
+    entry_path = _entry_path(url, expiration_type, expiration_month, trade_date(market_now()))
+    try:
+        with open(entry_path, "r") as f:
+            return json.load(f)["fetched_at"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def store_download(url: str, expiration_type: str, expiration_month: str, file_path: str, last_price: str) -> None:
+    """
+    Record a download for `cached_download` (atomically, concurrent runs may read it).
+    Args:
+        url (str): URL of the quote page.
+        expiration_type (str): Type of expiration.
+        expiration_month (str): Expiration month.
+        file_path (str): Path of the raw CSV.
+        last_price (str): Last price scraped with it.
+    """
+    entry_path = _entry_path(url, expiration_type, expiration_month, trade_date(market_now()))
+    tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"url": url, "file_path": file_path, "last_price": last_price, "fetched_at": time.time()}, f)
+    os.replace(tmp_path, entry_path)
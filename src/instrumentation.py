@@ -0,0 +1,145 @@
+import cProfile
+import json
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+from src.settings import INSTRUMENTATION_TRACE_MEMORY, METRICS_DIR, PIPELINE_METRICS_FILE, PROMETHEUS_TEXTFILE
+
+logger = logging.getLogger(__name__)
+
+# Prometheus gauges written for every stage record: (metric, record field, help)
+PROMETHEUS_STAGE_METRICS = [
+    ("gex_stage_duration_seconds", "duration_seconds", "Wall-clock duration of the pipeline stage in the last run."),
+    ("gex_stage_peak_memory_bytes", "peak_memory_bytes", "Peak memory allocated during the stage (tracemalloc)."),
+    ("gex_stage_rows", "rows", "Option rows handled by the stage."),
+    ("gex_stage_strikes", "strikes", "Strikes handled by the stage."),
+]
+
+
+class StageRecorder:
+    """
+    Record the duration, the peak memory (tracemalloc) and the row/strike counts of the pipeline stages,
+    optionally with a cProfile dump per top-level stage.
+    """
+
+    def __init__(self, enabled: bool = True, trace_memory: bool = INSTRUMENTATION_TRACE_MEMORY, profile: bool = False):
+        """
+        Args:
+            enabled (bool): Record the stages (a disabled recorder only runs them).
+            trace_memory (bool): Measure the peak memory of every stage with tracemalloc.
+            profile (bool): Dump a cProfile of every top-level stage to METRICS_DIR/profiles/<run id>.
+        """
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.profile = profile
+        self.run_id = f"{datetime.now():%Y%m%dT%H%M%S}_{os.getpid()}"
+        self.records = []
+        self._open_stages = []
+        self._started_tracemalloc = False
+
+    def _fold_peak(self) -> None:
+        """Credit the traced peak since the last reset to every open stage, then reset it."""
+        _, peak = tracemalloc.get_traced_memory()
+        for open_stage in self._open_stages:
+            open_stage["peak"] = max(open_stage["peak"], peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def stage(self, name: str, asset: str = "", **counts):
+        """
+        Measure a stage of the pipeline.
+
+        Args:
+            name (str): Name of the stage.
+            asset (str): Asset (file or URL) of a per-asset stage, empty for the whole run.
+            **counts: Known counts ("rows", "strikes"), more can be set on the yielded record.
+        Yields:
+            dict: The stage record, to attach counts discovered while the stage runs.
+        """
+        record = {"run_id": self.run_id, "stage": name, "asset": asset, **counts}
+        if not self.enabled:
+            yield record
+            return
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        open_stage = {"peak": 0, "start": 0}
+        if self.trace_memory:
+            self._fold_peak()
+            open_stage["start"] = tracemalloc.get_traced_memory()[0]
+        self._open_stages.append(open_stage)
+
+        profiler = cProfile.Profile() if self.profile and len(self._open_stages) == 1 else None
+        record["started_at"] = datetime.now().isoformat(timespec="milliseconds")
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+        except Exception as err:
+            record["error"] = type(err).__name__
+            raise
+        finally:
+            if profiler:
+                profiler.disable()
+            record["duration_seconds"] = time.perf_counter() - start
+            if self.trace_memory:
+                self._fold_peak()
+                record["peak_memory_bytes"] = max(0, open_stage["peak"] - open_stage["start"])
+            self._open_stages.pop()
+            if profiler:
+                profile_dir = os.path.join(METRICS_DIR, "profiles", self.run_id)
+                os.makedirs(profile_dir, exist_ok=True)
+                record["profile_path"] = os.path.join(profile_dir, f"{name}.prof")
+                profiler.dump_stats(record["profile_path"])
+            self.records.append(record)
+            memory = f", peak memory {record['peak_memory_bytes'] / 2**20:.1f} MiB" if self.trace_memory else ""
+            logger.info(
+                f"Stage '{name}'{f' [{asset}]' if asset else ''} took {record['duration_seconds']:.3f}s{memory}"
+            )
+
+    def write(self) -> None:
+        """
+        Append the records to PIPELINE_METRICS_FILE (JSON lines) and replace the Prometheus text-format
+        file PROMETHEUS_TEXTFILE (for the node_exporter textfile collector) with the metrics of this run.
+        """
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        if not self.enabled or not self.records:
+            return
+
+        with open(PIPELINE_METRICS_FILE, "a") as f:
+            for record in self.records:
+                f.write(json.dumps(record) + "\n")
+
+        lines = []
+        for metric, field, description in PROMETHEUS_STAGE_METRICS:
+            samples = [record for record in self.records if record.get(field) is not None]
+            if not samples:
+                continue
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} gauge"]
+            for record in samples:
+                asset = str(record["asset"]).replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{metric}{{stage="{record["stage"]}",asset="{asset}"}} {record[field]}')
+        failed = int(any("error" in record for record in self.records))
+        lines += [
+            "# HELP gex_run_failed Whether the last pipeline run raised an error.",
+            "# TYPE gex_run_failed gauge",
+            f"gex_run_failed {failed}",
+            "# HELP gex_run_timestamp_seconds Unix time of the end of the last pipeline run.",
+            "# TYPE gex_run_timestamp_seconds gauge",
+            f"gex_run_timestamp_seconds {time.time():.3f}",
+        ]
+
+        # node_exporter may read the file at any time, so it is replaced atomically
+        tmp_path = f"{PROMETHEUS_TEXTFILE}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, PROMETHEUS_TEXTFILE)
+        logger.info(f"Stored stage metrics at {PIPELINE_METRICS_FILE} and {PROMETHEUS_TEXTFILE}")
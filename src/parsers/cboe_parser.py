@@ -1,35 +1,195 @@
 import dateparser
+import hashlib
+import io
 import json
 import logging
 import numpy as np
 import os
 import pandas as pd
+import pickle
 from datetime import datetime, date
 from decimal import Decimal
 
-from src.settings import PROCESSED_DIR, TEMP_DIR
-from src.utils import calcGammaEx, isThirdFriday
+from src.analytics.expiry_calendar import get_expiry_calendar
+from src.analytics.gamma_flip import (
+    PROFILE_CURVES,
+    calculate_gamma_profile,
+    find_gamma_flips,
+    gamma_profile_key,
+    interpolate_gamma_flips,
+    load_gamma_profile,
+    save_gamma_profile,
+)
+from src.analytics.incremental import incremental_gamma_profile, incremental_gex_per_strike, snapshot_asset_key
+from src.settings import (
+    CBOE_CSV_CHUNK_ROWS,
+    GAMMA_FLIP_COARSE_POINTS,
+    GAMMA_FLIP_METHOD,
+    GAMMA_FLIP_XTOL,
+    GAMMA_PROFILES_DIR,
+    PARSED_CHAINS_CACHE_DIR,
+    PROCESSED_DIR,
+)
+from src.storage.results_store import save_gex_results, save_gex_strikes, summary_levels
 
 logger = logging.getLogger(__name__)
 
+EXPIRATION_DATE_FORMAT = "%a %b %d %Y"
+CBOE_CSV_METADATA_LINES = 3
+# Bump when CBOE_CSV_DTYPES or the parsing changes, it invalidates the parsed chains cache
+CBOE_CSV_LOADER_VERSION = 2
+CBOE_CSV_DTYPES = {
+    "Expiration Date": "category",
+    "Calls": "object",
+    "IV": "float64",
+    "Gamma": "float64",
+    "Open Interest": "float32",
+    "Strike": "float64",
+    "IV.1": "float64",
+    "Gamma.1": "float64",
+    "Open Interest.1": "float32",
+}
+PROCESSED_FORMAT_VERSION = 1
+LEADS_COLUMNS = [
+    "strike",
+    "expiration_date",
+    "gex_at_call",
+    "gex_at_put",
+    "call_open_interest",
+    "put_open_interest",
+    "gamma_exposure_result",
+    "call_gamma_value",
+    "put_gamma_value",
+]
+
+
+def _mangle_duplicated_columns(columns: list[str]) -> list[str]:
+    """
+    Rename repeated columns the same way pandas does ("IV", "IV.1", ...).
+    Args:
+        columns (list[str]): Raw column names
+    Returns:
+        list[str]: Unique column names
+    """
+    seen = {}
+    mangled = []
+    for column in columns:
+        column = column.strip()
+        count = seen.get(column, 0)
+        mangled.append(f"{column}.{count}" if count else column)
+        seen[column] = count + 1
+    return mangled
 
-def load_cboe_csv(file_path: str) -> tuple[pd.DataFrame, list]:
+
+def _read_cboe_csv_header(buffer: io.BufferedIOBase) -> tuple[list, list[str]]:
+    """
+    Read the metadata lines and the (mangled) column names of a CBOE CSV, leaving the buffer at the body.
+    Args:
+        buffer (io.BufferedIOBase): Binary buffer at the start of the file
+    Returns:
+        tuple[list, list[str]]: The metadata lines and the column names.
+    """
+    metadata = [buffer.readline().decode("utf-8").strip() for _ in range(CBOE_CSV_METADATA_LINES)]
+    columns = _mangle_duplicated_columns(buffer.readline().decode("utf-8").split(","))
+    return metadata, columns
+
+
+def _type_cboe_chain(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Keep the CBOE_CSV_DTYPES columns (in order) and parse the expiration dates.
+    Args:
+        df (pd.DataFrame): Chain (or chunk of a chain) read with CBOE_CSV_DTYPES
+    Returns:
+        pd.DataFrame: Typed chain.
+    """
+    df = df[list(CBOE_CSV_DTYPES)]
+
+    # A chain has only a few dozen expirations, so parse each distinct date once
+    expirations = df["Expiration Date"].cat
+    parsed_expirations = pd.to_datetime(expirations.categories, format=EXPIRATION_DATE_FORMAT)
+    df["Expiration Date"] = expirations.rename_categories(parsed_expirations).astype("datetime64[ns]")
+    return df
+
+
+def _parse_cboe_csv_content(content: bytes) -> tuple[pd.DataFrame, list]:
+    """
+    Parse the metadata lines, the header and the body of a CBOE CSV already read into memory.
+    Args:
+        content (bytes): Raw CSV content
+    Returns:
+        tuple[pd.DataFrame, list]: Typed chain with only CBOE_CSV_DTYPES columns and the metadata lines.
+    """
+    buffer = io.BytesIO(content)
+    metadata, columns = _read_cboe_csv_header(buffer)
+
+    # The C engine with column pruning beats pyarrow on chain sized files (it has to parse every column)
+    df = pd.read_csv(
+        buffer,
+        header=None,
+        names=columns,
+        usecols=list(CBOE_CSV_DTYPES),
+        dtype=CBOE_CSV_DTYPES,
+        engine="c",
+    )
+    return _type_cboe_chain(df), metadata
+
+
+def load_cboe_csv(file_path: str, use_cache: bool = True) -> tuple[pd.DataFrame, list]:
     """
     Load a CSV from CBOE.
+
+    The file is read once; its content hash keys a cache of parsed chains (at PARSED_CHAINS_CACHE_DIR),
+    so loading the same raw file again skips the parsing.
     Args:
         file_path (str): Path of the (raw) file to be readed (csv)
+        use_cache (bool): Read/write the parsed chain cache
     Returns:
-        DataFrame
+        tuple[pd.DataFrame, list]: Typed chain and the 3 metadata lines of the file.
     """
-    df = pd.read_csv(file_path, skiprows=3)
-    df = df.rename(columns=lambda x: x.strip())
-
-    with open(file_path, "r") as f:
-        metadata = [next(f).strip() for _ in range(3)]
+    with open(file_path, "rb") as f:
+        content = f.read()
+
+    cache_path = None
+    if use_cache:
+        content_hash = hashlib.sha256(content).hexdigest()
+        cache_path = os.path.join(PARSED_CHAINS_CACHE_DIR, f"{content_hash}_v{CBOE_CSV_LOADER_VERSION}.pkl")
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, "rb") as f:
+                    df, metadata = pickle.load(f)
+                logger.info(f"Loaded parsed chain for '{file_path}' from cache.")
+                return df, metadata
+            except Exception as err:
+                logger.warning(f"Ignoring unreadable parsed chain cache {cache_path}: {err}")
+
+    df, metadata = _parse_cboe_csv_content(content)
+
+    if cache_path:
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((df, metadata), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
 
     return df, metadata
 
 
+def read_cboe_last_price(file_path: str) -> str:
+    """
+    Read the asset last price from the metadata lines of a CBOE CSV ("..., Last: 6460.2598, ...").
+    Args:
+        file_path (str): Path of the (raw) file to be readed (csv)
+    Returns:
+        str: Last price of the asset.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        metadata = [f.readline().strip() for _ in range(CBOE_CSV_METADATA_LINES)]
+
+    for field in ",".join(metadata).split(","):
+        if field.strip().startswith("Last:"):
+            return field.split("Last:")[1].strip()
+    raise ValueError(f"Last price not found in the metadata of '{file_path}'")
+
+
 def calculate_gamma_exposure(gamma_value: float, open_interest: float, option_type: str, last_price: float) -> float:
     """
     Calculate Gamma Exposure Result.
@@ -49,16 +209,59 @@ def calculate_gamma_exposure(gamma_value: float, open_interest: float, option_ty
     return gex_value
 
 
-def calculate_gamma_flip(
-    df: pd.DataFrame, _metadata: list, last_price: float, parse_only_zero_dte: bool, file_path: str
-) -> int:
+def _read_trade_date(_metadata: list) -> datetime:
+    """
+    Get the trade date of the chain from the metadata lines ("Date: ..." at index 2).
+    Args:
+        _metadata (list): Metadata lines of the CBOE CSV
+    Returns:
+        datetime: Trade date (at midnight).
     """
-    Calculate the Gamma Flip point for a given options DataFrame and save the result to a file.
+    date_line = _metadata[2]
+    today_date_str = date_line.split("Date: ")[1].split(",")[0]
+    parsed_date = dateparser.parse(today_date_str)
+    return datetime(year=parsed_date.year, month=parsed_date.month, day=parsed_date.day)
+
+
+def gamma_profile_path(file_path: str, parse_only_zero_dte: bool, method: str) -> str:
+    """
+    Get the path of the stored Gamma Profile of a raw file, one per filters and solver (the 0DTE and the full
+    chain profiles of the same download do not overwrite each other).
+    Args:
+        file_path (str): Path of the (raw) file the profile is calculated from (csv)
+        parse_only_zero_dte (bool): If only 0DTE options are considered
+        method (str): Zero crossing solver, "grid" or "brent".
+    Returns:
+        str: Path of the profile (.npz) at GAMMA_PROFILES_DIR.
+    """
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    if parse_only_zero_dte:
+        name = f"{name}_0dte"
+    return os.path.join(GAMMA_PROFILES_DIR, f"gamma_profile_{name}_{method}.npz")
+
+
+def build_gamma_profile(
+    df: pd.DataFrame,
+    _metadata: list,
+    last_price: float,
+    parse_only_zero_dte: bool,
+    file_path: str,
+    method: str = GAMMA_FLIP_METHOD,
+    xtol: float = GAMMA_FLIP_XTOL,
+    incremental: bool = False,
+    gamma_kernel: str | None = None,
+    use_cache: bool = True,
+) -> dict:
+    """
+    Calculate the Gamma Profile (and the Gamma Flip point) for a given options DataFrame, in memory.
 
     This function computes the gamma exposure for multiple spot levels based on the
-    options data provided, identifies the zero-crossing point of the total gamma
-    (the Gamma Flip), rounds it to the nearest multiple of 5, and writes the result
-    to a file named 'gamma_flip_result.txt' in the current directory.
+    options data provided, identifies the zero-crossing points of the total gamma
+    (the lowest one is the Gamma Flip) and rounds it to the nearest multiple of 5.
+
+    With method "grid" the crossings are interpolated on a 60 levels grid; with method "brent"
+    they are bracketed on a coarse grid and refined with Brent's method up to `xtol`. In incremental mode
+    the "grid" curves update the previous snapshot of the asset only with the changed contracts.
 
     Args:
         df (pd.DataFrame): DataFrame containing options data. Must include columns
@@ -67,88 +270,165 @@ def calculate_gamma_flip(
         last_price (float): Current spot price of the underlying asset.
         parse_only_zero_dte (bool): Consider only zero days to expiration.
         file_path (str): Path of the (raw) file to be readed (csv)
+        method (str): Zero crossing solver, "grid" or "brent".
+        xtol (float): Precision of the crossings with method "brent" (in points of the underlying).
+        incremental (bool): Update the previous snapshot of the asset instead of recomputing every contract.
+        gamma_kernel (str | None): Gamma Exposure kernel (see `src.analytics.gamma_kernels`).
+        use_cache (bool): Reuse the stored Gamma Profile when the chain and the levels did not change.
 
     Returns:
-        float: The rounded Gamma Flip value.
+        dict: The profile: "levels", PROFILE_CURVES, "flips" and "flip_point" (the rounded Gamma Flip value,
+            None when the total gamma does not cross zero), plus the metadata of the calculation.
     """
     fromStrike = 0.8 * last_price
     toStrike = 1.2 * last_price
     levels = np.linspace(fromStrike, toStrike, 60)
 
-    # Get Today's Date
-    date_line = _metadata[2]
-    today_date_str = date_line.split("Date: ")[1].split(",")[0]
-    parsed_date = dateparser.parse(today_date_str)
-    today_date = datetime(year=parsed_date.year, month=parsed_date.month, day=parsed_date.day)
+    today_date = _read_trade_date(_metadata)
 
     df["Expiration Date"] = pd.to_datetime(df["Expiration Date"])
     if parse_only_zero_dte:
         df = df[df["Expiration Date"].dt.date == today_date.date()]
 
-    df["IsThirdFriday"] = [isThirdFriday(x) for x in df["Expiration Date"]]
-    df["daysTillExp"] = [
-        (
-            1 / 262
-            if (np.busday_count(today_date.date(), x.date())) == 0
-            else np.busday_count(today_date.date(), x.date()) / 262
-        )
-        for x in df["Expiration Date"]
-    ]
-
-    nextExpiry = df["Expiration Date"].min()
-    thirdFridays = df.loc[df["IsThirdFriday"]]
-    nextMonthlyExp = thirdFridays["Expiration Date"].min()
+    # Calendar fields are calculated once per expiration and broadcasted to the rows
+    expiry_calendar, expiry_codes = get_expiry_calendar(df["Expiration Date"], today_date.date())
+    df["IsThirdFriday"] = expiry_calendar["is_third_friday"].to_numpy()[expiry_codes]
+    df["daysTillExp"] = expiry_calendar["days_till_exp"].to_numpy()[expiry_codes]
 
-    total_gamma = []
-    total_gex_next = []
-    total_gex_fri = []
+    nextExpiry = expiry_calendar.index.min()
+    nextMonthlyExp = expiry_calendar.index[expiry_calendar["is_third_friday"].to_numpy(dtype=bool)].min()
 
-    # For each spot level, calc gamma exposure at that point
+    # Calc gamma exposure at every spot level at once (total, ex next expiry, ex next monthly expiry)
     logger.info("Calculating Gamma Flip...")
-    for level in levels:
-        df["callGammaEx"] = df.apply(
-            lambda row: calcGammaEx(
-                level, row["Strike"], row["IV"], row["daysTillExp"], 0, 0, "call", row["Open Interest"]
-            ),
-            axis=1,
-        )
-
-        df["putGammaEx"] = df.apply(
-            lambda row: calcGammaEx(
-                level, row["Strike"], row["IV.1"], row["daysTillExp"], 0, 0, "put", row["Open Interest.1"]
-            ),
-            axis=1,
-        )
-        total_gamma.append(df["callGammaEx"].sum() - df["putGammaEx"].sum())
-        exNxt = df.loc[df["Expiration Date"] != nextExpiry]
-        total_gex_next.append(exNxt["callGammaEx"].sum() - exNxt["putGammaEx"].sum())
-
-        exFri = df.loc[df["Expiration Date"] != nextMonthlyExp]
-        total_gex_fri.append(exFri["callGammaEx"].sum() - exFri["putGammaEx"].sum())
-
-    total_gamma = np.array(total_gamma) / 10**9
-    total_gex_next = np.array(total_gex_next) / 10**9
-    total_gex_fri = np.array(total_gex_fri) / 10**9
-
-    # Find Gamma Flip Point
-    zero_cross_idx = np.where(np.diff(np.sign(total_gamma)))[0]
-    neg_gamma = total_gamma[zero_cross_idx]
-    pos_gamma = total_gamma[zero_cross_idx + 1]
-    neg_strike = levels[zero_cross_idx]
-    pos_strike = levels[zero_cross_idx + 1]
-    zero_gamma = pos_strike - ((pos_strike - neg_strike) * pos_gamma / (pos_gamma - neg_gamma))
-    zero_gamma = zero_gamma[0]
-    flip_point = round(float(zero_gamma) / 5) * 5
-    logger.info(f"Calculated flip point {flip_point}")
+    masks = np.vstack(
+        [
+            np.ones(len(df), dtype=bool),
+            (df["Expiration Date"] != nextExpiry).to_numpy(),
+            (df["Expiration Date"] != nextMonthlyExp).to_numpy(),
+        ]
+    )
+    chain = {
+        "strikes": df["Strike"].to_numpy(),
+        "call_iv": df["IV"].to_numpy(),
+        "put_iv": df["IV.1"].to_numpy(),
+        "call_open_interest": df["Open Interest"].to_numpy(),
+        "put_open_interest": df["Open Interest.1"].to_numpy(),
+        "days_till_exp": df["daysTillExp"].to_numpy(),
+    }
 
+    # Find Gamma Flip Points (reusing the stored profile when the chain and the levels did not change)
+    profile_path = gamma_profile_path(file_path, parse_only_zero_dte, method)
+    if method == "brent":
+        search = {"lower": fromStrike, "upper": toStrike, "points": GAMMA_FLIP_COARSE_POINTS, "xtol": xtol}
+    else:
+        search = {"lower": fromStrike, "upper": toStrike, "points": len(levels)}
+    profile_key = gamma_profile_key(chain, masks, method=method, **search)
+
+    profile = load_gamma_profile(profile_path) if use_cache else None
+    if profile and profile["key"] == profile_key:
+        logger.info(f"Reusing the gamma profile stored at {profile_path}")
+    else:
+        profile = {
+            "key": profile_key,
+            "method": method,
+            "last_price": last_price,
+            "trade_date": today_date.date().isoformat(),
+            "next_expiry": nextExpiry.date().isoformat() if pd.notna(nextExpiry) else None,
+            "next_monthly_expiry": nextMonthlyExp.date().isoformat() if pd.notna(nextMonthlyExp) else None,
+        }
+        if method == "brent":
+            # Keep every curve at every level the solver evaluated
+            evaluated = {}
+
+            def total_gamma_at(x: np.ndarray) -> np.ndarray:
+                curves = calculate_gamma_profile(levels=x, masks=masks, kernel=gamma_kernel, **chain) / 10**9
+                evaluated.update(zip(x.tolist(), curves.T))
+                return curves[0]
+
+            flips, evaluations = find_gamma_flips(
+                total_gamma_at,
+                lower=fromStrike,
+                upper=toStrike,
+                coarse_points=GAMMA_FLIP_COARSE_POINTS,
+                xtol=xtol,
+            )
+            levels = np.array(sorted(evaluated))
+            curves = np.array([evaluated[level] for level in levels]).T
+        elif incremental:
+            # Contracts keyed by option symbol, with the curves they are summed into
+            contracts = pd.DataFrame(chain, index=df["Calls"].to_numpy())
+            for idx, mask in enumerate(masks):
+                contracts[f"mask_{idx}"] = mask
+            asset = snapshot_asset_key(file_path, parse_only_zero_dte)
+            levels, curves = incremental_gamma_profile(asset, contracts, levels, last_price, gamma_kernel)
+            curves = curves / 10**9
+            flips, evaluations = interpolate_gamma_flips(levels, curves[0]), len(levels)
+        else:
+            curves = calculate_gamma_profile(levels=levels, masks=masks, kernel=gamma_kernel, **chain) / 10**9
+            flips, evaluations = interpolate_gamma_flips(levels, curves[0]), len(levels)
+        logger.info(f"Gamma zero crossings {flips} found with {evaluations} spot levels evaluated ({method}).")
+
+        profile.update(levels=levels, flips=flips, flip_point=round(flips[0] / 5) * 5 if flips else None)
+        profile.update(zip(PROFILE_CURVES, curves))
+
+    if profile["flip_point"] is None:
+        logger.warning(f"Total gamma does not cross zero between {fromStrike:.2f} and {toStrike:.2f}.")
+    else:
+        logger.info(f"Calculated flip point {profile['flip_point']}")
+
+    return profile
+
+
+def store_gamma_flip(profile: dict, file_path: str, parse_only_zero_dte: bool = False, **levels) -> None:
+    """
+    Store a Gamma Profile (see `build_gamma_profile`) at GAMMA_PROFILES_DIR and its Gamma Flip point
+    in the results store (see `src.storage.results_store`).
+    Args:
+        profile (dict): The Gamma Profile.
+        file_path (str): Path of the (raw) file the profile was calculated from (csv)
+        parse_only_zero_dte (bool): If only 0DTE options were considered
+        **levels: Other results stored along (e.g. "last_price" and the `summary_levels`).
+    """
     name = os.path.splitext(os.path.basename(file_path))[0]
-    filename = f"flip_point_{name}.txt"
-    filepath = f"{TEMP_DIR}/{filename}"
-    with open(filepath, "w") as f:
-        f.write(str(flip_point))
-    logger.info(f"Stored flip point result at {filepath}")
+    save_gamma_profile(profile, gamma_profile_path(file_path, parse_only_zero_dte, profile["method"]))
+
+    save_gex_results(file_path, parse_only_zero_dte, flip_point=profile["flip_point"], **levels)
+    logger.info(f"Stored flip point result of '{name}'")
 
-    return flip_point
+
+def calculate_gamma_flip(
+    df: pd.DataFrame,
+    _metadata: list,
+    last_price: float,
+    parse_only_zero_dte: bool,
+    file_path: str,
+    method: str = GAMMA_FLIP_METHOD,
+    xtol: float = GAMMA_FLIP_XTOL,
+    incremental: bool = False,
+    gamma_kernel: str | None = None,
+    use_cache: bool = True,
+) -> int | None:
+    """
+    Calculate the Gamma Flip point for a given options DataFrame and save the result to a file
+    (see `build_gamma_profile` and `store_gamma_flip`).
+
+    Returns:
+        int | None: The rounded Gamma Flip value, None when the total gamma does not cross zero.
+    """
+    profile = build_gamma_profile(
+        df,
+        _metadata,
+        last_price,
+        parse_only_zero_dte,
+        file_path,
+        method=method,
+        xtol=xtol,
+        incremental=incremental,
+        gamma_kernel=gamma_kernel,
+        use_cache=use_cache,
+    )
+    store_gamma_flip(profile, file_path, parse_only_zero_dte)
+    return profile["flip_point"]
 
 
 def generate_leads(
@@ -158,106 +438,521 @@ def generate_leads(
     parse_only_zero_dte: bool,
     calc_flip_point: bool,
     file_path: str,
-) -> dict:
+    incremental: bool = False,
+    gamma_kernel: str | None = None,
+) -> pd.DataFrame:
     """
-    Calculate the leads for each strike.
+    Calculate the leads for each option of the chain.
     Args:
         df (pd.DataFrame): A dataframe to be processed.
         last_price (str): Last price of the asset.
         parse_only_zero_dte (bool): If we will consider only 0DTE options
         calc_flip_point (bool): If we will calculate Flip Gamma Point
         file_path (str): Path of the (raw) file to be readed (csv)
+        incremental (bool): Update the previous Gamma Flip snapshot of the asset only with the changed contracts
+        gamma_kernel (str | None): Gamma Exposure kernel of the Gamma Flip (see `src.analytics.gamma_kernels`)
     Returns:
-        dict:
-    {
-        "strike1": [ {exp1}, {exp2}, ... ],
-        "strike2": [ {exp1}, {exp2}, ... ],
-    }
+        pd.DataFrame: One row per option (indexed by the call symbol) with the columns in LEADS_COLUMNS.
+            The asset last price is kept at `leads.attrs["last_price"]`.
     """
     last_price = float(Decimal(last_price.replace(",", "")))
-    processed_strikes = {}
-    for idx, row in df.iterrows():
-        if idx < 3:  # Skip initial 3 lines
-            continue
-
-        expiration_date = row["Expiration Date"]
-        if parse_only_zero_dte:
-            parsed_expiration = datetime.strptime(expiration_date, "%a %b %d %Y").date()
-            if date.today() != parsed_expiration:
-                continue
+    chain = df.iloc[3:]  # Skip initial 3 lines
 
-        call_gamma_value = row["Gamma"]
-        call_open_interest = row["Open Interest"]
-        put_gamma_value = row["Gamma.1"]
-        put_open_interest = row["Open Interest.1"]
-        strike = str(row["Strike"])
-        call_result = calculate_gamma_exposure(
-            gamma_value=call_gamma_value,
-            open_interest=call_open_interest,
-            option_type="call",
-            last_price=last_price,
-        )
-        put_result = calculate_gamma_exposure(
-            gamma_value=put_gamma_value,
-            open_interest=put_open_interest,
-            option_type="put",
-            last_price=last_price,
-        )
-        gamma_exposure_result = call_result + put_result
-
-        if not processed_strikes.get(strike):
-            processed_strikes[strike] = []
-
-        processed_strikes[strike].append(
-            {
-                "expiration_date": expiration_date,
-                "gex_at_call": call_result,
-                "gex_at_put": put_result,
-                "call_open_interest": call_open_interest,
-                "put_open_interest": put_open_interest,
-                "gamma_exposure_result": gamma_exposure_result,
-                "call_gamma_value": call_gamma_value,
-                "put_gamma_value": put_gamma_value,
-            }
-        )
-    processed_strikes["last_price"] = last_price
+    if parse_only_zero_dte:
+        expiration_dates = chain["Expiration Date"]
+        if not pd.api.types.is_datetime64_any_dtype(expiration_dates):
+            expiration_dates = pd.to_datetime(expiration_dates, format=EXPIRATION_DATE_FORMAT)
+        chain = chain[(expiration_dates.dt.normalize() == pd.Timestamp(date.today())).to_numpy()]
+
+    call_result = calculate_gamma_exposure(
+        gamma_value=chain["Gamma"].to_numpy(),
+        open_interest=chain["Open Interest"].to_numpy(),
+        option_type="call",
+        last_price=last_price,
+    )
+    put_result = calculate_gamma_exposure(
+        gamma_value=chain["Gamma.1"].to_numpy(),
+        open_interest=chain["Open Interest.1"].to_numpy(),
+        option_type="put",
+        last_price=last_price,
+    )
+    leads = pd.DataFrame(
+        {
+            "strike": chain["Strike"].to_numpy(),
+            "expiration_date": chain["Expiration Date"].to_numpy(),
+            "gex_at_call": call_result,
+            "gex_at_put": put_result,
+            "call_open_interest": chain["Open Interest"].to_numpy(),
+            "put_open_interest": chain["Open Interest.1"].to_numpy(),
+            "gamma_exposure_result": call_result + put_result,
+            "call_gamma_value": chain["Gamma"].to_numpy(),
+            "put_gamma_value": chain["Gamma.1"].to_numpy(),
+        },
+        columns=LEADS_COLUMNS,
+        index=chain["Calls"].to_numpy(),
+    )
+    leads.attrs["last_price"] = last_price
 
     if calc_flip_point:
-        calculate_gamma_flip(df, _metadata, last_price, parse_only_zero_dte, file_path)
+        calculate_gamma_flip(
+            df,
+            _metadata,
+            last_price,
+            parse_only_zero_dte,
+            file_path,
+            incremental=incremental,
+            gamma_kernel=gamma_kernel,
+        )
+
+    return leads
+
+
+def export_processed_strikes_json(leads: pd.DataFrame, output_path: str) -> str:
+    """
+    Store the processed data into a human readable JSON file.
+    Args:
+        leads (pd.DataFrame): Options with calculated gex for calls and puts (see `generate_leads`)
+        output_path (str): Path of the JSON file
+    Returns:
+        str: JSON file path.
+    """
+    leads = leads.copy()
+    if pd.api.types.is_datetime64_any_dtype(leads["expiration_date"]):
+        leads["expiration_date"] = leads["expiration_date"].dt.strftime(EXPIRATION_DATE_FORMAT)
+
+    # {"strike1": [ {exp1}, {exp2}, ... ], "strike2": [ ... ], "last_price": float}
+    processed_strikes = {
+        str(float(strike)): options.drop(columns="strike").to_dict("records")
+        for strike, options in leads.groupby("strike", sort=False)
+    }
+    processed_strikes["last_price"] = leads.attrs["last_price"]
+
+    with open(output_path, "w") as f:
+        json.dump(processed_strikes, f, indent=2)
+
+    logger.info(f"JSON export stored at {output_path}")
+    return output_path
 
-    return processed_strikes
+
+def incremental_leads_per_strike(leads: pd.DataFrame, raw_file_path: str, parse_only_zero_dte: bool) -> pd.DataFrame:
+    """
+    Sum the GEX per strike updating the previous snapshot of the asset only with the changed options.
+    Args:
+        leads (pd.DataFrame): Options with calculated gex for calls and puts (see `generate_leads`)
+        raw_file_path (str): Initial CSV file path
+        parse_only_zero_dte (bool): If we will consider only 0DTE options
+    Returns:
+        pd.DataFrame: "gex_at_call", "gex_at_put" and "gamma_exposure_result" indexed by strike.
+    """
+    contracts = pd.DataFrame(
+        {
+            "strike": leads["strike"].to_numpy(),
+            "call_gamma_oi": leads["call_gamma_value"].to_numpy() * leads["call_open_interest"].to_numpy(),
+            "put_gamma_oi": leads["put_gamma_value"].to_numpy() * leads["put_open_interest"].to_numpy(),
+        },
+        index=leads.index,
+    )
+    asset = snapshot_asset_key(raw_file_path, parse_only_zero_dte)
+    return incremental_gex_per_strike(asset, contracts, leads.attrs["last_price"])
+
+
+def sum_gex_per_strike(leads: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sum the GEX of the options per strike.
+    Args:
+        leads (pd.DataFrame): Options with calculated gex for calls and puts (see `generate_leads`)
+    Returns:
+        pd.DataFrame: "gex_at_call", "gex_at_put" and "gamma_exposure_result" indexed by strike.
+    """
+    return leads.groupby("strike", sort=False)[["gex_at_call", "gex_at_put", "gamma_exposure_result"]].sum()
 
 
-def save_processed_strikes(processed_strikes: dict, raw_file_path: str) -> str:
+def save_processed_strikes(
+    leads: pd.DataFrame, raw_file_path: str, export_json: bool = False, per_strike: pd.DataFrame | None = None
+) -> str:
     """
-    Store the processed data into a JSON file.
+    Store the processed data into a compressed columnar NumPy archive (.npz).
+
+    The archive holds a JSON `header` (last price and metadata), one array per leads column and the
+    per-strike sums under the `per_strike_*` keys, so the analytics can load only what they need.
     Args:
-        processed_strikes (dict): Strikes with calculated gex for calls and puts
+        leads (pd.DataFrame): Options with calculated gex for calls and puts (see `generate_leads`)
         raw_file_path (str): Initial CSV file path
+        export_json (bool): Also store the data as an indented JSON file
+        per_strike (pd.DataFrame | None): Precomputed per-strike sums (see `sum_gex_per_strike`)
+    Returns:
+        str: Processed file path.
     """
     name = os.path.splitext(os.path.basename(raw_file_path))[0]
-    filename = f"processed_{name}.json"
+    filename = f"processed_{name}.npz"
     output_path = os.path.join(PROCESSED_DIR, filename)
 
-    with open(output_path, "w") as f:
-        json.dump(processed_strikes, f, indent=2)
+    expiration_dates = leads["expiration_date"]
+    if not pd.api.types.is_datetime64_any_dtype(expiration_dates):
+        expiration_dates = pd.to_datetime(expiration_dates, format=EXPIRATION_DATE_FORMAT)
+
+    if per_strike is None:
+        per_strike = sum_gex_per_strike(leads)
+    header = {
+        "format_version": PROCESSED_FORMAT_VERSION,
+        "last_price": leads.attrs["last_price"],
+        "raw_file": os.path.basename(raw_file_path),
+        "options": len(leads),
+        "strikes": len(per_strike),
+    }
+    columns = {column: leads[column].to_numpy() for column in LEADS_COLUMNS}
+    columns["expiration_date"] = expiration_dates.to_numpy().astype("datetime64[D]")
+    _write_processed_archive(output_path, header, per_strike, columns)
 
-    logger.info(f"Serialized data stored at {output_path}")
+    if export_json:
+        export_processed_strikes_json(leads, os.path.join(PROCESSED_DIR, f"processed_{name}.json"))
+
+    return output_path
+
+
+def save_processed_per_strike(per_strike: pd.DataFrame, raw_file_path: str, last_price: float, options: int) -> str:
+    """
+    Store only the header and the per-strike sums into the processed archive (.npz), for the chains
+    processed in streaming mode (which do not keep the options).
+    Args:
+        per_strike (pd.DataFrame): Per-strike sums (see `sum_gex_per_strike`)
+        raw_file_path (str): Initial CSV file path
+        last_price (float): Last price of the asset
+        options (int): Options of the chain
+    Returns:
+        str: Processed file path.
+    """
+    name = os.path.splitext(os.path.basename(raw_file_path))[0]
+    output_path = os.path.join(PROCESSED_DIR, f"processed_{name}.npz")
+    header = {
+        "format_version": PROCESSED_FORMAT_VERSION,
+        "last_price": last_price,
+        "raw_file": os.path.basename(raw_file_path),
+        "options": options,
+        "strikes": len(per_strike),
+    }
+    _write_processed_archive(output_path, header, per_strike, {})
     return output_path
 
 
-def parse_cboe_csv(file_path: str, last_price: str, parse_only_zero_dte: bool, calc_flip_point: bool) -> str:
+def _write_processed_archive(output_path: str, header: dict, per_strike: pd.DataFrame, columns: dict) -> None:
+    np.savez_compressed(
+        output_path,
+        header=np.array(json.dumps(header)),
+        per_strike_strike=per_strike.index.to_numpy(dtype=np.float64),
+        per_strike_call=per_strike["gex_at_call"].to_numpy(),
+        per_strike_put=per_strike["gex_at_put"].to_numpy(),
+        per_strike_total=per_strike["gamma_exposure_result"].to_numpy(),
+        **columns,
+    )
+    logger.info(f"Serialized data stored at {output_path}")
+
+
+def _accumulate_per_strike(sums: dict, strikes: np.ndarray, values: np.ndarray) -> None:
     """
-    Manage processing of Raw CSV File from CBOE.
+    Add options to running per-strike sums, with the grouping order (first appearance) and the compensated
+    (Kahan) summation of `pd.DataFrame.groupby(sort=False).sum()`, so the result is the same to the bit.
+    Args:
+        sums (dict): Running sums: {"positions": {strike: row}, "sum": (S, C) array, "compensation": (S, C) array}
+        strikes (np.ndarray): Strike of every option, shape (N,).
+        values (np.ndarray): Values of every option, shape (N, C).
+    """
+    keep = ~np.isnan(strikes)
+    strikes, values = strikes[keep], values[keep]
+    positions = sums["positions"]
+    new_strikes = [strike for strike in pd.unique(strikes).tolist() if strike not in positions]
+    positions.update((strike, len(positions) + offset) for offset, strike in enumerate(new_strikes))
+    padding = np.zeros((len(new_strikes), values.shape[1]))
+    sums["sum"] = np.vstack([sums["sum"], padding])
+    sums["compensation"] = np.vstack([sums["compensation"], padding])
+
+    rows = pd.Index(list(positions)).get_indexer(strikes)
+    # The n-th options of every strike are added at once, which keeps the order of the additions per strike
+    occurrence = pd.Series(rows).groupby(rows).cumcount().to_numpy()
+    total, compensation = sums["sum"], sums["compensation"]
+    for n in range(occurrence.max() + 1 if len(rows) else 0):
+        idx = rows[occurrence == n]
+        value = values[occurrence == n]
+        with np.errstate(invalid="ignore"):
+            y = value - compensation[idx]
+            t = total[idx] + y
+            c = t - total[idx] - y
+        c[np.isnan(c)] = 0  # +/- infinity values
+        skip = np.isnan(value)
+        total[idx] = np.where(skip, total[idx], t)
+        compensation[idx] = np.where(skip, compensation[idx], c)
+
+
+def stream_cboe_csv(
+    file_path: str,
+    last_price: str,
+    parse_only_zero_dte: bool,
+    calc_flip_point: bool,
+    gamma_kernel: str | None = None,
+    chunk_rows: int = CBOE_CSV_CHUNK_ROWS,
+) -> dict:
+    """
+    Process a Raw CSV File from CBOE in chunks of `chunk_rows` options, keeping only running aggregates:
+    the per-strike sums (the same as `sum_gex_per_strike`) and, for the Gamma Flip, the Gamma Exposure curve
+    of every expiration over the grid levels. Peak memory depends on the chunk size, not on the chain size.
+
+    The options are not kept (the processed archive only gets the per-strike sums), the Gamma Flip is
+    always calculated with the "grid" method and the parsed chain / Gamma Profile caches are not used.
     Args:
         file_path (str): Path to the CSV file from CBOE.
         last_price (str): Last price of the asset.
         parse_only_zero_dte (bool): If we will consider only 0DTE options
         calc_flip_point (bool): If we will calculate Flip Gamma Point
+        gamma_kernel (str | None): Gamma Exposure kernel of the Gamma Flip. Defaults to GAMMA_KERNEL.
+        chunk_rows (int): Options read per chunk.
     Returns:
-        str: Processed file path.
+        dict: Same as `process_cboe_csv`, with "leads" None.
     """
+    last_price = float(Decimal(last_price.replace(",", "")))
+    levels = np.linspace(0.8 * last_price, 1.2 * last_price, 60)
+    per_strike_sums = {"positions": {}, "sum": np.zeros((0, 3)), "compensation": np.zeros((0, 3))}
+    expiration_curves = {}  # {expiration: (is third friday, curve over the levels)}
+    options = 0
+
+    logger.info(f"Streaming '{file_path}' in chunks of {chunk_rows} options...")
+    with open(file_path, "rb") as f:
+        _metadata, columns = _read_cboe_csv_header(f)
+        today_date = _read_trade_date(_metadata)
+        reader = pd.read_csv(
+            f,
+            header=None,
+            names=columns,
+            usecols=list(CBOE_CSV_DTYPES),
+            dtype=CBOE_CSV_DTYPES,
+            engine="c",
+            chunksize=chunk_rows,
+        )
+        first_row = 0
+        for chunk in reader:
+            chunk = _type_cboe_chain(chunk)
+            expirations = chunk["Expiration Date"]
+
+            # Leads: the 3 first options are skipped, as `generate_leads` does
+            leads = chunk.iloc[max(0, 3 - first_row) :]
+            first_row += len(chunk)
+            if parse_only_zero_dte:
+                leads = leads[(leads["Expiration Date"].dt.normalize() == pd.Timestamp(date.today())).to_numpy()]
+            call_result = calculate_gamma_exposure(
+                leads["Gamma"].to_numpy(), leads["Open Interest"].to_numpy(), "call", last_price
+            )
+            put_result = calculate_gamma_exposure(
+                leads["Gamma.1"].to_numpy(), leads["Open Interest.1"].to_numpy(), "put", last_price
+            )
+            values = np.column_stack([call_result, put_result, call_result + put_result])
+            _accumulate_per_strike(per_strike_sums, leads["Strike"].to_numpy(), values)
+            options += len(leads)
+
+            if not calc_flip_point:
+                continue
+            if parse_only_zero_dte:
+                chunk = chunk[(expirations.dt.date == today_date.date()).to_numpy()]
+                expirations = chunk["Expiration Date"]
+            if chunk.empty:
+                continue
+            expiry_calendar, expiry_codes = get_expiry_calendar(expirations, today_date.date())
+            curves = calculate_gamma_profile(
+                levels=levels,
+                strikes=chunk["Strike"].to_numpy(),
+                call_iv=chunk["IV"].to_numpy(),
+                put_iv=chunk["IV.1"].to_numpy(),
+                call_open_interest=chunk["Open Interest"].to_numpy(),
+                put_open_interest=chunk["Open Interest.1"].to_numpy(),
+                days_till_exp=expiry_calendar["days_till_exp"].to_numpy()[expiry_codes],
+                masks=np.arange(len(expiry_calendar))[:, None] == expiry_codes,
+                kernel=gamma_kernel,
+            )
+            for expiration, is_third_friday, curve in zip(
+                expiry_calendar.index, expiry_calendar["is_third_friday"].to_numpy(dtype=bool), curves
+            ):
+                previous = expiration_curves.get(expiration, (is_third_friday, 0))[1]
+                expiration_curves[expiration] = (is_third_friday, previous + curve)
+
+    per_strike = pd.DataFrame(
+        per_strike_sums["sum"],
+        index=pd.Index(list(per_strike_sums["positions"]), dtype=np.float64, name="strike"),
+        columns=["gex_at_call", "gex_at_put", "gamma_exposure_result"],
+    )
+
+    gamma_profile = None
+    if calc_flip_point:
+        gamma_profile = _streamed_gamma_profile(expiration_curves, levels, last_price, today_date)
+
+    return {
+        "raw_file_path": file_path,
+        "parse_only_zero_dte": parse_only_zero_dte,
+        "last_price": last_price,
+        "options": options,
+        "leads": None,
+        "per_strike": per_strike,
+        "gamma_profile": gamma_profile,
+    }
+
+
+def _streamed_gamma_profile(expiration_curves: dict, levels: np.ndarray, last_price: float, today_date) -> dict:
+    """Build the Gamma Profile (see `build_gamma_profile`) from the curves of every expiration."""
+    expirations = sorted(expiration_curves)
+    next_expiry = expirations[0] if expirations else pd.NaT
+    monthly_expirations = [expiration for expiration in expirations if expiration_curves[expiration][0]]
+    next_monthly_expiry = monthly_expirations[0] if monthly_expirations else pd.NaT
+
+    curves = np.zeros((len(PROFILE_CURVES), len(levels)))
+    for expiration in expirations:
+        curve = expiration_curves[expiration][1]
+        curves[0] += curve
+        if expiration != next_expiry:
+            curves[1] += curve
+        if expiration != next_monthly_expiry:
+            curves[2] += curve
+    curves = curves / 10**9
+    flips = interpolate_gamma_flips(levels, curves[0])
+    logger.info(f"Gamma zero crossings {flips} found with {len(levels)} spot levels evaluated (streaming grid).")
+
+    profile = {
+        "key": None,
+        "method": "grid",
+        "last_price": last_price,
+        "trade_date": today_date.date().isoformat(),
+        "next_expiry": next_expiry.date().isoformat() if pd.notna(next_expiry) else None,
+        "next_monthly_expiry": next_monthly_expiry.date().isoformat() if pd.notna(next_monthly_expiry) else None,
+        "levels": levels,
+        "flips": flips,
+        "flip_point": round(flips[0] / 5) * 5 if flips else None,
+    }
+    profile.update(zip(PROFILE_CURVES, curves))
+    if profile["flip_point"] is None:
+        logger.warning(f"Total gamma does not cross zero between {levels[0]:.2f} and {levels[-1]:.2f}.")
+    else:
+        logger.info(f"Calculated flip point {profile['flip_point']}")
+    return profile
+
+
+def process_cboe_csv(
+    file_path: str,
+    last_price: str,
+    parse_only_zero_dte: bool,
+    calc_flip_point: bool,
+    incremental: bool = False,
+    gamma_kernel: str | None = None,
+    streaming: bool = False,
+) -> dict:
+    """
+    Process a Raw CSV File from CBOE in memory, without storing anything (see `persist_cboe_chain`).
+    Args:
+        file_path (str): Path to the CSV file from CBOE.
+        last_price (str): Last price of the asset.
+        parse_only_zero_dte (bool): If we will consider only 0DTE options
+        calc_flip_point (bool): If we will calculate Flip Gamma Point
+        incremental (bool): Update the previous snapshot of the asset only with the contracts that changed
+        gamma_kernel (str | None): Gamma Exposure kernel of the Gamma Flip. Defaults to GAMMA_KERNEL.
+        streaming (bool): Read the file in chunks with bounded memory (see `stream_cboe_csv`)
+    Returns:
+        dict: {
+            "raw_file_path": str,
+            "parse_only_zero_dte": bool,
+            "last_price": float,
+            "options": int,
+            "leads": pd.DataFrame (see `generate_leads`), None in streaming mode,
+            "per_strike": pd.DataFrame ("gex_at_call", "gex_at_put", "gamma_exposure_result" indexed by strike),
+            "gamma_profile": dict | None (see `build_gamma_profile`),
+        }
+    """
+    if streaming:
+        if incremental:
+            raise ValueError("The incremental mode needs the options of the chain, it can not be used when streaming")
+        return stream_cboe_csv(file_path, last_price, parse_only_zero_dte, calc_flip_point, gamma_kernel)
+
     df, _metadata = load_cboe_csv(file_path)
     logger.info(f"Calculating the leads for '{len(df)}' Strikes at '{file_path}'...")
-    processed_strikes = generate_leads(df, _metadata, last_price, parse_only_zero_dte, calc_flip_point, file_path)
-    return save_processed_strikes(processed_strikes, file_path)
+    leads = generate_leads(df, _metadata, last_price, parse_only_zero_dte, False, file_path)
+
+    if incremental:
+        per_strike = incremental_leads_per_strike(leads, file_path, parse_only_zero_dte)
+    else:
+        per_strike = sum_gex_per_strike(leads)
+
+    gamma_profile = None
+    if calc_flip_point:
+        gamma_profile = build_gamma_profile(
+            df,
+            _metadata,
+            leads.attrs["last_price"],
+            parse_only_zero_dte,
+            file_path,
+            incremental=incremental,
+            gamma_kernel=gamma_kernel,
+        )
+
+    return {
+        "raw_file_path": file_path,
+        "parse_only_zero_dte": parse_only_zero_dte,
+        "last_price": leads.attrs["last_price"],
+        "options": len(leads),
+        "leads": leads,
+        "per_strike": per_strike,
+        "gamma_profile": gamma_profile,
+    }
+
+
+def persist_cboe_chain(chain: dict, export_json: bool = False) -> str:
+    """
+    Store a chain processed by `process_cboe_csv`: the processed archive, the per strike history, the summary
+    levels and, when calculated, the Gamma Profile and the Gamma Flip point.
+    Args:
+        chain (dict): The processed chain.
+        export_json (bool): Also store the processed data as a human readable JSON file
+    Returns:
+        str: Processed file path.
+    """
+    raw_file_path, parse_only_zero_dte = chain["raw_file_path"], chain["parse_only_zero_dte"]
+    last_price = chain["last_price"]
+    if chain["leads"] is not None:
+        processed_file = save_processed_strikes(
+            chain["leads"], raw_file_path, export_json=export_json, per_strike=chain["per_strike"]
+        )
+    else:
+        if export_json:
+            logger.warning(f"The JSON export needs the options, skipped for the streamed '{raw_file_path}'")
+        processed_file = save_processed_per_strike(chain["per_strike"], raw_file_path, last_price, chain["options"])
+
+    save_gex_strikes(raw_file_path, parse_only_zero_dte, chain["per_strike"])
+    levels = {"last_price": last_price, **summary_levels(chain["per_strike"], last_price)}
+    if chain["gamma_profile"] is not None:
+        store_gamma_flip(chain["gamma_profile"], raw_file_path, parse_only_zero_dte, **levels)
+    else:
+        save_gex_results(raw_file_path, parse_only_zero_dte, **levels)
+    return processed_file
+
+
+def parse_cboe_csv(
+    file_path: str,
+    last_price: str,
+    parse_only_zero_dte: bool,
+    calc_flip_point: bool,
+    export_json: bool = False,
+    incremental: bool = False,
+    gamma_kernel: str | None = None,
+    streaming: bool = False,
+) -> str:
+    """
+    Manage processing of Raw CSV File from CBOE (process it and store the results).
+    Args:
+        file_path (str): Path to the CSV file from CBOE.
+        last_price (str): Last price of the asset.
+        parse_only_zero_dte (bool): If we will consider only 0DTE options
+        calc_flip_point (bool): If we will calculate Flip Gamma Point
+        export_json (bool): Also store the processed data as a human readable JSON file
+        incremental (bool): Update the previous snapshot of the asset only with the contracts that changed
+        gamma_kernel (str | None): Gamma Exposure kernel of the Gamma Flip. Defaults to GAMMA_KERNEL.
+        streaming (bool): Read the file in chunks with bounded memory (see `stream_cboe_csv`)
+    Returns:
+        str: Processed file path.
+    """
+    chain = process_cboe_csv(
+        file_path, last_price, parse_only_zero_dte, calc_flip_point, incremental, gamma_kernel, streaming
+    )
+    return persist_cboe_chain(chain, export_json=export_json)
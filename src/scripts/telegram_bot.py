@@ -1,15 +1,37 @@
+import asyncio
+import hashlib
 import os
 import logging
+import threading
+import time
+from concurrent.futures import Future, wait
+from datetime import timedelta
+from typing import Awaitable, Callable
 from typing_extensions import Buffer
 import requests
 
 from telegram import Bot
+from telegram.error import BadRequest, NetworkError, RetryAfter, TimedOut
+from telegram.request import HTTPXRequest
 from jmespath import search as jsearch
 
-from src.settings import TELEGRAM_TOKEN, TELEGRAM_CHAT_IDS_FILE
+from src.settings import (
+    TELEGRAM_CHAT_BURST,
+    TELEGRAM_CHAT_IDS_FILE,
+    TELEGRAM_CHAT_RATE,
+    TELEGRAM_CONNECTION_POOL_SIZE,
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_GROUP_RATE_PER_MINUTE,
+    TELEGRAM_RETRY_BACKOFF_SECONDS,
+    TELEGRAM_SEND_RETRIES,
+    TELEGRAM_TOKEN,
+)
 
 logger = logging.getLogger(__name__)
 
+# Uploaded photos whose Telegram file ID is kept for the next sends of the same content
+UPLOADED_PHOTOS_KEPT = 256
+
 
 class IntegrateTelegramBot:
     def __init__(self, telegram_bot_token: str = "") -> None:
@@ -87,11 +109,265 @@ class IntegrateTelegramBot:
         logger.error(f"Failed to get chat_ids: {response.text}")
         return set()
 
-    async def send_all(self, message: str):
-        """Send a message to all known chat IDs.
+    async def send_all(self, message: str) -> int:
+        """Send a message to all known chat IDs, concurrently within the Telegram rate limits.
 
         Args:
             message (str): The message text to send to all chats.
+
+        Returns:
+            int: Number of chats the message could not be sent to.
+        """
+        delivery = TelegramDelivery(self.telegram_bot_token)
+        try:
+            futures = delivery.broadcast(self.get_telegram_chat_ids(), message=message)
+            results = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures), return_exceptions=True)
+        finally:
+            await asyncio.to_thread(delivery.close)
+        return sum(1 for result in results if isinstance(result, BaseException))
+
+
+class TokenBucket:
+    """
+    Token bucket of an event loop: `rate` tokens per second, at most `capacity` at once. Waiting sends take their
+    tokens in FIFO order.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1) -> None:
+        """
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float): Tokens kept at most (burst).
+        """
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """
+        Wait for a token and take it (never waits when the rate is not positive).
+        """
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _retry_after_seconds(error: RetryAfter) -> float:
+    retry_after = error.retry_after
+    return retry_after.total_seconds() if isinstance(retry_after, timedelta) else float(retry_after)
+
+
+class TelegramDelivery:
+    """
+    Deliver messages and photos with one long-lived Bot (and its HTTP connection pool) on one event loop, running
+    in a background thread. Sends are queued from any thread and run concurrently across chats, in order within
+    each chat.
+
+    Every send waits for the token buckets of the bot (TELEGRAM_GLOBAL_RATE) and of its chat (TELEGRAM_CHAT_RATE,
+    TELEGRAM_GROUP_RATE_PER_MINUTE for groups) and is retried on network errors and flood control. A photo is
+    uploaded once: the other sends of the same content reuse the file ID Telegram returned.
+    """
+
+    def __init__(self, telegram_bot_token: str = "", pool_size: int = TELEGRAM_CONNECTION_POOL_SIZE) -> None:
+        """
+        Args:
+            telegram_bot_token (str, optional): Telegram bot token. Defaults to TELEGRAM_TOKEN.
+            pool_size (int): Connections kept open to the Telegram API.
+
+        Raises:
+            ValueError: If no Telegram bot token is provided.
+        """
+        telegram_bot_token = telegram_bot_token or TELEGRAM_TOKEN
+        if not telegram_bot_token:
+            raise ValueError("Missing Telegram Bot Token")
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="telegram-delivery", daemon=True)
+        self._thread.start()
+        request = HTTPXRequest(connection_pool_size=max(1, pool_size), pool_timeout=30.0)
+        self.bot = Bot(token=telegram_bot_token, request=request)
+        # {chat ID: lock of the chat}, {chat ID: token bucket of the chat}, only used on the loop
+        self._chat_locks = {}
+        self._chat_buckets = {}
+        self._bot_bucket = TokenBucket(TELEGRAM_GLOBAL_RATE)
+        # {SHA-1 of a photo: future of its Telegram file ID (None if the upload failed)}, only used on the loop
+        self._uploads = {}
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+
+    async def _send_in_order(self, chat_id: str, send: Callable[[], Awaitable]) -> object:
+        # asyncio locks are acquired in FIFO order, which keeps the order of each chat
+        lock = self._chat_locks.setdefault(str(chat_id), asyncio.Lock())
+        async with lock:
+            start = time.perf_counter()
+            result = await send()
+            logger.debug(f"Delivered to chat '{chat_id}' in {time.perf_counter() - start:.3f}s")
+            return result
+
+    def _chat_bucket(self, chat_id: str) -> TokenBucket:
+        if str(chat_id) not in self._chat_buckets:
+            # Group and channel IDs are negative
+            if str(chat_id).startswith("-"):
+                bucket = TokenBucket(TELEGRAM_GROUP_RATE_PER_MINUTE / 60, TELEGRAM_CHAT_BURST)
+            else:
+                bucket = TokenBucket(TELEGRAM_CHAT_RATE, TELEGRAM_CHAT_BURST)
+            self._chat_buckets[str(chat_id)] = bucket
+        return self._chat_buckets[str(chat_id)]
+
+    async def _call(self, chat_id: str, send: Callable[[], Awaitable], retry_timeouts: bool = True) -> object:
+        """
+        Run a Telegram request within the rate limits, retrying it on network errors (exponential backoff) and
+        flood control (the wait Telegram asks for). Rejected requests (bad request, blocked bot) are not retried,
+        nor timed out ones without `retry_timeouts` (the request may have reached Telegram, a retry would post
+        it twice).
+        """
+        for attempt in range(TELEGRAM_SEND_RETRIES + 1):
+            await self._chat_bucket(chat_id).acquire()
+            await self._bot_bucket.acquire()
+            try:
+                return await send()
+            except RetryAfter as err:
+                delay = _retry_after_seconds(err)
+                error = err
+            except BadRequest:
+                raise
+            except NetworkError as err:
+                if isinstance(err, TimedOut) and not retry_timeouts:
+                    raise
+                delay = TELEGRAM_RETRY_BACKOFF_SECONDS * 2**attempt
+                error = err
+            if attempt == TELEGRAM_SEND_RETRIES:
+                raise error
+            logger.warning(f"Telegram send to chat '{chat_id}' failed ({error!r}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def _send_photo(self, chat_id: str, photo: bytes) -> object:
+        digest = hashlib.sha1(photo).hexdigest()
+        upload = self._uploads.get(digest)
+        if upload is not None:
+            file_id = await asyncio.shield(upload)
+            if file_id is None:
+                # The upload failed, upload it again (or wait for the chat that does)
+                return await self._send_photo(chat_id, photo)
+            return await self._call(chat_id, lambda: self.bot.send_photo(chat_id=chat_id, photo=file_id))
+
+        upload = self._uploads[digest] = self._loop.create_future()
+        for stale in [key for key, uploaded in self._uploads.items() if uploaded.done()][:-UPLOADED_PHOTOS_KEPT]:
+            del self._uploads[stale]
+        try:
+            message = await self._call(chat_id, lambda: self.bot.send_photo(chat_id=chat_id, photo=photo))
+        except BaseException:
+            del self._uploads[digest]
+            upload.set_result(None)
+            raise
+        if not message.photo:
+            # Nothing to reuse, the next send uploads it again
+            del self._uploads[digest]
+            upload.set_result(None)
+            return message
+        upload.set_result(message.photo[-1].file_id)
+        return message
+
+    def _sent(self, future: Future) -> None:
+        with self._pending_lock:
+            self._pending.discard(future)
+        if not future.cancelled() and future.exception():
+            logger.error(f"Failed to deliver a Telegram message: {future.exception()!r}")
+
+    def _queue(self, chat_id: str, send: Callable[[], Awaitable]) -> Future:
+        future = asyncio.run_coroutine_threadsafe(self._send_in_order(chat_id, send), self._loop)
+        with self._pending_lock:
+            self._pending.add(future)
+        future.add_done_callback(self._sent)
+        return future
+
+    def send_message(self, chat_id: str, message: str) -> Future:
+        """
+        Queue a text message (HTML parse mode).
+
+        Args:
+            chat_id (str): The target chat ID.
+            message (str): The message text to send.
+
+        Returns:
+            Future: Done when the message is sent.
+        """
+        return self._queue(
+            chat_id,
+            lambda: self._call(
+                chat_id,
+                lambda: self.bot.send_message(chat_id=chat_id, text=message, parse_mode="HTML"),
+                retry_timeouts=False,
+            ),
+        )
+
+    def send_photo(self, chat_id: str, photo: bytes) -> Future:
+        """
+        Queue a photo. The same content is uploaded once, the next sends reuse its Telegram file ID.
+
+        Args:
+            chat_id (str): The target chat ID.
+            photo (bytes): Content of the photo (read when queued, later changes of the file are not sent).
+
+        Returns:
+            Future: Done when the photo is sent.
+        """
+        return self._queue(chat_id, lambda: self._send_photo(chat_id, photo))
+
+    def broadcast(self, chat_ids, message: str | None = None, photo: bytes | None = None) -> list[Future]:
+        """
+        Queue a photo and/or a message (after the photo) to many chats at once, sent concurrently within the rate
+        limits, the photo uploaded once.
+
+        Args:
+            chat_ids (Iterable[str]): Target chats.
+            message (str | None): The message text to send.
+            photo (bytes | None): Content of the photo.
+
+        Returns:
+            list[Future]: Sends queued.
+        """
+        futures = []
+        for chat_id in chat_ids:
+            if photo is not None:
+                futures.append(self.send_photo(chat_id, photo))
+            if message is not None:
+                futures.append(self.send_message(chat_id, message))
+        return futures
+
+    def flush(self, futures: list[Future] | None = None, timeout: float | None = None) -> int:
+        """
+        Wait until the queued sends are done.
+
+        Args:
+            futures (list[Future] | None): Sends to wait for. Defaults to every queued send.
+            timeout (float | None): Seconds to wait at most.
+
+        Returns:
+            int: Number of sends that failed or are not done.
+        """
+        if futures is None:
+            with self._pending_lock:
+                futures = list(self._pending)
+        done, not_done = wait(futures, timeout=timeout)
+        return len(not_done) + sum(1 for future in done if future.cancelled() or future.exception())
+
+    def close(self) -> None:
+        """
+        Send what is queued, close the connection pool and stop the event loop.
         """
-        for chat_id in self.get_telegram_chat_ids():
-            await self._send_telegram_message(message=message, chat_id=chat_id)
+        self.flush()
+        asyncio.run_coroutine_threadsafe(self.bot.shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
@@ -19,14 +19,100 @@ RAW_DIR = os.path.join(DOWNLOADS_BASE_DIR, "raw")
 PROCESSED_DIR = os.path.join(DOWNLOADS_BASE_DIR, "processed")
 REPORTS_DIR = os.path.join(DOWNLOADS_BASE_DIR, "reports")
 TEMP_DIR = os.path.join(DOWNLOADS_BASE_DIR, "temp_files")
+BENCHMARKS_DIR = os.path.join(DOWNLOADS_BASE_DIR, "benchmarks")
+METRICS_DIR = os.path.join(DOWNLOADS_BASE_DIR, "metrics")
+GAMMA_PROFILES_DIR = os.path.join(DOWNLOADS_BASE_DIR, "profiles")
+CACHE_DIR = os.path.join(DOWNLOADS_BASE_DIR, "cache")
+PARSED_CHAINS_CACHE_DIR = os.path.join(CACHE_DIR, "parsed_chains")
+EXPIRY_CALENDARS_CACHE_DIR = os.path.join(CACHE_DIR, "expiry_calendars")
+SNAPSHOTS_CACHE_DIR = os.path.join(CACHE_DIR, "snapshots")
+DOWNLOAD_CACHE_DIR = os.path.join(CACHE_DIR, "downloads")
 WEBHOOK_BASE_DIR = os.path.join(PROJECT_BASE_DIR, "webhook_files")
 
 os.makedirs(RAW_DIR, exist_ok=True)
 os.makedirs(PROCESSED_DIR, exist_ok=True)
 os.makedirs(REPORTS_DIR, exist_ok=True)
 os.makedirs(TEMP_DIR, exist_ok=True)
+os.makedirs(BENCHMARKS_DIR, exist_ok=True)
+os.makedirs(METRICS_DIR, exist_ok=True)
+os.makedirs(GAMMA_PROFILES_DIR, exist_ok=True)
+os.makedirs(PARSED_CHAINS_CACHE_DIR, exist_ok=True)
+os.makedirs(EXPIRY_CALENDARS_CACHE_DIR, exist_ok=True)
+os.makedirs(SNAPSHOTS_CACHE_DIR, exist_ok=True)
+os.makedirs(DOWNLOAD_CACHE_DIR, exist_ok=True)
 os.makedirs(WEBHOOK_BASE_DIR, exist_ok=True)
 
+# Exchange holidays skipped by the business days count. Comma separated (2025-11-27,2025-12-25)
+EXCHANGE_HOLIDAYS = [day.strip() for day in os.getenv("EXCHANGE_HOLIDAYS", "").split(",") if day.strip()]
+
+# Browser of the downloads: saved storage state (cookies consent, local storage) and navigations before a kept
+# warm browser is recycled
+BROWSER_STORAGE_STATE_FILE = os.path.join(CACHE_DIR, "browser_storage_state.json")
+BROWSER_MAX_USES = int(os.getenv("BROWSER_MAX_USES", "50"))
+
+# Optional human-like random pause (seconds, uniform between min and max) after every page action of the
+# downloads, on top of the waits for the page conditions. 0 disables it
+DOWNLOAD_JITTER_MIN_SECONDS = float(os.getenv("DOWNLOAD_JITTER_MIN_SECONDS", "0"))
+DOWNLOAD_JITTER_MAX_SECONDS = float(os.getenv("DOWNLOAD_JITTER_MAX_SECONDS", "0"))
+
+# Download cache: seconds a download fetched during a market session is served again (0 disables it). Downloads
+# fetched after the last close are served until the next session (MARKET_OPEN/CLOSE_TIME at MARKET_TIMEZONE,
+# weekends and EXCHANGE_HOLIDAYS closed; the close includes the delay of the quotes)
+DOWNLOAD_CACHE_TTL_SECONDS = float(os.getenv("DOWNLOAD_CACHE_TTL_SECONDS", "900"))
+MARKET_TIMEZONE = os.getenv("MARKET_TIMEZONE", "America/New_York")
+MARKET_OPEN_TIME = os.getenv("MARKET_OPEN_TIME", "09:30")
+MARKET_CLOSE_TIME = os.getenv("MARKET_CLOSE_TIME", "16:30")
+
+# Downloads: "browser" (Playwright, quote table page) or "http" (delayed quotes API, no browser) and the API
+# base URL (e.g. a stand-in server, `python -m src.downloader.cboe_stub_server`)
+DOWNLOAD_METHOD = os.getenv("DOWNLOAD_METHOD", "browser")
+CBOE_API_BASE_URL = os.getenv("CBOE_API_BASE_URL") or "https://cdn.cboe.com/api/global/delayed_quotes/options"
+CBOE_API_TIMEOUT = float(os.getenv("CBOE_API_TIMEOUT", "30"))
+
+# Pages driven at the same time by the concurrent downloads (`--concurrent_downloads`, one shared browser)
+DOWNLOAD_CONCURRENCY = int(os.getenv("DOWNLOAD_CONCURRENCY", "4"))
+
+# Options read per chunk by the streaming parser (`--streaming`), bounds its peak memory
+CBOE_CSV_CHUNK_ROWS = int(os.getenv("CBOE_CSV_CHUNK_ROWS", "5000"))
+
+# Gamma Flip solver: "grid" (interpolated 60 levels grid) or "brent" (bracketed root-finding)
+GAMMA_FLIP_METHOD = os.getenv("GAMMA_FLIP_METHOD", "grid")
+GAMMA_FLIP_XTOL = float(os.getenv("GAMMA_FLIP_XTOL", "0.5"))
+GAMMA_FLIP_COARSE_POINTS = int(os.getenv("GAMMA_FLIP_COARSE_POINTS", "16"))
+# Gamma Exposure kernel: "numpy" (vectorized), "scalar" (reference) or "numba" (JIT, when numba is installed)
+GAMMA_KERNEL = os.getenv("GAMMA_KERNEL", "numpy")
+
+# Incremental mode: spot move (fraction of the price) that re-anchors the levels grid, and the number of
+# incremental updates between full recomputes (which log the accumulated drift)
+INCREMENTAL_REANCHOR_THRESHOLD = float(os.getenv("INCREMENTAL_REANCHOR_THRESHOLD", "0.01"))
+INCREMENTAL_FULL_RECOMPUTE_EVERY = int(os.getenv("INCREMENTAL_FULL_RECOMPUTE_EVERY", "12"))
+
+# Benchmark suite: runs history (JSON Lines) and accepted slowdown of a stage against the baseline (0.25 = 25%)
+BENCHMARK_HISTORY_FILE = os.path.join(BENCHMARKS_DIR, "benchmark_history.jsonl")
+BENCHMARK_REGRESSION_THRESHOLD = float(os.getenv("BENCHMARK_REGRESSION_THRESHOLD", "0.25"))
+
+# Pipeline instrumentation: stage records (JSON Lines) and the Prometheus text-format file of the last run
+# (point PROMETHEUS_TEXTFILE to the node_exporter textfile collector directory)
+PIPELINE_METRICS_FILE = os.path.join(METRICS_DIR, "pipeline_metrics.jsonl")
+PROMETHEUS_TEXTFILE = os.getenv("PROMETHEUS_TEXTFILE") or os.path.join(METRICS_DIR, "gex_indicator.prom")
+INSTRUMENTATION_TRACE_MEMORY = os.getenv("INSTRUMENTATION_TRACE_MEMORY", "false").lower() == "true"
+
+# Results store (SQLite): flip points and summary levels per asset, filters and trade date
+RESULTS_DB_PATH = os.getenv("RESULTS_DB_PATH") or os.path.join(DOWNLOADS_BASE_DIR, "gex_results.sqlite3")
+
 WEBHOOK_DOMAIN = os.getenv("WEBHOOK_DOMAIN")
 TELEGRAM_TOKEN = os.getenv("GEX_INDICATOR_TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_IDS_FILE = os.path.join(WEBHOOK_BASE_DIR, "chat_ids.txt")
+# Connections kept open to the Telegram API by the deliveries (one Bot and event loop per process)
+TELEGRAM_CONNECTION_POOL_SIZE = int(os.getenv("TELEGRAM_CONNECTION_POOL_SIZE", "8"))
+# Telegram limits (messages per second): whole bot, each private chat (with a short burst) and each group per minute
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+TELEGRAM_CHAT_BURST = int(os.getenv("TELEGRAM_CHAT_BURST", "3"))
+TELEGRAM_GROUP_RATE_PER_MINUTE = float(os.getenv("TELEGRAM_GROUP_RATE_PER_MINUTE", "20"))
+# Retries of a failed send (network errors back off exponentially, flood control waits as long as Telegram asks)
+TELEGRAM_SEND_RETRIES = int(os.getenv("TELEGRAM_SEND_RETRIES", "3"))
+TELEGRAM_RETRY_BACKOFF_SECONDS = float(os.getenv("TELEGRAM_RETRY_BACKOFF_SECONDS", "1"))
+# Webhook jobs: long-lived worker processes and the jobs waiting for them before new requests are turned down
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "2"))
+WEBHOOK_MAX_QUEUED_JOBS = int(os.getenv("WEBHOOK_MAX_QUEUED_JOBS", "8"))
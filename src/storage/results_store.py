@@ -0,0 +1,293 @@
+import logging
+import numpy as np
+import os
+import pandas as pd
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+from src.settings import RESULTS_DB_PATH, TEMP_DIR
+from src.utils import extract_date
+
+logger = logging.getLogger(__name__)
+
+# Key of a result: (asset, expiration type, expiration month, 0DTE flag, trade date)
+RESULT_KEY_COLUMNS = ["asset", "expiration_type", "expiration_month", "zero_dte", "trade_date"]
+# Values of a result, every one optional (only the given ones are written)
+RESULT_VALUE_COLUMNS = ["raw_file", "last_price", "flip_point", "total_gex", "call_wall", "put_wall"]
+# Per strike Gamma Exposure arrays of the history (besides the strikes)
+GEX_HISTORY_COLUMNS = ["call_gex", "put_gex", "total_gex"]
+# Strikes around the last price considered for the walls (same window as the charts)
+WALLS_WINDOW_STRIKES = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS gex_results (
+    asset TEXT NOT NULL,
+    expiration_type TEXT NOT NULL,
+    expiration_month TEXT NOT NULL,
+    zero_dte INTEGER NOT NULL,
+    trade_date TEXT NOT NULL,
+    raw_file TEXT,
+    last_price REAL,
+    flip_point REAL,
+    flip_calculated INTEGER NOT NULL DEFAULT 0,
+    total_gex REAL,
+    call_wall REAL,
+    put_wall REAL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (asset, expiration_type, expiration_month, zero_dte, trade_date)
+);
+CREATE TABLE IF NOT EXISTS gex_strikes (
+    asset TEXT NOT NULL,
+    expiration_type TEXT NOT NULL,
+    expiration_month TEXT NOT NULL,
+    zero_dte INTEGER NOT NULL,
+    trade_date TEXT NOT NULL,
+    strikes BLOB NOT NULL,
+    call_gex BLOB NOT NULL,
+    put_gex BLOB NOT NULL,
+    total_gex BLOB NOT NULL,
+    PRIMARY KEY (asset, expiration_type, expiration_month, zero_dte, trade_date)
+);
+"""
+
+
+def parse_raw_file_name(file_path: str, parse_only_zero_dte: bool = False) -> dict:
+    """
+    Get the key of the results of a raw file.
+    Args:
+        file_path (str): Path or name of the raw file (cboe_<asset>_quotedata_<type>[_<month>]_<DD-MM-YY>.csv),
+            the "processed_" prefix and the extension are optional.
+        parse_only_zero_dte (bool): If only 0DTE options are considered
+    Returns:
+        dict: {"asset", "expiration_type", "expiration_month", "zero_dte", "trade_date" (YYYY-MM-DD)}
+    """
+    name = os.path.splitext(os.path.basename(file_path))[0].removeprefix("processed_").removeprefix("cboe_")
+    asset, _, filters = name.rsplit("_", 1)[0].partition("_quotedata")
+    filters = [part for part in filters.split("_") if part]
+    return {
+        "asset": asset.lower(),
+        "expiration_type": filters[0].lower() if filters else "all",
+        "expiration_month": filters[1].lower() if len(filters) > 1 else "all",
+        "zero_dte": int(bool(parse_only_zero_dte)),
+        "trade_date": extract_date(name).date().isoformat(),
+    }
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the results store (WAL, so readers do not wait for the backfill writers), creating it if needed."""
+    created = not os.path.exists(RESULTS_DB_PATH)
+    connection = sqlite3.connect(RESULTS_DB_PATH, timeout=30)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(SCHEMA)
+    if created:
+        _import_flip_files(connection)
+    return connection
+
+
+def _import_flip_files(connection: sqlite3.Connection) -> None:
+    """Import the flip points stored as 'flip_point_<raw file name>.txt' files at TEMP_DIR by older versions."""
+    flip_files = [f for f in os.listdir(TEMP_DIR) if f.startswith("flip_point_") and f.endswith(".txt")]
+    for flip_file in flip_files:
+        with open(os.path.join(TEMP_DIR, flip_file), "r") as f:
+            flip_point = f.read().strip()
+        raw_file = f"{flip_file.removeprefix('flip_point_').removesuffix('.txt')}.csv"
+        _upsert(
+            connection,
+            parse_raw_file_name(raw_file),
+            {"raw_file": raw_file, "flip_point": float(flip_point) if flip_point else None},
+        )
+    if flip_files:
+        logger.info(f"Imported {len(flip_files)} flip point files from {TEMP_DIR} into {RESULTS_DB_PATH}")
+
+
+def _upsert(connection: sqlite3.Connection, key: dict, values: dict) -> None:
+    if "flip_point" in values:
+        values = {**values, "flip_calculated": 1}
+    columns = [*RESULT_KEY_COLUMNS, *values, "updated_at"]
+    updates = ", ".join(f"{column} = excluded.{column}" for column in [*values, "updated_at"])
+    with connection:  # One transaction: the row is written completely or not at all
+        connection.execute(
+            f"INSERT INTO gex_results ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT ({', '.join(RESULT_KEY_COLUMNS)}) DO UPDATE SET {updates}",
+            [*(key[column] for column in RESULT_KEY_COLUMNS), *values.values(), datetime.now().isoformat()],
+        )
+
+
+def save_gex_results(raw_file_path: str, parse_only_zero_dte: bool, **values) -> None:
+    """
+    Store (insert or update) the results of a raw file.
+    Args:
+        raw_file_path (str): Path of the raw file the results were calculated from.
+        parse_only_zero_dte (bool): If only 0DTE options were considered
+        **values: Results to store (RESULT_VALUE_COLUMNS), the other stored values are kept. A given
+            "flip_point" marks the Gamma Flip as calculated, even when it is None (no crossing).
+    """
+    unknown = values.keys() - set(RESULT_VALUE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown result columns: {sorted(unknown)}")
+    values = {column: float(value) if isinstance(value, np.floating) else value for column, value in values.items()}
+    values.setdefault("raw_file", os.path.basename(raw_file_path))
+
+    with closing(_connect()) as connection:
+        _upsert(connection, parse_raw_file_name(raw_file_path, parse_only_zero_dte), values)
+
+
+def load_gex_results(raw_file_path: str, parse_only_zero_dte: bool) -> dict | None:
+    """
+    Load the results of a raw file.
+    Args:
+        raw_file_path (str): Path of the raw file.
+        parse_only_zero_dte (bool): If only 0DTE options were considered
+    Returns:
+        dict | None: The stored row, None if there is none.
+    """
+    key = parse_raw_file_name(raw_file_path, parse_only_zero_dte)
+    with closing(_connect()) as connection:
+        row = connection.execute(
+            f"SELECT * FROM gex_results WHERE {' AND '.join(f'{column} = ?' for column in RESULT_KEY_COLUMNS)}",
+            [key[column] for column in RESULT_KEY_COLUMNS],
+        ).fetchone()
+    return dict(row) if row else None
+
+
+def latest_flip_point(raw_file_path: str, parse_only_zero_dte: bool) -> float | None:
+    """
+    Find the last calculated Gamma Flip point of the same asset and filters, up to the trade date of a raw file.
+    Args:
+        raw_file_path (str): Path of the raw file.
+        parse_only_zero_dte (bool): If only 0DTE options are considered
+    Returns:
+        float | None: The flip point, None if it was never calculated or the total gamma did not cross zero.
+    """
+    key = parse_raw_file_name(raw_file_path, parse_only_zero_dte)
+    with closing(_connect()) as connection:
+        # Served by the primary key index (the trade date is its last column)
+        row = connection.execute(
+            "SELECT flip_point FROM gex_results "
+            "WHERE asset = ? AND expiration_type = ? AND expiration_month = ? AND zero_dte = ? "
+            "AND trade_date <= ? AND flip_calculated = 1 ORDER BY trade_date DESC LIMIT 1",
+            [key[column] for column in RESULT_KEY_COLUMNS],
+        ).fetchone()
+    return row["flip_point"] if row else None
+
+
+def summary_levels(per_strike: pd.DataFrame, last_price: float) -> dict:
+    """
+    Summary levels of a chain: total Gamma Exposure and the Call / Put walls (strikes of the highest and
+    lowest total exposure among the WALLS_WINDOW_STRIKES strikes around the last price).
+    Args:
+        per_strike (pd.DataFrame): "gamma_exposure_result" indexed by strike.
+        last_price (float): Last price of the asset.
+    Returns:
+        dict: {"total_gex", "call_wall", "put_wall"}
+    """
+    if per_strike.empty:
+        return {"total_gex": 0.0, "call_wall": None, "put_wall": None}
+    per_strike = per_strike.sort_index()
+    strikes = per_strike.index.to_numpy(dtype=np.float64)
+    totals = per_strike["gamma_exposure_result"].to_numpy(dtype=np.float64)
+    last_idx = int(np.argmin(np.abs(strikes - last_price)))
+    window = slice(max(0, last_idx - WALLS_WINDOW_STRIKES), last_idx + WALLS_WINDOW_STRIKES + 1)
+    return {
+        "total_gex": float(totals.sum()),
+        "call_wall": float(strikes[window][np.argmax(totals[window])]),
+        "put_wall": float(strikes[window][np.argmin(totals[window])]),
+    }
+
+
+def save_gex_strikes(raw_file_path: str, parse_only_zero_dte: bool, per_strike: pd.DataFrame) -> None:
+    """
+    Store the per strike Gamma Exposure of a raw file in the history, one row per trade date holding the
+    sorted strikes and their Gamma Exposure as float64 arrays (replacing the row of the same key).
+    Args:
+        raw_file_path (str): Path of the raw file the Gamma Exposure was calculated from.
+        parse_only_zero_dte (bool): If only 0DTE options were considered
+        per_strike (pd.DataFrame): "gex_at_call", "gex_at_put", "gamma_exposure_result" indexed by strike.
+    """
+    key = parse_raw_file_name(raw_file_path, parse_only_zero_dte)
+    per_strike = per_strike.sort_index()
+    arrays = [
+        per_strike.index.to_numpy(dtype="<f8"),
+        *(
+            per_strike[column].to_numpy(dtype="<f8")
+            for column in ["gex_at_call", "gex_at_put", "gamma_exposure_result"]
+        ),
+    ]
+    with closing(_connect()) as connection, connection:
+        connection.execute(
+            f"INSERT OR REPLACE INTO gex_strikes ({', '.join(RESULT_KEY_COLUMNS)}, strikes, call_gex, put_gex, "
+            "total_gex) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [*(key[column] for column in RESULT_KEY_COLUMNS), *(array.tobytes() for array in arrays)],
+        )
+
+
+def load_gex_history(
+    asset: str,
+    start_date: str,
+    end_date: str,
+    strike_min: float = -np.inf,
+    strike_max: float = np.inf,
+    expiration_type: str = "all",
+    expiration_month: str = "all",
+    parse_only_zero_dte: bool = False,
+) -> dict:
+    """
+    Load the per strike Gamma Exposure history of an asset as arrays aligned by trade date and strike.
+    Args:
+        asset (str): Asset (e.g. "spx").
+        start_date (str): First trade date (YYYY-MM-DD, or anything `pd.Timestamp` reads).
+        end_date (str): Last trade date.
+        strike_min (float): Lowest strike.
+        strike_max (float): Highest strike.
+        expiration_type (str): Expiration type filter of the downloads.
+        expiration_month (str): Expiration month filter of the downloads.
+        parse_only_zero_dte (bool): If only 0DTE options were considered
+    Returns:
+        dict: {
+            "dates": np.ndarray (D,) datetime64[D], the stored trade dates of the range,
+            "strikes": np.ndarray (S,), every strike stored at any of the dates within the window,
+            "call", "put", "total": np.ndarray (D, S) Gamma Exposure, NaN where a date has no such strike,
+            "last_price", "flip_point", "call_wall", "put_wall": np.ndarray (D,), NaN when not stored,
+        }
+    """
+    key_values = [
+        asset.lower(),
+        expiration_type.lower(),
+        expiration_month.lower(),
+        int(bool(parse_only_zero_dte)),
+        pd.Timestamp(start_date).date().isoformat(),
+        pd.Timestamp(end_date).date().isoformat(),
+    ]
+    with closing(_connect()) as connection:
+        # Served by the primary key index: one range scan over the trade dates
+        rows = connection.execute(
+            "SELECT s.trade_date, s.strikes, s.call_gex, s.put_gex, s.total_gex, "
+            "r.last_price, r.flip_point, r.call_wall, r.put_wall FROM gex_strikes s "
+            f"LEFT JOIN gex_results r USING ({', '.join(RESULT_KEY_COLUMNS)}) "
+            "WHERE s.asset = ? AND s.expiration_type = ? AND s.expiration_month = ? AND s.zero_dte = ? "
+            "AND s.trade_date BETWEEN ? AND ? ORDER BY s.trade_date",
+            key_values,
+        ).fetchall()
+
+    snapshots = []
+    for row in rows:
+        strikes = np.frombuffer(row["strikes"], dtype="<f8")
+        window = (strikes >= strike_min) & (strikes <= strike_max)
+        snapshots.append(
+            [strikes[window], *(np.frombuffer(row[column], dtype="<f8")[window] for column in GEX_HISTORY_COLUMNS)]
+        )
+
+    strikes = np.unique(np.concatenate([snapshot[0] for snapshot in snapshots])) if snapshots else np.empty(0)
+    history = {"dates": np.array([row["trade_date"] for row in rows], dtype="datetime64[D]"), "strikes": strikes}
+    for name in ["call", "put", "total"]:
+        history[name] = np.full((len(rows), len(strikes)), np.nan)
+    for date_idx, (snapshot_strikes, *values) in enumerate(snapshots):
+        strike_idx = np.searchsorted(strikes, snapshot_strikes)
+        for name, value in zip(["call", "put", "total"], values):
+            history[name][date_idx, strike_idx] = value
+
+    for name in ["last_price", "flip_point", "call_wall", "put_wall"]:
+        history[name] = np.array([np.nan if row[name] is None else row[name] for row in rows], dtype=np.float64)
+    return history
@@ -1,4 +1,5 @@
 import numpy as np
+import os
 from datetime import datetime
 from scipy.stats import norm
 
@@ -26,7 +27,7 @@ def isThirdFriday(d):
 def extract_date(file_name):
     """Extract date from filename in format DD-MM-YY."""
     try:
-        date_part = file_name.split("_")[-1].replace(".txt", "")
+        date_part = os.path.splitext(file_name.split("_")[-1])[0]
         return datetime.strptime(date_part, "%d-%m-%y")
     except Exception:
         return datetime.min
@@ -5,7 +5,9 @@ import webbrowser
 from copy import deepcopy
 
 
-def process_metrics(total_gex_per_asset: dict, path_to_store: str, mode: str, telegram_chat_id: str):
+def process_metrics(
+    total_gex_per_asset: dict, path_to_store: str, mode: str, telegram_chat_id: str, open_in_browser: bool = True
+):
     """
     Plot Gamma Exposure focused on most relevant strikes.
 
@@ -15,6 +17,8 @@ def process_metrics(total_gex_per_asset: dict, path_to_store: str, mode: str, te
         mode (str): Options of plotting
             - total: aggregated exposure per strike
             - split: separate exposure for calls and puts
+        telegram_chat_id (str): Chat of the Telegram Mode, the charts are not opened in the browser when set.
+        open_in_browser (bool): Open the charts in a webbrowser window (outside of the Telegram Mode).
     """
     gex_metrics = deepcopy(total_gex_per_asset)
     for asset, gex_data in total_gex_per_asset.items():
@@ -24,6 +28,7 @@ def process_metrics(total_gex_per_asset: dict, path_to_store: str, mode: str, te
 
         last_price = gex_data.pop("last_price")
         flip_point = gex_data.pop("flip")
+        gex_data.pop("gamma_profile", None)
 
         # Sort strikes
         strikes = sorted([float(k) for k in gex_data.keys()])
@@ -257,7 +262,7 @@ def process_metrics(total_gex_per_asset: dict, path_to_store: str, mode: str, te
         fig.savefig(filename, dpi=150, bbox_inches="tight")
 
         # Show the charts into a webbrowser window
-        if not telegram_chat_id:
+        if open_in_browser and not telegram_chat_id:
             webbrowser.open("file://" + os.path.abspath(filename))
 
         # Close the fig